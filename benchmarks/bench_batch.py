@@ -0,0 +1,48 @@
+"""
+Compare T2 for M parameter sets from one `T2_batch` call against M `T2_function` calls.
+
+    python benchmarks/bench_batch.py [sample_file data_file] [-m 100 1000] [-threads 1]
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-m", type=int, nargs="+", default=[10, 100, 1000],
+                        help="numbers of parameter sets")
+    parser.add_argument("-threads", type=int, default=1, help="integrator threads (0 for all)")
+    args = parser.parse_args()
+
+    ft = Fit3omega(args.sample_file, args.data_file)
+    ft.n_threads = args.threads
+    x = ft.sample.x
+    rng = np.random.default_rng(0)
+
+    print("{:>8} {:>14} {:>14} {:>10}".format("M", "loop [ms]", "batch [ms]", "max |diff|"))
+    for m in args.m:
+        xs = x * np.exp(rng.uniform(-1., 1., (m, len(x))))
+        ft.T2_batch(xs[:1])  # configure the integrator
+
+        t0 = time.perf_counter()
+        looped = np.array([ft.T2_function(*ft.sample.substitute(row)) for row in xs])
+        t_loop = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batched = ft.T2_batch(xs)
+        t_batch = time.perf_counter() - t0
+
+        print("{:>8d} {:>14.1f} {:>14.1f} {:>10.1e}".format(
+            m, 1e3 * t_loop, 1e3 * t_batch, np.max(np.abs(batched - looped))))
+        assert np.array_equal(batched, looped)
@@ -0,0 +1,50 @@
+"""
+Time loading the inputs of a fit without a cache, on a cold cache, and on a warm one.
+
+    python benchmarks/bench_cache.py [sample_file data_file] [-n loads] [-mmap]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+from fit3omega import cache
+from fit3omega.data import Data
+from fit3omega.sample import load_sample_parameters
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def time_loads(sample_file: str, data_file: str, n: int, mmap: bool) -> float:
+    """mean seconds to load one (sample, data) pair"""
+    t0 = time.perf_counter()
+    for _ in range(n):
+        load_sample_parameters(sample_file)
+        Data(data_file, mmap=mmap).V3
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=50, help="number of loads")
+    parser.add_argument("-mmap", action="store_true", help="memory-map cached data columns")
+    args = parser.parse_args()
+
+    cache_root = tempfile.mkdtemp(prefix="fit3omega_cache_")
+    try:
+        os.environ.pop(cache.ENV_VAR, None)
+        t_none = time_loads(args.sample_file, args.data_file, args.n, args.mmap)
+
+        os.environ[cache.ENV_VAR] = cache_root
+        t_cold = time_loads(args.sample_file, args.data_file, 1, args.mmap)
+        t_warm = time_loads(args.sample_file, args.data_file, args.n, args.mmap)
+    finally:
+        shutil.rmtree(cache_root)
+
+    for label, seconds in (("no cache", t_none), ("cold cache", t_cold), ("warm cache", t_warm)):
+        print("{:>12}: {:8.3f} ms/load".format(label, 1e3 * seconds))
@@ -0,0 +1,55 @@
+"""
+Cost of the `Data` operations used by fits and batch jobs: loading a file,
+reading the cached properties, and changing the selected rows.
+
+    python benchmarks/bench_data.py [data_file] [-n calls]
+"""
+import os
+import time
+import argparse
+
+from fit3omega.data import Data
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def time_calls(f, n: int) -> float:
+    """mean seconds per call"""
+    f()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        f()
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=2000, help="number of calls")
+    args = parser.parse_args()
+
+    data = Data(args.data_file)
+    n_rows = len(data)
+    limits = [(0, n_rows), (1, n_rows - 1)]
+
+    def toggle_limits():
+        limits.reverse()
+        data.set_limits(*limits[0])
+        return data.V, data.V3, data.Vsh, data.omegas
+
+    def drop_and_reset():
+        data.drop_row(n_rows // 2)
+        data.V3
+        data.reset()
+        return data.V3
+
+    cases = (
+        ("load", lambda: Data(args.data_file), max(1, args.n // 20)),
+        ("omegas", lambda: data.omegas, args.n),
+        ("V, V3, Vsh", lambda: (data.V, data.V3, data.Vsh), args.n),
+        ("set_limits", toggle_limits, args.n),
+        ("drop_row+reset", drop_and_reset, args.n),
+    )
+    for label, f, n in cases:
+        print("{:>16}: {:10.2f} us/call".format(label, 1e6 * time_calls(f, n)))
@@ -0,0 +1,55 @@
+"""
+Time OGC integrals of a deep stack fitted only near the top, with the layers below the
+fitted ones unchanged between calls (their recursion is cached) and changed every call.
+
+    python benchmarks/bench_fixed_layers.py [-n calls]
+"""
+import argparse
+
+import numpy as np
+
+import integrate
+from fit3omega import numpy_integrate
+from bench_large_sweeps import make_stack, time_call, max_rel
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=10, help="number of calls")
+    args = parser.parse_args()
+
+    omegas = 2 * np.pi * np.logspace(0, 5, 300)
+
+    print("{:>8} {:>8} {:>14} {:>14} {:>10} {:>10} {:>10}".format(
+        "layers", "fitted", "cached [ms]", "changed [ms]", "speedup", "|rel|", "new |rel|"))
+
+    c_integrator = integrate.Integrator()
+    np_integrator = numpy_integrate.Integrator()
+    for n_layers in (4, 12, 24):
+        for depth in (1, 2, n_layers):
+            fit_indices = [(0, i) for i in range(depth)]
+            for integrator in (c_integrator, np_integrator):
+                integrator.ogc_set(omegas, fit_indices, 15e-6, 1e-6, 15., n_layers)
+            ds, kys, ratio_xys, Cvs, Rcs = make_stack(n_layers)
+            kys = np.array(kys)
+            stack = (ds, kys, ratio_xys, Cvs, Rcs)
+
+            t_cached = time_call(c_integrator.ogc_integral, stack, args.n)
+
+            # nudging the substrate forces the fixed layers to be recomputed every call
+            substrate = kys[-1]
+            def changed(*a):
+                kys[-1] = substrate * (1. + 1e-9 * np.random.random())
+                return c_integrator.ogc_integral(*a)
+            t_changed = time_call(changed, stack, args.n)
+
+            # the cache follows a real change of the fixed layers, and the change back
+            kys[-1] = 1.5 * substrate
+            rel_new = max_rel(c_integrator.ogc_integral(*stack),
+                              np_integrator.ogc_integral(*stack))
+            kys[-1] = substrate
+            rel = max_rel(c_integrator.ogc_integral(*stack), np_integrator.ogc_integral(*stack))
+            print("{:>8d} {:>8d} {:>14.2f} {:>14.2f} {:>10.1f} {:>10.1e} {:>10.1e}".format(
+                n_layers, depth, 1e3 * t_cached, 1e3 * t_changed, t_changed / t_cached, rel,
+                rel_new))
+            assert rel < 1e-12 and rel_new < 1e-12
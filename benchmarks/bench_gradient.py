@@ -0,0 +1,58 @@
+"""
+Compare finite-difference and analytic-gradient fits on the example data.
+
+    python benchmarks/bench_gradient.py [sample_file data_file] [-n repeats]
+"""
+import os
+import time
+import argparse
+import warnings
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+class CountingFit3omega(Fit3omega):
+    """counts calls into the C-extension integrators"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_integral = 0
+        self.n_jacobian = 0
+
+    def T2_function(self, *args):
+        self.n_integral += 1
+        return super().T2_function(*args)
+
+    def T2_jacobian(self, *args):
+        self.n_jacobian += 1
+        return super().T2_jacobian(*args)
+
+
+def run(sample_file: str, data_file: str, jac: bool, repeats: int) -> None:
+    label = "analytic" if jac else "finite-diff"
+    seconds = []
+    for _ in range(repeats):
+        ft = CountingFit3omega(sample_file, data_file)
+        t0 = time.perf_counter()
+        ft.fit(jac=jac)
+        seconds.append(time.perf_counter() - t0)
+
+    print("{:>12}: {:8.4f} s/fit | integrals {:4d} | jacobians {:4d} | nit {:3d} | MSE {:.6e}"
+          .format(label, min(seconds), ft.n_integral, ft.n_jacobian,
+                  ft.result.result.nit, ft.result.error))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=5, help="number of repeats (best is reported)")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    run(args.sample_file, args.data_file, jac=False, repeats=args.n)
+    run(args.sample_file, args.data_file, jac=True, repeats=args.n)
@@ -0,0 +1,71 @@
+"""
+Startup budget of the headless fit path (`python -m fit3omega ... -fit`), measured
+with `python -X importtime`. Exits with status 1 if the import time exceeds the
+budget or if a module reserved for plotting (matplotlib) or DataFrame views (pandas)
+was imported.
+
+    python benchmarks/bench_import_time.py [sample_file data_file] [-budget ms] [-n runs]
+"""
+import os
+import sys
+import argparse
+import subprocess
+from typing import Dict, Set, Tuple
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FORBIDDEN = ("matplotlib", "pandas")
+
+
+def import_times(sample_file: str, data_file: str) -> Tuple[Dict[str, int], Set[str]]:
+    """
+    Cumulative import time [us] of each top-level import in one headless fit run,
+    and the names of all modules imported.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        p for p in (REPO_DIR, os.environ.get("PYTHONPATH")) if p))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore",
+         "-m", "fit3omega", sample_file, data_file, "-fit"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=env, check=True
+    )
+    times = {}
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "):  # top-level imports only; nested times are included
+            times[name.strip()] = int(cumulative)
+    return times, modules
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-budget", type=float, default=700., help="import budget [ms]")
+    parser.add_argument("-n", type=int, default=5, help="number of runs (the fastest counts)")
+    args = parser.parse_args()
+
+    runs = [import_times(args.sample_file, args.data_file) for _ in range(args.n)]
+    best, modules = min(runs, key=lambda run: sum(run[0].values()))
+    total_ms = 1e-3 * sum(best.values())
+
+    print("slowest top-level imports:")
+    for name, us in sorted(best.items(), key=lambda item: -item[1])[:10]:
+        print("{:>32}: {:8.1f} ms".format(name, 1e-3 * us))
+    print("{:>32}: {:8.1f} ms (budget {:.0f} ms)".format("total", total_ms, args.budget))
+
+    loaded = sorted(m for m in modules if m.split(".")[0] in FORBIDDEN)
+    failed = False
+    if loaded:
+        print("FAIL: headless fit imported " + ", ".join(sorted({m.split(".")[0] for m in loaded})))
+        failed = True
+    if total_ms > args.budget:
+        print("FAIL: import time exceeds the budget")
+        failed = True
+    sys.exit(1 if failed else 0)
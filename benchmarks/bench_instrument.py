@@ -0,0 +1,47 @@
+"""
+Overhead of the instrumentation (`Fit3omega.instrument`) on fits and on `T2_function`,
+and the records of one instrumented fit.
+
+    python benchmarks/bench_instrument.py [sample_file data_file] [-n 20]
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def time_call(f, n: int) -> float:
+    """mean seconds per call"""
+    f()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        f()
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=20, help="number of fits")
+    args = parser.parse_args()
+
+    ft = Fit3omega(args.sample_file, args.data_file)
+    x0 = np.array(ft.sample.x)
+
+    print("{:>6} {:>12} {:>12}".format("stats", "fit [ms]", "T2 [us]"))
+    for instrument in (False, True):
+        ft.instrument = instrument
+        t_fit = time_call(lambda: ft.fit(x0=x0, jac=True, engine="least_squares"), args.n)
+        argv = ft.sample.substitute(x0)
+        t_T2 = time_call(lambda: ft.T2_function(*argv), 50 * args.n)
+        print("{:>6} {:>12.2f} {:>12.1f}".format("on" if instrument else "off",
+                                                 1e3 * t_fit, 1e6 * t_T2))
+    print(ft.result)
@@ -0,0 +1,85 @@
+"""
+Time `T2_function` and a fit on dense frequency sweeps, integrating at every ω and
+interpolating from Chebyshev nodes in log ω (`Fit3omega.interp_tol`). The dense sweeps
+resample the example data on log-spaced frequencies over the same range.
+
+    python benchmarks/bench_interpolation.py [sample_file data_file] [-omegas 200 500]
+                                             [-tol 1e-4 1e-6 1e-8]
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from fit3omega.fit import Fit3omega
+from fit3omega.data import read_columns
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def write_dense(csv_file: str, n_omegas: int, out_file: str) -> None:
+    """resample every column of `csv_file` at `n_omegas` log-spaced frequencies"""
+    columns = read_columns(csv_file)
+    freq = columns["freq"]
+    dense = np.logspace(np.log10(freq.min()), np.log10(freq.max()), n_omegas)
+    names = list(columns)
+    values = [dense if k == "freq" else np.interp(np.log(dense), np.log(freq), v)
+              for k, v in columns.items()]
+    np.savetxt(out_file, np.array(values).T, delimiter=",", header=",".join(names), comments="")
+
+
+def time_call(f, n: int) -> float:
+    """mean seconds per call"""
+    f()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        f()
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-omegas", type=int, nargs="+", default=[200, 500, 2000],
+                        help="numbers of frequencies")
+    parser.add_argument("-tol", type=float, nargs="+", default=[1e-4, 1e-6, 1e-8],
+                        help="interpolation tolerances")
+    parser.add_argument("-n", type=int, default=5, help="number of calls")
+    args = parser.parse_args()
+
+    print("{:>8} {:>8} {:>6} {:>10} {:>10} {:>10} {:>12} {:>8}".format(
+        "omegas", "tol", "nodes", "T2 [ms]", "|rel|", "fit [s]", "fit error", "speedup"))
+    with tempfile.TemporaryDirectory() as tmp:
+        error_file = '.'.join(args.data_file.split('.')[:-1]) + ".error.csv"
+        for n_omegas in args.omegas:
+            data_file = os.path.join(tmp, "data_%d.csv" % n_omegas)
+            write_dense(args.data_file, n_omegas, data_file)
+            if os.path.exists(error_file):
+                write_dense(error_file, n_omegas, data_file[:-4] + ".error.csv")
+
+            ft = Fit3omega(args.sample_file, data_file)
+            x0 = np.array(ft.sample.x)
+            exact = ft.T2_function(*ft.sample.substitute(x0))
+
+            t_exact = None
+            for tol in [None] + args.tol:
+                ft.interp_tol = tol
+                argv = ft.sample.substitute(x0)
+                t2 = time_call(lambda: ft.T2_function(*argv), args.n)
+                rel = np.max(np.abs(ft.T2_function(*argv) - exact)) / np.max(np.abs(exact))
+
+                t0 = time.perf_counter()
+                ft.fit(jac=True, engine="least_squares", x0=x0)
+                t_fit = time.perf_counter() - t0
+                nodes = ft.interpolation.n_nodes if ft.interpolation else None
+                if t_exact is None:
+                    t_exact = t2
+                print("{:>8d} {:>8} {:>6} {:>10.2f} {:>10.1e} {:>10.2f} {:>12.6e} {:>8.1f}".format(
+                    n_omegas, "-" if tol is None else "%.0e" % tol,
+                    "-" if nodes is None else nodes, 1e3 * t2, rel, t_fit, ft.result.error,
+                    t_exact / t2))
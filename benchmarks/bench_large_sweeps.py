@@ -0,0 +1,69 @@
+"""
+Exercise the C extension past its former static limits (150 frequencies, 10 layers):
+dense frequency sweeps and deep stacks, checked against the pure NumPy integrator.
+
+    python benchmarks/bench_large_sweeps.py [-n calls]
+"""
+import time
+import argparse
+
+import numpy as np
+
+import integrate
+from fit3omega import numpy_integrate
+
+
+def make_stack(n_layers: int):
+    """a film stack on a thick Si substrate"""
+    ds = [1e-6] * (n_layers - 1) + [300e-6]
+    kys = [0.2 + i for i in range(n_layers - 1)] + [150.]
+    ratio_xys = [1.] * n_layers
+    Cvs = [2.3e6] * (n_layers - 1) + [1.63e6]
+    Rcs = [0.] + [1e-8] * (n_layers - 1)
+    return ds, kys, ratio_xys, Cvs, Rcs
+
+
+def time_call(f, args, n: int) -> float:
+    """mean seconds per call"""
+    f(*args)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        f(*args)
+    return (time.perf_counter() - t0) / n
+
+
+def max_rel(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.max(np.abs(a - b)) / np.max(np.abs(b)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=3, help="number of calls")
+    args = parser.parse_args()
+
+    print("{:>8} {:>8} {:>12} {:>12} {:>10} {:>10}".format(
+        "layers", "omegas", "Z [ms]", "jac [ms]", "Z |rel|", "jac |rel|"))
+
+    # one instance throughout, so re-configuring to a different size is exercised too
+    c_integrator = integrate.Integrator()
+    np_integrator = numpy_integrate.Integrator()
+    for n_layers in (2, 12, 24):
+        for n_omegas in (150, 1000, 2000):
+            omegas = 2 * np.pi * np.logspace(0, 5, n_omegas)
+            fit_indices = [(0, 0), (2, 0), (3, n_layers - 1)]
+            stack = make_stack(n_layers)
+            for integrator in (c_integrator, np_integrator):
+                integrator.ogc_set(omegas, fit_indices, 15e-6, 1e-6, 15., n_layers)
+
+            t_z = time_call(c_integrator.ogc_integral, stack, args.n)
+            t_jac = time_call(c_integrator.ogc_jacobian, stack, args.n)
+            z = c_integrator.ogc_integral(*stack)
+            jac = c_integrator.ogc_jacobian(*stack)
+            assert z.shape == (n_omegas,)
+            assert jac.shape == (len(fit_indices), n_omegas) and jac.flags.c_contiguous
+
+            rel_z = max_rel(z, np_integrator.ogc_integral(*stack))
+            rel_jac = max_rel(jac, np_integrator.ogc_jacobian(*stack))
+            print("{:>8d} {:>8d} {:>12.2f} {:>12.2f} {:>10.1e} {:>10.1e}".format(
+                n_layers, n_omegas, 1e3 * t_z, 1e3 * t_jac, rel_z, rel_jac))
+            assert rel_z < 1e-12 and rel_jac < 1e-12
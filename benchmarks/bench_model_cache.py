@@ -0,0 +1,44 @@
+"""
+Cost of the data-derived quantities (Ish, power, T2, Z2) during slider-style updates,
+recomputing everything on each access (`refresh = True`) versus the dependency-tracked cache.
+
+    python benchmarks/bench_model_cache.py [sample_file data_file] [-n updates]
+"""
+import os
+import time
+import argparse
+import warnings
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def run_updates(ft: Fit3omega, n: int) -> float:
+    """mean seconds per update; every 10th update moves a heater parameter"""
+    Rc = ft.sample.heater.Rc
+    t0 = time.perf_counter()
+    for i in range(n):
+        if i % 10 == 0:
+            ft.sample.heater.Rc = Rc * (1. + 1e-3 * i / n)
+        ft.T2.x, ft.T2.y, ft.T2.xerr, ft.T2.yerr, ft.Z2.x
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=1000, help="number of updates")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    for label, refresh in (("refresh = True", True), ("tracked", False)):
+        ft = Fit3omega(args.sample_file, args.data_file)
+        ft.refresh = refresh
+        seconds = run_updates(ft, args.n)
+        print("{:>16}: {:8.2f} us/update".format(label, 1e6 * seconds))
+        for name, stats in ft.cache_stats.items():
+            print("{:>16}  {:>12}: {hits:>7d} hits {misses:>7d} misses".format("", name, **stats))
@@ -0,0 +1,62 @@
+"""
+Compare the Borca-Tasciuc and Olson-Graham-Chen models on the same data:
+cost of one objective function evaluation, and the fitted parameters.
+
+    python benchmarks/bench_models.py [sample_file data_file] [-n calls] [-boundary s]
+"""
+import os
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def time_calls(ft: Fit3omega, n: int) -> float:
+    """return the mean seconds per `objective_func` call"""
+    x = ft.sample.x
+    ft.objective_func(x)  # warm up cached data-derived values
+    t0 = time.perf_counter()
+    for _ in range(n):
+        ft.objective_func(x)
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=200, help="number of calls")
+    parser.add_argument("-boundary", choices=Fit3omega.BOUNDARY_TYPES, default="s",
+                        help="substrate boundary type for the BT model")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    fitters = {model: Fit3omega(args.sample_file, args.data_file, model=model,
+                                boundary_type=args.boundary)
+               for model in Fit3omega.MODELS}
+
+    print("{:>6} {:>12} {:>10} {:>12} {:>10}".format(
+        "model", "eval [us]", "fit [s]", "MSE", "nfev"))
+    for model, ft in fitters.items():
+        seconds = time_calls(ft, args.n)
+        t0 = time.perf_counter()
+        ft.fit()
+        t_fit = time.perf_counter() - t0
+        print("{:>6} {:>12.1f} {:>10.3f} {:>12.4e} {:>10d}".format(
+            model, 1e6 * seconds, t_fit, ft.result.error, ft.result.result.nfev))
+
+    print()
+    x_ogc = fitters["ogc"].result.x
+    x_bt = fitters["bt"].result.x
+    for name, a, b in zip(fitters["ogc"].result.parameters, x_ogc, x_bt):
+        print("{:>16}: OGC {:.4e}  BT {:.4e}  ({:+.2f} %)".format(name, a, b, 1e2 * (b - a) / a))
+    T2_diff = np.abs(ft.T2_function(*ft.sample.substitute(x_ogc))
+                     - fitters["ogc"].T2_function(*ft.sample.substitute(x_ogc)))
+    print("max |T2_bt - T2_ogc| at the OGC fit: {:.3e} K".format(np.max(T2_diff)))
@@ -0,0 +1,46 @@
+"""
+Time Monte Carlo uncertainty estimates for a range of worker counts, and check that
+the draws do not depend on the number of workers.
+
+    python benchmarks/bench_monte_carlo.py [sample_file data_file] [-n draws] [-workers 1 2 4]
+"""
+import os
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=200, help="number of draws")
+    parser.add_argument("-workers", type=int, nargs="+", default=[1, 2, 4],
+                        help="worker counts to time")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    ft = Fit3omega(args.sample_file, args.data_file)
+    ft.fit(jac=True, engine="least_squares")
+
+    print("{:>8} {:>10} {:>14}".format("workers", "time [s]", "per draw [ms]"))
+    reference = None
+    for n_workers in args.workers:
+        t0 = time.perf_counter()
+        ft.fit_uncertainty(args.n, max_workers=n_workers, seed=0)
+        seconds = time.perf_counter() - t0
+        print("{:>8d} {:>10.2f} {:>14.2f}".format(n_workers, seconds, 1e3 * seconds / args.n))
+        if reference is None:
+            reference = ft.result.samples
+        assert np.array_equal(reference, ft.result.samples, equal_nan=True)
+
+    print()
+    print(ft.result)
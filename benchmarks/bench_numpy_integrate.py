@@ -0,0 +1,58 @@
+"""
+Compare the C-extension and pure NumPy implementations of the OGC integral
+across numbers of layers and frequencies.
+
+    python benchmarks/bench_numpy_integrate.py [-n calls]
+"""
+import time
+import argparse
+
+import numpy as np
+
+import integrate
+from fit3omega import numpy_integrate
+
+
+def make_stack(n_layers: int):
+    """a film stack on a thick Si substrate; the top layer's ky and Cv are fitted"""
+    ds = [1e-6] * (n_layers - 1) + [300e-6]
+    kys = [0.2 + i for i in range(n_layers - 1)] + [150.]
+    ratio_xys = [1.] * n_layers
+    Cvs = [2.3e6] * (n_layers - 1) + [1.63e6]
+    Rcs = [0.] + [1e-8] * (n_layers - 1)
+    return ds, kys, ratio_xys, Cvs, Rcs
+
+
+def time_call(f, args, n: int) -> float:
+    """mean seconds per call"""
+    f(*args)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        f(*args)
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=20, help="number of calls")
+    args = parser.parse_args()
+
+    print("{:>8} {:>8} {:>12} {:>12} {:>10}".format(
+        "layers", "omegas", "C [ms]", "NumPy [ms]", "max |rel|"))
+    for n_layers in (2, 4, 8):
+        for n_omegas in (10, 50, 150):
+            omegas = 2 * np.pi * np.logspace(1, 4, n_omegas)
+            fit_indices = [(0, 0), (2, 0)]
+            stack = make_stack(n_layers)
+            c_integrator = integrate.Integrator()
+            np_integrator = numpy_integrate.Integrator()
+            for integrator in (c_integrator, np_integrator):
+                integrator.ogc_set(omegas, fit_indices, 15e-6, 1e-6, 15., n_layers)
+
+            t_c = time_call(c_integrator.ogc_integral, stack, args.n)
+            t_np = time_call(np_integrator.ogc_integral, stack, args.n)
+            z_c = c_integrator.ogc_integral(*stack)
+            z_np = np_integrator.ogc_integral(*stack)
+            rel = np.max(np.abs(z_c - z_np) / np.abs(z_c))
+            print("{:>8d} {:>8d} {:>12.3f} {:>12.3f} {:>10.1e}".format(
+                n_layers, n_omegas, 1e3 * t_c, 1e3 * t_np, rel))
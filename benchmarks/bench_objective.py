@@ -0,0 +1,40 @@
+"""
+Latency of a single objective function evaluation, with and without
+re-configuring the integrator module on every call.
+
+    python benchmarks/bench_objective.py [sample_file data_file] [-n calls]
+"""
+import os
+import time
+import argparse
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def time_calls(ft: Fit3omega, n: int, reinit: bool) -> float:
+    """return the mean seconds per `objective_func` call"""
+    x = ft.sample.x
+    ft.objective_func(x)  # warm up cached data-derived values
+    t0 = time.perf_counter()
+    for _ in range(n):
+        if reinit:
+            ft._init_integrators()
+        ft.objective_func(x)
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=500, help="number of calls")
+    args = parser.parse_args()
+
+    ft = Fit3omega(args.sample_file, args.data_file)
+    for label, reinit in (("ogc_set every call", True), ("cached config", False)):
+        seconds = time_calls(ft, args.n, reinit)
+        print("{:>20}: {:8.2f} us/call".format(label, 1e6 * seconds))
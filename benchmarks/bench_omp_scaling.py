@@ -0,0 +1,71 @@
+"""
+Time the C integrals over a long frequency sweep with 1 to N threads.
+
+The extension must be built with OpenMP (see setup.py) for more than one thread to help.
+
+    python benchmarks/bench_omp_scaling.py [-omegas 2000] [-layers 4] [-j max_threads] [-n calls]
+"""
+import time
+import argparse
+
+import numpy as np
+
+import integrate
+
+
+def make_stack(n_layers: int):
+    """a film stack on a thick Si substrate"""
+    ds = [1e-6] * (n_layers - 1) + [300e-6]
+    kys = [0.2 + i for i in range(n_layers - 1)] + [150.]
+    ratio_xys = [1.] * n_layers
+    Cvs = [2.3e6] * (n_layers - 1) + [1.63e6]
+    Rcs = [0.] + [1e-8] * (n_layers - 1)
+    return ds, kys, ratio_xys, Cvs, Rcs
+
+
+def time_call(f, args, n: int) -> float:
+    """mean seconds per call"""
+    f(*args)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        f(*args)
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-omegas", type=int, default=2000, help="number of frequencies")
+    parser.add_argument("-layers", type=int, default=4, help="number of layers")
+    parser.add_argument("-j", type=int, default=integrate.max_threads(), help="maximum threads")
+    parser.add_argument("-n", type=int, default=5, help="number of calls")
+    args = parser.parse_args()
+
+    omegas = 2 * np.pi * np.logspace(0, 5, args.omegas)
+    fit_indices = [(0, 0), (2, 0), (3, 1)]
+    stack = make_stack(args.layers)
+    integrator = integrate.Integrator()
+    integrator.ogc_set(omegas, fit_indices, 15e-6, 1e-6, 15., args.layers)
+
+    calls = {
+        "integral": (integrator.ogc_integral, stack),
+        "jacobian": (integrator.ogc_jacobian, stack),
+        "adaptive": (lambda *a: integrator.ogc_integral_adaptive(1e-8, *a)[0], stack),
+    }
+
+    print("OpenMP threads available: {}".format(integrate.max_threads()))
+    print("{:>8} {:>10} {:>12} {:>10} {:>10}".format(
+        "threads", "call", "time [ms]", "speedup", "max |diff|"))
+    serial = {}
+    for n_threads in range(1, args.j + 1):
+        integrator.set_threads(n_threads)
+        for name, (f, f_args) in calls.items():
+            if name == "adaptive":
+                integrator.ogc_set(omegas, fit_indices, 15e-6, 1e-6, 15., args.layers)
+            t = time_call(f, f_args, args.n)
+            value = f(*f_args)
+            if n_threads == 1:
+                serial[name] = (t, value)
+            t_1, value_1 = serial[name]
+            print("{:>8d} {:>10} {:>12.2f} {:>10.2f} {:>10.1e}".format(
+                n_threads, name, 1e3 * t, t_1 / t, np.max(np.abs(value - value_1))))
+            assert np.array_equal(value, value_1), name
@@ -0,0 +1,59 @@
+"""
+Accuracy and cost of adaptive quadrature versus the fixed 200-point trapezoid rule,
+and a fit that tightens the quadrature tolerance in stages.
+
+    python benchmarks/bench_quadrature.py [sample_file data_file]
+"""
+import os
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    ft = Fit3omega(args.sample_file, args.data_file)
+    argv = ft.sample.argv
+
+    ft.quad_tol = 1e-13
+    T2_ref = ft.T2_function(*argv)
+
+    print("{:>10} {:>12} {:>12} {:>12} {:>10}".format(
+        "quad_tol", "evals", "est. error", "true error", "ms/call"))
+    for quad_tol in (None, 1e-2, 1e-4, 1e-6, 1e-8):
+        ft = Fit3omega(args.sample_file, args.data_file)  # no partition reuse
+        ft.quad_tol = quad_tol
+        t0 = time.perf_counter()
+        T2 = ft.T2_function(*argv)
+        dt = time.perf_counter() - t0
+        true_err = np.max(np.abs(T2 - T2_ref) / np.abs(T2_ref))
+        if quad_tol is None:
+            evals, est_err = 200 * len(T2), float("nan")
+        else:
+            evals = ft.quad_evals.sum()
+            scale = ft.power.norm / ft._heater_area  # quad_errors refer to the bare integral
+            est_err = np.max(ft.quad_errors * scale / np.abs(T2))
+        print("{:>10} {:>12d} {:>12.2e} {:>12.2e} {:>10.2f}".format(
+            str(quad_tol), evals, est_err, true_err, 1e3 * dt))
+
+    print()
+    for label, kwargs in (("fixed rule", {}),
+                          ("staged quad_tols", {"quad_tols": (1e-2, 1e-5, 1e-8)})):
+        ft = Fit3omega(args.sample_file, args.data_file)
+        t0 = time.perf_counter()
+        ft.fit(engine="least_squares", **kwargs)
+        print("{:>18}: {:8.3f} s | MSE {:.6e} | x {}".format(
+            label, time.perf_counter() - t0, ft.result.error, ft.result.x))
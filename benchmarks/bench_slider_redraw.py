@@ -0,0 +1,63 @@
+"""
+Cost of a slider GUI redraw: a full figure draw (with the error shading) against a
+blit of the fitted curves, the error text and the sliders. Off-screen (Agg). Also the
+cost of a first-order preview of the curve against an exact evaluation.
+
+    python benchmarks/bench_slider_redraw.py [sample_file data_file] [-n 50]
+"""
+import os
+import time
+import argparse
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+
+from fit3omega.slider_gui import SliderFit
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def time_call(f, n: int) -> float:
+    """mean seconds per call"""
+    f()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        f()
+    return (time.perf_counter() - t0) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=50, help="number of redraws")
+    args = parser.parse_args()
+
+    sf = SliderFit(args.sample_file, args.data_file)
+    sf.show()
+    sf.fig.canvas.draw()
+    T2 = sf.fitted_T2
+    rng = np.random.default_rng(0)
+
+    def full():
+        sf._fit_lines[0].set_ydata(T2.real * rng.uniform(0.9, 1.1))
+        sf.fig.canvas.draw()
+
+    def blit():
+        sf._update_graph(T2 * rng.uniform(0.9, 1.1), 1e-3)
+
+    t_full = time_call(full, args.n)
+    t_blit = time_call(blit, args.n)
+    print("full draw: {:.2f} ms, blit: {:.2f} ms ({:.1f}x)".format(
+        1e3 * t_full, 1e3 * t_blit, t_full / t_blit))
+
+    x = sf.sample.x
+    sf._set_preview_ref(x, T2, sf.T2_jacobian(*sf.sample.substitute(x)))
+    t_preview = time_call(sf._show_preview, args.n)
+    t_exact = time_call(lambda: sf.T2_function(*sf.sample.substitute(x)), args.n)
+    print("preview: {:.3f} ms, exact T2: {:.2f} ms ({:.0f}x)".format(
+        1e3 * t_preview, 1e3 * t_exact, t_exact / t_preview))
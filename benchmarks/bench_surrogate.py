@@ -0,0 +1,59 @@
+"""
+Time building a surrogate table, and fits on it against fits on the exact integral.
+
+    python benchmarks/bench_surrogate.py [sample_file data_file] [-points 17 33 65]
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from fit3omega.fit import Fit3omega
+from fit3omega.surrogate import build_surrogate, Surrogate
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def time_fit(f) -> float:
+    t0 = time.perf_counter()
+    f()
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-points", type=int, nargs="+", default=[17, 33, 65],
+                        help="grid points along each fit parameter")
+    parser.add_argument("-threads", type=int, default=1, help="integrator threads (0 for all)")
+    args = parser.parse_args()
+
+    ft = Fit3omega(args.sample_file, args.data_file)
+    ft.n_threads = args.threads
+    fit_kwargs = dict(jac=True, engine="least_squares")
+    x0 = np.array(ft.sample.x)
+
+    t_exact = time_fit(lambda: ft.fit(x0=x0, **fit_kwargs))
+    x_exact, error_exact = ft.result.x, ft.result.error
+    print("==> exact fit: {:.1f} ms, error {:.6e}".format(1e3 * t_exact, error_exact))
+
+    print("{:>8} {:>10} {:>10} {:>10} {:>10} {:>12} {:>12}".format(
+        "points", "build [s]", "size [kB]", "fit [ms]", "|dx/x|", "polish [ms]", "error"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_points in args.points:
+            table_file = os.path.join(tmp, "table_%d.npz" % n_points)
+            t_build = time_fit(lambda: build_surrogate(ft, n_points).save(table_file))
+            surrogate = Surrogate.load(table_file)
+
+            t_fit = time_fit(lambda: ft.fit_surrogate(surrogate, x0=x0, **fit_kwargs))
+            dx = np.max(np.abs(ft.result.x - x_exact) / x_exact)
+            t_polish = time_fit(lambda: ft.fit_surrogate(surrogate, polish=True, x0=x0,
+                                                         **fit_kwargs))
+            print("{:>8d} {:>10.2f} {:>10d} {:>10.1f} {:>10.1e} {:>12.1f} {:>12.6e}".format(
+                n_points, t_build, os.path.getsize(table_file) // 1000, 1e3 * t_fit, dx,
+                1e3 * t_polish, ft.result.error))
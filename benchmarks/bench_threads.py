@@ -0,0 +1,50 @@
+"""
+Fit several copies of the example data serially and in a thread pool.
+
+Each Fit3omega owns an `integrate.Integrator`, which releases the GIL while integrating.
+
+    python benchmarks/bench_threads.py [sample_file data_file] [-n fits] [-j threads]
+"""
+import os
+import time
+import argparse
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+def fit_one(sample_file: str, data_file: str) -> float:
+    ft = Fit3omega(sample_file, data_file)
+    ft.fit(jac=True)
+    return ft.result.error
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("sample_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "sample.txt"))
+    parser.add_argument("data_file", nargs="?",
+                        default=os.path.join(EXAMPLE_DIR, "data.csv"))
+    parser.add_argument("-n", type=int, default=8, help="number of fits")
+    parser.add_argument("-j", type=int, default=os.cpu_count(), help="number of threads")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    jobs = [(args.sample_file, args.data_file)] * args.n
+
+    t0 = time.perf_counter()
+    serial = [fit_one(*job) for job in jobs]
+    t_serial = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.j) as pool:
+        threaded = list(pool.map(lambda job: fit_one(*job), jobs))
+    t_threaded = time.perf_counter() - t0
+
+    assert serial == threaded, "threaded fits disagree with serial fits"
+    print("{:>10}: {:8.3f} s".format("serial", t_serial))
+    print("{:>10}: {:8.3f} s ({} threads, x{:.2f})".format("threaded", t_threaded, args.j,
+                                                         t_serial / t_threaded))
@@ -2,13 +2,15 @@
 import os
 import argparse
 
+from . import cache, __version__
 from .fit import Fit3omega
-from .plots import plot_fitted_data, plot_measured_data
-from .slider_gui import SliderFit
+
+# NOTE: `plots` and `slider_gui` import matplotlib, which is slow; they are imported
+#       only where needed, so headless runs (-fit without -plot) never load it.
 
 
 def main(args: argparse.Namespace) -> None:
-    ft = Fit3omega(args.sample_file, args.data_file)
+    ft = Fit3omega(args.sample_file, args.data_file, model=args.model, boundary_type=args.boundary)
     if args.data_lims:
         a, b = args.data_lims
         ft.data.set_limits(a, b)
@@ -24,18 +26,51 @@ def main(args: argparse.Namespace) -> None:
 
 def _run_fit(args: argparse.Namespace, ft: Fit3omega) -> None:
     """create a fitter instance, run a fit, and display the results"""
-    ft.fit()
+    ft.instrument = bool(args.profile)
+    if args.starts > 1:
+        ft.fit_multistart(args.starts, n_agree=args.agree, max_workers=args.workers,
+                          verbose=True, jac=args.jac, engine=args.engine)
+    elif args.surrogate:
+        ft.fit_surrogate(args.surrogate, polish=args.polish, jac=args.jac, engine=args.engine)
+    else:
+        ft.fit(jac=args.jac, engine=args.engine)
+    if args.mc:
+        ft.fit_uncertainty(args.mc, max_workers=args.workers, verbose=True)
     print(ft.result)
+    if args.profile:
+        _write_profile(args, ft)
 
     if args.plot:
+        from .plots import plot_fitted_data
         save_name = os.path.abspath(args.data_file).strip(".csv") + "_fit_plot.pdf"
         fig = plot_fitted_data(ft, show=(not args.hide))
         fig.savefig(save_name)
         print("==> fit3omega: saved plot\n%s" % save_name)
 
 
+def _write_profile(args: argparse.Namespace, ft: Fit3omega) -> None:
+    """append the instrumentation of the fit to a JSON lines file"""
+    from .instrument import write_jsonl
+    if ft.result.stats is None:
+        print("==> fit3omega: no instrumentation for multistart fits; nothing profiled")
+        return
+    record = dict(version=__version__,
+                  sample_file=os.path.abspath(args.sample_file),
+                  data_file=os.path.abspath(args.data_file),
+                  model=ft.model,
+                  engine=args.engine,
+                  jac=args.jac,
+                  surrogate=args.surrogate,
+                  n_omegas=len(ft.data.omegas),
+                  error=ft.result.error,
+                  **ft.result.stats)
+    write_jsonl(args.profile, [record])
+    print("==> fit3omega: appended profile\n%s" % os.path.abspath(args.profile))
+
+
 def _plot_measured_data(args: argparse.Namespace, ft: Fit3omega) -> None:
     """create a plot of the measured data"""
+    from .plots import plot_measured_data
     save_name = os.path.abspath(args.data_file).strip(".csv") + "_measured_plot.pdf"
     fig = plot_measured_data(ft, show=(not args.hide))
     fig.savefig(save_name)
@@ -44,6 +79,7 @@ def _plot_measured_data(args: argparse.Namespace, ft: Fit3omega) -> None:
 
 def _launch_slider_plot(args: argparse.Namespace) -> None:
     """create and display a slider plot"""
+    from .slider_gui import SliderFit
     sf = SliderFit(args.sample_file, args.data_file)
     if args.data_lims:
         sf.data.set_limits(*args.data_lims)
@@ -76,6 +112,67 @@ if __name__ == "__main__":
                         action='store_true',
                         default=False)
 
+    parser.add_argument("-engine",
+                        help="optimization engine used by the 'fit' option.",
+                        choices=Fit3omega.ENGINES,
+                        default="minimize")
+
+    parser.add_argument("-jac",
+                        help="use analytic derivatives instead of finite differences.",
+                        action='store_true',
+                        default=False)
+
+    parser.add_argument("-model",
+                        help="thermal model used by the 'fit' option: Olson-Graham-Chen or "
+                             "Borca-Tasciuc (no contact resistances).",
+                        choices=Fit3omega.MODELS,
+                        default="ogc")
+
+    parser.add_argument("-boundary",
+                        help="substrate boundary type for the 'bt' model: "
+                             "semi-infinite, adiabatic, or isothermal.",
+                        choices=Fit3omega.BOUNDARY_TYPES,
+                        default="s")
+
+    parser.add_argument("-starts",
+                        help="'fit' from this many starting points (a Sobol sequence about the "
+                             "sample parameters) and keep the best minimum.",
+                        type=int,
+                        default=1)
+
+    parser.add_argument("-agree",
+                        help="with 'starts', stop once this many starts reach the best minimum.",
+                        type=int,
+                        default=None)
+
+    parser.add_argument("-surrogate",
+                        help="'fit' on a surrogate table from `python -m fit3omega.surrogate`.",
+                        type=str,
+                        default=None)
+
+    parser.add_argument("-polish",
+                        help="with 'surrogate', refit on the exact integral from its optimum.",
+                        action='store_true',
+                        default=False)
+
+    parser.add_argument("-profile",
+                        help="append the evaluation counts and seconds per stage of the 'fit' "
+                             "to this JSON lines file.",
+                        type=str,
+                        default=None)
+
+    parser.add_argument("-mc",
+                        help="after the 'fit', estimate uncertainties by refitting this many "
+                             "resampled datasets.",
+                        type=int,
+                        default=0)
+
+    parser.add_argument("-workers",
+                        help="number of worker processes for the 'starts' and 'mc' options "
+                             "(default: number of CPUs).",
+                        type=int,
+                        default=None)
+
     parser.add_argument("-plot",
                         help="plot the measurement data.",
                         action='store_true',
@@ -97,4 +194,13 @@ if __name__ == "__main__":
                         type=int,
                         default=None)
 
-    main(parser.parse_args())
+    parser.add_argument("-cache",
+                        help="directory for caching parsed input files between runs "
+                             "(default: $%s, if set)." % cache.ENV_VAR,
+                        type=str,
+                        default=None)
+
+    cli_args = parser.parse_args()
+    if cli_args.cache:
+        os.environ[cache.ENV_VAR] = cli_args.cache
+    main(cli_args)
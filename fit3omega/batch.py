@@ -0,0 +1,257 @@
+"""
+Fit many (sample configuration, data file) pairs across a pool of processes.
+
+    python -m fit3omega.batch sample.txt "sweeps/*.csv" -out results.csv
+    python -m fit3omega.batch -manifest jobs.csv -out results.json -workers 8
+
+A manifest is a CSV file with the columns 'sample_file' and 'data_file', and
+optionally 'start' and 'end' to limit the data range and 'model' ("ogc" or "bt")
+to override the thermal model for that job. Relative paths in a manifest are
+relative to the manifest itself.
+"""
+import os
+import csv
+import glob
+import json
+import time
+import argparse
+import traceback
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """a single fit to be run by `run_batch`"""
+    sample_file: str
+    data_file: str
+    data_lims: Optional[Tuple[int, int]] = None
+    model: Optional[str] = None  # overrides the batch-wide model
+
+
+def read_manifest(manifest_file: str) -> List[BatchJob]:
+    """read a list of jobs from a manifest CSV file"""
+    manifest_file = os.path.expanduser(manifest_file)
+    root = os.path.dirname(os.path.abspath(manifest_file))
+    jobs = []
+    with open(manifest_file, newline='') as f:
+        for row in csv.DictReader(f):
+            if not row.get("sample_file") or not row.get("data_file"):
+                raise ValueError(f"manifest row is missing 'sample_file' or 'data_file': {row}")
+            data_lims = None
+            if row.get("start") and row.get("end"):
+                data_lims = (int(row["start"]), int(row["end"]))
+            jobs.append(BatchJob(os.path.join(root, row["sample_file"].strip()),
+                                 os.path.join(root, row["data_file"].strip()),
+                                 data_lims,
+                                 (row.get("model") or "").strip() or None))
+    return jobs
+
+
+def glob_jobs(sample_file: str,
+              data_pattern: str,
+              data_lims: Tuple[int, int] = None) -> List[BatchJob]:
+    """pair one sample configuration with every data file matching a glob pattern"""
+    data_files = sorted(f for f in glob.glob(os.path.expanduser(data_pattern))
+                        if not f.endswith(".error.csv"))
+    return [BatchJob(sample_file, data_file, data_lims) for data_file in data_files]
+
+
+def fit_job(job: BatchJob,
+            jac: bool = False,
+            engine: str = "minimize",
+            ignore_imag_err: bool = False,
+            model: str = "ogc",
+            boundary_type: str = "s") -> Dict:
+    """run one fit and return a row for the results table; never raises"""
+    model = job.model or model
+    row = {
+        "sample_file": job.sample_file,
+        "data_file": job.data_file,
+        "model": model,
+        "status": "ok",
+        "message": "",
+        "seconds": 0.0,
+    }
+    t0 = time.perf_counter()
+    try:
+        from fit3omega.fit import Fit3omega
+        ft = Fit3omega(job.sample_file, job.data_file, model=model, boundary_type=boundary_type)
+        if job.data_lims:
+            ft.data.set_limits(*job.data_lims)
+        ft.ignore_imag_err = ignore_imag_err
+        ft.fit(jac=jac, engine=engine)
+        row["error"] = float(ft.result.error)
+        row["nfev"] = int(ft.result.result.nfev)
+        row.update(ft.result.parameters)
+        if ft.result.stderr is not None:
+            row.update((f"{name} err", float(err))
+                       for name, err in zip(ft.result.parameters, ft.result.stderr))
+    except Exception as e:
+        row["status"] = "failed"
+        row["message"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+    row["seconds"] = time.perf_counter() - t0
+    return row
+
+
+def run_batch(jobs: Sequence[BatchJob],
+              max_workers: int = None,
+              verbose: bool = True,
+              **fit_kwargs) -> List[Dict]:
+    """
+    Fit all jobs in a process pool. Failed jobs are reported in the returned
+    rows (status "failed") without stopping the others.
+
+    :param jobs: the fits to run
+    :param max_workers: number of worker processes (default: number of CPUs)
+    :param verbose: print a line as each job finishes
+    :param fit_kwargs: passed to `fit_job` (jac, engine, ignore_imag_err, model, boundary_type)
+    :return: one row per job, in the order of `jobs`
+    """
+    rows = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fit_job, job, **fit_kwargs): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                rows[i] = future.result()
+            except Exception as e:  # the worker itself died
+                rows[i] = {"sample_file": jobs[i].sample_file,
+                           "data_file": jobs[i].data_file,
+                           "status": "failed",
+                           "message": repr(e),
+                           "seconds": 0.0}
+            if verbose:
+                _print_row(rows[i])
+    return rows
+
+
+def write_table(rows: Sequence[Dict], filename: str) -> None:
+    """write result rows to a CSV or JSON (if `filename` ends with .json) file"""
+    filename = os.path.expanduser(filename)
+    if filename.endswith(".json"):
+        with open(filename, 'w') as f:
+            json.dump(list(rows), f, indent=2)
+        return
+
+    columns = []
+    for row in rows:
+        columns.extend(k for k in row if k not in columns)
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _print_row(row: Dict) -> None:
+    """report the outcome of one job"""
+    if row["status"] == "ok":
+        print("==> fit3omega: [ok] {} ({:.2f} s, error {:.3e})"
+              .format(row["data_file"], row["seconds"], row["error"]))
+    else:
+        print("==> fit3omega: [failed] {} ({:.2f} s)\n    {}"
+              .format(row["data_file"], row["seconds"], row["message"]))
+
+
+def _print_summary(rows: Sequence[Dict], wall_seconds: float) -> None:
+    """report totals for the whole batch"""
+    n_failed = sum(1 for row in rows if row["status"] != "ok")
+    cpu_seconds = sum(row["seconds"] for row in rows)
+    print("==> fit3omega: {} fits, {} failed, {:.2f} s wall time, {:.2f} s fit time"
+          .format(len(rows), n_failed, wall_seconds, cpu_seconds))
+
+
+if __name__ == "__main__":
+    from fit3omega import cache
+    from fit3omega.fit import Fit3omega
+
+    parser = argparse.ArgumentParser(description="Batch fitting with fit3omega.",
+                                     epilog=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument("sample_file",
+                        help="path to YAML formatted sample configuration file.",
+                        nargs='?',
+                        type=str)
+    parser.add_argument("data_glob",
+                        help="glob pattern matching CSV files containing voltage data.",
+                        nargs='?',
+                        type=str)
+
+    parser.add_argument("-manifest",
+                        help="CSV file listing 'sample_file' and 'data_file' pairs to fit.",
+                        type=str,
+                        default=None)
+
+    parser.add_argument("-out",
+                        help="output table of results (.csv or .json).",
+                        type=str,
+                        default="fit3omega_results.csv")
+
+    parser.add_argument("-workers",
+                        help="number of worker processes (default: number of CPUs).",
+                        type=int,
+                        default=None)
+
+    parser.add_argument("-engine",
+                        help="optimization engine used for each fit.",
+                        choices=Fit3omega.ENGINES,
+                        default="minimize")
+
+    parser.add_argument("-jac",
+                        help="use analytic derivatives instead of finite differences.",
+                        action='store_true',
+                        default=False)
+
+    parser.add_argument("-model",
+                        help="thermal model for jobs without a 'model' manifest column.",
+                        choices=Fit3omega.MODELS,
+                        default="ogc")
+
+    parser.add_argument("-boundary",
+                        help="substrate boundary type for the BT model.",
+                        choices=Fit3omega.BOUNDARY_TYPES,
+                        default="s")
+
+    parser.add_argument("-ignore_imag_err",
+                        help="use only the error from the real part in objective function",
+                        action='store_true',
+                        default=False)
+
+    parser.add_argument("-data_lims",
+                        help="limit the data range by taking data[a:b] (glob mode only)",
+                        nargs=2,
+                        type=int,
+                        default=None)
+
+    parser.add_argument("-cache",
+                        help="directory for caching parsed input files between runs "
+                             "(default: $%s, if set)." % cache.ENV_VAR,
+                        type=str,
+                        default=None)
+
+    args = parser.parse_args()
+    if args.cache:
+        os.environ[cache.ENV_VAR] = args.cache  # inherited by the worker processes
+    if args.manifest:
+        batch_jobs = read_manifest(args.manifest)
+    elif args.sample_file and args.data_glob:
+        batch_jobs = glob_jobs(args.sample_file, args.data_glob, args.data_lims)
+    else:
+        parser.error("provide either a sample file and data glob, or -manifest")
+
+    if not batch_jobs:
+        parser.error("no data files to fit")
+
+    t_start = time.perf_counter()
+    results = run_batch(batch_jobs,
+                        max_workers=args.workers,
+                        jac=args.jac,
+                        engine=args.engine,
+                        ignore_imag_err=args.ignore_imag_err,
+                        model=args.model,
+                        boundary_type=args.boundary)
+    write_table(results, args.out)
+    _print_summary(results, time.perf_counter() - t_start)
+    print("==> fit3omega: saved results\n%s" % os.path.abspath(args.out))
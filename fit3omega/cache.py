@@ -0,0 +1,106 @@
+"""
+An on-disk cache of parsed input files, keyed by a hash of their contents.
+
+Caching is off unless the environment variable FIT3OMEGA_CACHE names a cache
+directory (the command line interfaces set it with `-cache`). Worker processes
+inherit it. Entries are never invalidated; an edited file simply hashes to a new
+key. Delete the directory to clear the cache.
+
+    <key>.npy           data columns, one per row of a 2D float64 array
+    <key>.columns.json  the column names
+    <key>.pkl           any other parsed object (e.g. SampleParameters)
+"""
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+from typing import Dict, Callable, Optional, Any
+
+import numpy as np
+
+ENV_VAR = "FIT3OMEGA_CACHE"
+CACHE_VERSION = 1  # bump when the format of cached objects changes
+
+
+def cache_dir() -> Optional[str]:
+    """the cache directory, or None if caching is off"""
+    path = os.environ.get(ENV_VAR)
+    return os.path.expanduser(path) if path else None
+
+
+def file_key(filename: str, kind: str) -> str:
+    """a key from the contents of `filename` and the kind of object parsed from it"""
+    h = hashlib.sha256(f"{CACHE_VERSION}:{kind}:".encode())
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()[:32]
+
+
+def load_columns(csv_file: str,
+                 parse: Callable[[str], Dict[str, np.ndarray]],
+                 mmap: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Columns of a CSV file from the cache, or from `parse` (and then cached).
+
+    :param csv_file: path to the CSV file
+    :param parse: reads the file into a dict of equal-length float arrays
+    :param mmap: memory-map the cached array instead of reading it (read-only)
+    """
+    root = cache_dir()
+    if root is None:
+        return parse(csv_file)
+
+    key = file_key(csv_file, "columns")
+    array_file = os.path.join(root, key + ".npy")
+    names_file = os.path.join(root, key + ".columns.json")
+    try:
+        with open(names_file) as f:
+            names = json.load(f)
+        values = np.load(array_file, mmap_mode='r' if mmap else None)
+        if values.shape[0] == len(names):
+            return dict(zip(names, values))
+    except (OSError, ValueError):
+        pass
+
+    columns = parse(csv_file)
+    values = np.ascontiguousarray(np.array(list(columns.values()), dtype=float))
+    _write(array_file, lambda f: np.save(f, values))
+    _write(names_file, lambda f: f.write(json.dumps(list(columns)).encode()))
+    return columns
+
+
+def load_object(filename: str, parse: Callable[[str], Any], kind: str) -> Any:
+    """an object parsed from `filename`, from the cache or from `parse` (and then cached)"""
+    root = cache_dir()
+    if root is None:
+        return parse(filename)
+
+    pickle_file = os.path.join(root, file_key(filename, kind) + ".pkl")
+    try:
+        with open(pickle_file, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    obj = parse(filename)
+    _write(pickle_file, lambda f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL))
+    return obj
+
+
+def _write(filename: str, write: Callable) -> None:
+    """write a cache file atomically; the cache is best-effort, so failures are ignored"""
+    root = os.path.dirname(filename)
+    try:
+        os.makedirs(root, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_file, filename)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+    except OSError:
+        pass
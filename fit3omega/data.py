@@ -1,7 +1,15 @@
 """module for managing the measured voltage data"""
-import pandas as pd
+import csv
+import copy
+from typing import Dict, TYPE_CHECKING
+
 import numpy as np
 
+from fit3omega import cache
+
+if TYPE_CHECKING:
+    import pandas as pd  # only needed for the DataFrame views; slow to import
+
 
 class ACReading:
     def __init__(self, x, y, xerr, yerr):
@@ -16,6 +24,10 @@ class ACReading:
     def __neg__(self):
         return ACReading(-self.x, -self.y, -self.xerr, -self.yerr)
 
+    def __getitem__(self, index) -> 'ACReading':
+        """the readings at a subset of frequencies"""
+        return ACReading(self.x[index], self.y[index], self.xerr[index], self.yerr[index])
+
     def as_complex(self) -> np.ndarray:
         """returns the complex numbers representing the x and y readings"""
         return self.x + 1j * self.y
@@ -24,6 +36,12 @@ class ACReading:
 class Data:
     """
     Handles the measurement data, given the CSV file containing it
+
+    The CSV files are read once into contiguous column arrays. Limits and dropped
+    rows only change which rows are selected; the parsed columns are never modified.
+
+    With a cache directory set (see `fit3omega.cache`), `mmap=True` maps the cached
+    columns from disk instead of loading them.
     """
     CSV_COLS = {
         "V": ['Vs_1w', 'Vs_1w_o'],
@@ -35,67 +53,118 @@ class Data:
         "dVsh": ['dVsh_1w', 'dVsh_1w_o']
     }
 
-    def __init__(self, data_csv: str, error_csv: str = None):
-        self._data = pd.read_csv(data_csv, header="infer")
+    def __init__(self, data_csv: str, error_csv: str = None, mmap: bool = False):
+        self._columns = read_columns(data_csv, mmap)
         self._data_file = data_csv
+        self._n_rows = len(self._columns['freq'])
+
+        # incremented whenever the selected frequencies change
+        self._revision = 0
 
-        # Data limits and voltage readings
+        # row selection: rows not dropped, then limited to [start:end]
+        self._kept = np.ones(self._n_rows, dtype=bool)
         self._start = 0
         self._end = None
+        self._index = None  # selected row numbers; cached
+
+        # readings over all rows (computed once) and over the selected rows
+        self._all_readings = {}
+        self._omegas = None
         self._V = None
         self._V3 = None
         self._Vsh = None
 
         if error_csv:
-            self._error = pd.read_csv(error_csv, header="infer")
+            self._error_columns = read_columns(error_csv, mmap)
             self._error_file = error_csv
         else:
             # try substituting .error.csv at the end of the `data_csv`
             error_csv = '.'.join(data_csv.split('.')[:-1]) + ".error.csv"
             try:
-                self._error = pd.read_csv(error_csv, header="infer")
+                self._error_columns = read_columns(error_csv, mmap)
                 self._error_file = error_csv
             except FileNotFoundError:
-                self._error = zero_error_data(self.data)
+                self._error_columns = zero_error_columns(self._columns)
                 self._error_file = None
 
-        if len(self._data) != len(self._error):
+        if len(next(iter(self._error_columns.values()))) != self._n_rows:
             raise ValueError("data vs. error-data length mismatch")
 
     def __len__(self):
-        return len(self.data)
+        return len(self.index)
 
-    def set_limits(self, start: int, end: int) -> None:
-        """truncate the data range by omitting points at the start and/or end"""
+    def _selection_changed(self) -> None:
+        """drop the caches that depend on the selected rows"""
+        self._index = None
+        self._omegas = None
         self._V = None
         self._V3 = None
         self._Vsh = None
+        self._revision += 1
+
+    def set_limits(self, start: int, end: int) -> None:
+        """truncate the data range by omitting points at the start and/or end"""
+        if (int(start), int(end)) == (self._start, self._end):
+            return
         self._start = int(start)
         self._end = int(end)
+        self._selection_changed()
 
     def reset(self) -> None:
         """reset the data to the initial state"""
-        self._start = None
+        self._kept[:] = True
+        self._start = 0
         self._end = None
-        self._V = None
-        self._V3 = None
-        self._Vsh = None
-        self._data = pd.read_csv(self._data_file, header="infer")
-        if self._error_file is not None:
-            self._error = pd.read_csv(self._error_file, header="infer")
-        else:
-            self._error = zero_error_data(self._data)
+        self._selection_changed()
 
     def drop_row(self, row_index) -> None:
-        """omit the entire row of data at the specified index"""
-        self._data = self._data.drop(row_index, axis=0)
-        if self._error is not None:
-            self._error = self._error.drop(row_index, axis=0)
+        """omit the entire row of data at the specified index (a row number in the CSV file)"""
+        if not (0 <= row_index < self._n_rows and self._kept[row_index]):
+            raise KeyError(f"no row {row_index} to drop")
+        self._kept[row_index] = False
+        self._selection_changed()
+
+    def copy(self) -> 'Data':
+        """a copy with its own row selection; the parsed columns are shared, never modified"""
+        new = copy.copy(self)
+        new._kept = self._kept.copy()
+        new._all_readings = {}
+        new._V = None
+        new._V3 = None
+        new._Vsh = None
+        return new
+
+    def resampled(self, rng: np.random.Generator) -> 'Data':
+        """
+        A copy with every voltage redrawn from a normal distribution about its measured
+        value, using the error data as standard deviations. The row selection is kept.
+        """
+        new = self.copy()
+        new._columns = dict(self._columns)
+        for key in ("V", "V3", "Vsh"):
+            for k in self.CSV_COLS[key]:
+                new._columns[k] = self._columns[k] + rng.normal(
+                    scale=np.abs(self._error_columns['d' + k]))
+        return new
 
     @property
-    def data(self) -> pd.DataFrame:
+    def index(self) -> np.ndarray:
+        """row numbers (in the CSV file) of the selected data"""
+        if self._index is None:
+            self._index = np.flatnonzero(self._kept)[self._start:self._end]
+        return self._index
+
+    @property
+    def data(self) -> 'pd.DataFrame':
         """dataframe containing all the voltage data"""
-        return self._data[self._start:self._end]
+        import pandas as pd
+        index = self.index
+        return pd.DataFrame({k: v[index] for k, v in self._columns.items()}, index=index)
+
+    @property
+    def revision(self) -> int:
+        """counts changes to the selected rows or their errors; derived arrays may be stale"""
+        return self._revision
 
     @property
     def data_file(self) -> str:
@@ -103,27 +172,27 @@ class Data:
         return self._data_file
 
     @property
-    def error(self) -> pd.DataFrame:
+    def error(self) -> 'pd.DataFrame':
         """a dataframe of error values for all the voltage data"""
-        if self._error is None:
-            raise ValueError("no error data has been initialized")
-        return self._error[self._start:self._end]
+        import pandas as pd
+        index = self.index
+        return pd.DataFrame({k: v[index] for k, v in self._error_columns.items()}, index=index)
 
     @error.setter
     def error(self, error_csv):
-        if self._error is not None:
+        if self._error_file is not None:
             raise ValueError("error data already set")
 
-        e = pd.read_csv(error_csv, header="infer")
-
-        for i in range(len(self.data['freq'].values)):
-            if e['freq'].values[i] != self.data['freq'].values[i]:
-                raise ValueError("frequency mismatch")
-
-        if len(e['freq']) != len(self.data['freq']):
+        e = read_columns(error_csv)
+        if len(e['freq']) != self._n_rows:
             raise ValueError("data length mismatch")
-        self._error = e
+        if np.any(e['freq'] != self._columns['freq']):
+            raise ValueError("frequency mismatch")
+
+        self._error_columns = e
         self._error_file = error_csv
+        self._all_readings = {}
+        self._selection_changed()
 
     @property
     def no_error(self) -> bool:
@@ -132,9 +201,12 @@ class Data:
 
     @property
     def omegas(self) -> np.array:
-        """2*PI*f for each measurement frequency f"""
-        omegas_ = 2 * np.pi * self.data['freq'].values
-        return np.ascontiguousarray(omegas_)
+        """2*PI*f for each measurement frequency f (read-only)"""
+        if self._omegas is None:
+            omegas_ = 2 * np.pi * self._columns['freq'][self.index]
+            omegas_.flags.writeable = False
+            self._omegas = omegas_
+        return self._omegas
 
     @property
     def V(self) -> ACReading:
@@ -161,20 +233,51 @@ class Data:
         return self._Vsh
 
     def _get_reading(self, key) -> ACReading:
-        """converts the voltage data to ACReading instances"""
-        args = tuple()
-        for k in self.CSV_COLS[key]:
-            # average voltages (x, y)
-            args += (self.data[k].values,)
-        for k in self.CSV_COLS['d' + key]:
-            # standard deviations (xerr, yerr)
-            data_values = self.data[k[1:]].values
-            data_values[data_values == 0] = 1e-12  # avoid division errors
-            args += (self.error[k].values / data_values,)
-        return ACReading(*args)
-
-
-def zero_error_data(df: pd.DataFrame) -> pd.DataFrame:
+        """converts the voltage data at the selected rows to an ACReading"""
+        if key not in self._all_readings:
+            args = tuple()
+            for k in self.CSV_COLS[key]:
+                # average voltages (x, y)
+                args += (self._columns[k],)
+            for k in self.CSV_COLS['d' + key]:
+                # standard deviations (xerr, yerr)
+                data_values = self._columns[k[1:]]
+                # avoid division errors
+                data_values = np.where(data_values == 0, 1e-12, data_values)
+                args += (self._error_columns[k] / data_values,)
+            self._all_readings[key] = ACReading(*args)
+        return self._all_readings[key][self.index]
+
+
+def read_columns(csv_file: str, mmap: bool = False) -> Dict[str, np.ndarray]:
+    """reads a CSV file into a dict of contiguous float arrays, one per column"""
+    return cache.load_columns(csv_file, _parse_columns, mmap)
+
+
+def _parse_columns(csv_file: str) -> Dict[str, np.ndarray]:
+    # plain numeric files are parsed without pandas, which is slow to import
+    try:
+        with open(csv_file, newline='') as f:
+            names = [name.strip() for name in next(csv.reader(f))]
+            values = np.loadtxt(f, delimiter=',', dtype=float, ndmin=2)
+        if values.shape[1] != len(names):
+            raise ValueError("header does not match the data")
+    except (ValueError, StopIteration):
+        import pandas as pd
+        df = pd.read_csv(csv_file, header="infer")
+        names = list(df.columns)
+        values = df.to_numpy(dtype=float)
+    values = np.ascontiguousarray(values.T)  # each row is one column
+    return dict(zip(names, values))
+
+
+def zero_error_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """all-zero error columns as stand-in for missing error values"""
+    return {'d' + k: np.zeros_like(v) for k, v in columns.items()}
+
+
+def zero_error_data(df: 'pd.DataFrame') -> 'pd.DataFrame':
     """produces all-zero error data as stand-in for missing error values"""
+    import pandas as pd
     cols = ['d' + c for c in df.columns]
     return pd.DataFrame(np.zeros((len(df), len(cols))), columns=cols)
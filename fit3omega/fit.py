@@ -1,20 +1,33 @@
 """
 A class for fitting the measured data with a given the sample configuration.
 """
-from dataclasses import dataclass
-from typing import Union, List
-from scipy.optimize import minimize, OptimizeResult
+import time
+import warnings
+from dataclasses import dataclass, replace
+from typing import Union, List, Tuple, Dict, Sequence, Callable, TYPE_CHECKING
+from collections import OrderedDict
 import numpy as np
 
 from fit3omega.model import Model
 from fit3omega.sample import SampleParameters, load_sample_parameters
 from fit3omega.data import Data, ACReading
 import fit3omega.utils as utils
+import fit3omega.numpy_integrate as numpy_integrate
+from fit3omega.interpolation import OmegaInterpolation
+from fit3omega.instrument import Instrumentation, timed, counter_snapshot, counter_delta
+
+if TYPE_CHECKING:
+    from scipy.optimize import OptimizeResult, Bounds  # imported when fitting; slow to import
+    from fit3omega.surrogate import Surrogate
 
 
 class Fit3omega(Model):
     """fits sample parameters to the measured voltage data"""
 
+    ENGINES = ("minimize", "least_squares")
+    MODELS = ("ogc", "bt")  # Olson-Graham-Chen (Ref. 4) or Borca-Tasciuc (Ref. 1)
+    BOUNDARY_TYPES = ("s", "a", "i")  # BT substrate boundary: semi-infinite/adiabatic/isothermal
+
     @property
     def T2(self) -> ACReading:
         """
@@ -23,20 +36,24 @@ class Fit3omega(Model):
 
         NOTE: The correction has no effect if Rth and Cv or d are 0.
         """
-        if self._T2 is None or self._refresh_dependents:
-            T2_measured_raw = super().T2
-            cT2_raw = T2_measured_raw.as_complex()
-            Rth = self.sample.heater.Rc
-            Cv = self.sample.heater.Cv
-            d = self.sample.heater.height
-            area = self._heater_area
-            T2 = ((cT2_raw + Rth * self.power.norm / area)
-                  / (1.0 + 2.0j * self.data.omegas * Cv * d * (
-                            Rth + cT2_raw * area / self.power.norm)))
-            # NOTE: error is not scaled
-            self._T2 = ACReading(T2.real, T2.imag, T2_measured_raw.xerr, T2_measured_raw.yerr)
-
-        return self._T2
+        T2_measured_raw = super().T2
+        power = self.power
+        heater = self.sample.heater
+        key = (T2_measured_raw, power, heater.Rc, heater.Cv, heater.height, self._heater_area)
+        return self._cached("T2_corrected", key,
+                            lambda: self._correct_T2(T2_measured_raw, power))
+
+    def _correct_T2(self, T2_measured_raw: ACReading, power: ACReading) -> ACReading:
+        cT2_raw = T2_measured_raw.as_complex()
+        Rth = self.sample.heater.Rc
+        Cv = self.sample.heater.Cv
+        d = self.sample.heater.height
+        area = self._heater_area
+        T2 = ((cT2_raw + Rth * power.norm / area)
+              / (1.0 + 2.0j * self.data.omegas * Cv * d * (
+                        Rth + cT2_raw * area / power.norm)))
+        # NOTE: error is not scaled
+        return ACReading(T2.real, T2.imag, T2_measured_raw.xerr, T2_measured_raw.yerr)
 
     @property
     def result(self) -> 'FitResult':
@@ -57,9 +74,100 @@ class Fit3omega(Model):
     def ignore_imag_err(self, b: bool):
         self._ignore_imag_err = bool(b)
 
+    @property
+    def model(self) -> str:
+        """thermal model used to compute T2; one of `MODELS`"""
+        return self._model
+
+    @model.setter
+    def model(self, model: str):
+        if model not in self.MODELS:
+            raise ValueError(f"unknown model '{model}'; expected one of {self.MODELS}")
+        if model == "bt" and not hasattr(self._integrator, "bt_set"):
+            raise ValueError("the BT model requires the 'integrate' C-extension")
+        self._model = model
+
+    @property
+    def boundary_type(self) -> str:
+        """substrate boundary condition for the BT model; one of `BOUNDARY_TYPES`"""
+        return self._boundary_type
+
+    @boundary_type.setter
+    def boundary_type(self, boundary_type: str):
+        if boundary_type not in self.BOUNDARY_TYPES:
+            raise ValueError(f"unknown boundary type '{boundary_type}'; "
+                             f"expected one of {self.BOUNDARY_TYPES}")
+        self._boundary_type = boundary_type
+
+    @property
+    def quad_tol(self) -> Union[float, None]:
+        """relative tolerance for adaptive quadrature; None for the fixed 200-point rule"""
+        return self._quad_tol
+
+    @quad_tol.setter
+    def quad_tol(self, tol: Union[float, None]):
+        if tol is not None and not hasattr(self._integrator, "ogc_integral_adaptive"):
+            raise ValueError("adaptive quadrature requires the 'integrate' C-extension")
+        self._quad_tol = None if tol is None else float(tol)
+
+    @property
+    def interp_tol(self) -> Union[float, None]:
+        """
+        relative tolerance for interpolating the integral in log ω from Chebyshev nodes;
+        None integrates at every ω (see `fit3omega.interpolation`)
+        """
+        return self._interp_tol
+
+    @interp_tol.setter
+    def interp_tol(self, tol: Union[float, None]):
+        self._interp_tol = None if tol is None else float(tol)
+
+    @property
+    def interpolation(self) -> Union[OmegaInterpolation, None]:
+        """the frequency interpolation of the present configuration; None if off"""
+        return self._interpolation if self._integrators_ready else None
+
+    @property
+    def n_threads(self) -> int:
+        """number of threads the integrator spreads frequencies across; 0 sets all available"""
+        return self._n_threads
+
+    @n_threads.setter
+    def n_threads(self, n: int):
+        n = int(n)
+        self._integrator.set_threads(n)
+        if self._interpolation is not None:
+            for integrator in self._interpolation.integrators:
+                integrator.set_threads(n)
+        self._n_threads = n if n > 0 else self._integrator_module.max_threads()
+
+    @property
+    def quad_errors(self) -> Union[np.ndarray, None]:
+        """
+        absolute error estimates of the integral at each ω, from the last adaptive evaluation
+        (at each interpolation node, if interpolating)
+        """
+        return self._quad_errors
+
+    @property
+    def quad_evals(self) -> Union[np.ndarray, None]:
+        """number of integrand evaluations at each ω, from the last adaptive evaluation"""
+        return self._quad_evals
+
+    @property
+    def instrument(self) -> bool:
+        """whether fits record counters and timers into `FitResult.stats`"""
+        return self._stats is not None
+
+    @instrument.setter
+    def instrument(self, b: bool):
+        self._stats = Instrumentation() if b else None
+
     def __init__(self,
                  sample: Union[str, SampleParameters],
-                 data: Union[str, Data]):
+                 data: Union[str, Data],
+                 model: str = "ogc",
+                 boundary_type: str = "s"):
 
         if type(sample) is str:
             sample = load_sample_parameters(sample)
@@ -71,12 +179,21 @@ class Fit3omega(Model):
         self._previous_sample = sample.copy()
         self._original_sample = sample.copy()
 
-        # C-extension for computing integrals
-        self._integrator_module = __import__('integrate')
-        # self._integrators_ready = False
+        # C-extension for computing integrals; each instance owns its integrator configuration
+        try:
+            self._integrator_module = __import__('integrate')
+        except ImportError:
+            warnings.warn("C-extension 'integrate' not found; using NumPy integrator")
+            self._integrator_module = numpy_integrate
+        self._integrator = self._integrator_module.Integrator()
+        self._integrator_config = None
+        self._integrator_omegas = None  # the frequencies of `_integrator_config`
+        self._integral_out = None  # reused output arrays of the integrator; see `_init_integrators`
+        self._jacobian_out = None
+        self._n_threads = 1
 
         # some constants
-        self._layer_heights = [layer.height for layer in self.sample.layers]
+        self._layer_heights = np.array([layer.height for layer in self.sample.layers])
         self._heater_area = self.sample.heater.width * self.sample.heater.length
         self._n_omegas = len(self.data.omegas)
 
@@ -86,46 +203,298 @@ class Fit3omega(Model):
         # objective function selector
         self._ignore_imag_err = False
 
-    def fit(self, tol: float = 1e-12, x0: np.ndarray = None) -> None:
+        # adaptive quadrature (off by default) and its latest error report
+        self._quad_tol = None
+        self._quad_errors = None
+        self._quad_evals = None
+
+        # interpolation across frequency (off by default); see `_init_integrators`
+        self._interp_tol = None
+        self._interpolation = None
+
+        # precomputed table that stands in for the integral; see `fit_surrogate`
+        self._surrogate = None
+
+        # opt-in counters and timers (an Instrumentation); see `instrument`
+        self._stats = None
+
+        # thermal model selector
+        self.model = model
+        self.boundary_type = boundary_type
+
+    def fit(self,
+            tol: float = 1e-12,
+            x0: np.ndarray = None,
+            jac: bool = False,
+            engine: str = "minimize",
+            quad_tols: Sequence[float] = None,
+            bounds: 'Bounds' = None,
+            covariance: bool = True) -> None:
         """
         Run the fitting algorithm to estimate parameters.
 
         :param tol: termination tolerance
         :param x0: initial fit arguments vector
+        :param jac: use the analytic gradient instead of finite differences (OGC model only)
+        :param engine: "minimize" (TNC on the MSE) or "least_squares" (TRF on the residuals)
+        :param quad_tols: successive (decreasing) adaptive quadrature tolerances; each stage
+                          starts from the result of the previous one
+        :param bounds: bounds on the fit arguments (default: 1e-6 to 1e3 times `x0`)
+        :param covariance: attach the linearized covariance to the result (one more Jacobian)
         """
         if x0 is None:
             x0 = self.sample.x
+        if engine not in self.ENGINES:
+            raise ValueError(f"unknown fit engine '{engine}'; expected one of {self.ENGINES}")
+        if jac and self._model != "ogc":
+            raise ValueError("analytic derivatives are only available for the OGC model")
+
+        started = self._start_stats()
+        if quad_tols is None:
+            result = self._fit_engine(tol, x0, jac, engine, bounds)
+        else:
+            quad_tol = self.quad_tol
+            try:
+                for quad_tol_stage in quad_tols:
+                    self.quad_tol = quad_tol_stage
+                    result = self._fit_engine(tol, x0, jac, engine, bounds)
+                    x0 = result.x
+            finally:
+                self.quad_tol = quad_tol
+
+        self._record_result(result, started, covariance, options={"jac": jac, "engine": engine})
+
+    def fit_uncertainty(self,
+                        n_draws: int = 1000,
+                        max_workers: int = None,
+                        seed: int = None,
+                        **kwargs) -> None:
+        """
+        Estimate the uncertainty of the latest fit by refitting resampled data.
 
-        if self._ignore_imag_err:
+        The draws are attached to `result` (see `FitResult.samples`). The latest fit
+        is run first if there is none.
+
+        :param n_draws: number of resampled datasets
+        :param max_workers: number of worker processes (default: number of CPUs)
+        :param seed: seed for the random draws
+        :param kwargs: passed to `fit3omega.uncertainty.monte_carlo`
+        """
+        from fit3omega.uncertainty import monte_carlo
+        samples = monte_carlo(self, n_draws, max_workers, seed, **kwargs)
+        self._result = replace(self._result, samples=samples)
+
+    def fit_multistart(self,
+                       n_starts: int = 32,
+                       n_agree: int = None,
+                       max_workers: int = None,
+                       seed: int = None,
+                       **kwargs) -> List['FitResult']:
+        """
+        Fit from many starting points about the present sample parameters.
+
+        The best minimum becomes `result`; only it has a covariance.
+
+        :param n_starts: number of starting points
+        :param n_agree: stop once this many starts reach the best minimum (default: never)
+        :param max_workers: number of worker processes (default: number of CPUs)
+        :param seed: seed for the starting points
+        :param kwargs: passed to `fit3omega.multistart.multistart`, or on to `fit`
+        :return: the result of each distinct minimum, best first
+        """
+        from fit3omega.multistart import multistart
+        results = multistart(self, n_starts, n_agree=n_agree, max_workers=max_workers,
+                             seed=seed, **kwargs)
+        if not results:
+            raise RuntimeError("every local fit failed")
+        results = [replace(r, previous_sample=self._previous_sample) for r in results]
+        results[0] = replace(results[0], covariance=self.parameter_covariance(results[0].x))
+        self._result = results[0]
+        self._previous_sample = self.sample.copy()
+        return results
+
+    def fit_surrogate(self,
+                      surrogate: Union[str, 'Surrogate'],
+                      polish: bool = False,
+                      **kwargs) -> None:
+        """
+        Fit on a precomputed surrogate table instead of the integral; the fit is bounded
+        by the extent of the table. See `fit3omega.surrogate`.
+
+        :param surrogate: a Surrogate instance, or the file it was saved to
+        :param polish: refit on the exact integral, starting from the surrogate optimum
+        :param kwargs: passed to `fit` (tol, x0, jac, engine, covariance)
+        """
+        from fit3omega.surrogate import Surrogate
+        if type(surrogate) is str:
+            surrogate = Surrogate.load(surrogate)
+        surrogate.check(self)
+
+        kwargs = dict(kwargs)
+        x0 = kwargs.pop("x0", None)
+        x0 = np.clip(self.sample.x if x0 is None else x0, surrogate.lower, surrogate.upper)
+        covariance = kwargs.pop("covariance", True)
+        self._surrogate = surrogate
+        try:
+            self.fit(x0=x0, bounds=surrogate.bounds, covariance=False, **kwargs)
+        finally:
+            self._surrogate = None
+        if polish:
+            self.fit(x0=self._result.x, covariance=covariance, **kwargs)
+        elif covariance:
+            # on the exact integral, not the interpolated table
+            self._result = replace(self._result,
+                                   covariance=self.parameter_covariance(self._result.x))
+
+    def _fit_engine(self,
+                    tol: float,
+                    x0: np.ndarray,
+                    jac: bool,
+                    engine: str,
+                    bounds: 'Bounds' = None) -> 'OptimizeResult':
+        """run the selected fit engine once"""
+        if bounds is None:
+            bounds = utils.positive_bounds(x0, min_frac=1e-6, max_frac=1e3)
+        if engine == "least_squares":
+            result = self._fit_least_squares(tol, x0, jac, bounds)
+        else:
+            result = self._fit_minimize(tol, x0, jac, bounds)
+        if self._stats is not None and "nit" in result:
+            # the objectives count their own evaluations; least_squares reports no iterations
+            self._stats.count("iterations", int(result.nit))
+        return result
+
+    def _fit_minimize(self,
+                      tol: float,
+                      x0: np.ndarray,
+                      jac: bool,
+                      bounds: 'Bounds') -> 'OptimizeResult':
+        """minimize the scalar MSE with a bounded truncated-Newton method"""
+        from scipy.optimize import minimize
+        if jac and self._ignore_imag_err:
+            f_obj = self.objective_func_and_grad_real
+        elif jac:
+            f_obj = self.objective_func_and_grad
+        elif self._ignore_imag_err:
             f_obj = self.objective_func_real
         else:
             f_obj = self.objective_func
 
-        result = minimize(fun=f_obj,
-                          x0=x0,
-                          args=None,
-                          method='TNC',
-                          tol=tol,
-                          bounds=utils.positive_bounds(x0, min_frac=1e-6, max_frac=1e3),
-                          options={'disp': False, 'maxiter': 200, 'stepmx': 100})
+        return minimize(fun=f_obj,
+                        x0=x0,
+                        args=None,
+                        method='TNC',
+                        jac=jac,
+                        tol=tol,
+                        bounds=bounds,
+                        options={'disp': False, 'maxiter': 200, 'stepmx': 100})
+
+    def _fit_least_squares(self,
+                           tol: float,
+                           x0: np.ndarray,
+                           jac: bool,
+                           bounds: 'Bounds') -> 'OptimizeResult':
+        """
+        Minimize the residual vector with a bounded trust-region (Gauss-Newton) method.
 
-        self._record_result(result)
+        NOTE: The returned `fun` is replaced by the MSE, for consistency with `_fit_minimize`.
+              The residual vector is kept as `residuals`.
+        """
+        from scipy.optimize import least_squares
 
+        if self._ignore_imag_err:
+            f_res = self.residuals_real
+            f_jac = self.residuals_jacobian_real
+        else:
+            f_res = self.residuals
+            f_jac = self.residuals_jacobian
+
+        result = least_squares(fun=f_res,
+                               x0=x0,
+                               jac=f_jac if jac else '2-point',
+                               bounds=bounds,
+                               method='trf',
+                               ftol=tol,
+                               xtol=tol,
+                               gtol=tol,
+                               x_scale='jac',
+                               max_nfev=200)
+
+        result.residuals = result.fun
+        result.fun = np.sum(result.residuals**2) / self._n_omegas
+        return result
+
+    @timed("objective", counts=("nfev",))
     def objective_func(self, *args) -> float:
         """returns the value of the objective function (MSE)."""
-        args_T2 = self.sample.substitute(args[0])
+        args_T2 = self._substitute(args[0])
         T2_func_values = self.T2_function(*args_T2)
         dx = T2_func_values.real - self.T2.x
         dy = T2_func_values.imag - self.T2.y
         return sum(dx**2 + dy**2) / self._n_omegas
 
+    @timed("objective", counts=("nfev",))
     def objective_func_real(self, *args) -> float:
         """returns the value of the objective function (MSE) using only in-phase data"""
-        args_T2 = self.sample.substitute(args[0])
+        args_T2 = self._substitute(args[0])
         T2_func_values = self.T2_function(*args_T2)
         dx = T2_func_values.real - self.T2.x
         return sum(dx**2) / self._n_omegas
 
+    @timed("objective", counts=("nfev", "njev"))
+    def objective_func_and_grad(self, *args) -> Tuple[float, np.ndarray]:
+        """returns the value of the objective function (MSE) and its gradient"""
+        args_T2 = self._substitute(args[0])
+        T2_func_values = self.T2_function(*args_T2)
+        T2_jac_values = self.T2_jacobian(*args_T2)
+        dx = T2_func_values.real - self.T2.x
+        dy = T2_func_values.imag - self.T2.y
+        mse = sum(dx**2 + dy**2) / self._n_omegas
+        grad = 2. * (T2_jac_values.real @ dx + T2_jac_values.imag @ dy) / self._n_omegas
+        return mse, grad
+
+    @timed("objective", counts=("nfev", "njev"))
+    def objective_func_and_grad_real(self, *args) -> Tuple[float, np.ndarray]:
+        """returns the objective function (MSE) and its gradient using only in-phase data"""
+        args_T2 = self._substitute(args[0])
+        T2_func_values = self.T2_function(*args_T2)
+        T2_jac_values = self.T2_jacobian(*args_T2)
+        dx = T2_func_values.real - self.T2.x
+        mse = sum(dx**2) / self._n_omegas
+        grad = 2. * (T2_jac_values.real @ dx) / self._n_omegas
+        return mse, grad
+
+    @timed("objective", counts=("nfev",))
+    def residuals(self, *args) -> np.ndarray:
+        """returns the stacked real and imaginary residuals (length 2 * n_omegas)"""
+        args_T2 = self._substitute(args[0])
+        T2_func_values = self.T2_function(*args_T2)
+        dx = T2_func_values.real - self.T2.x
+        dy = T2_func_values.imag - self.T2.y
+        return np.concatenate((dx, dy))
+
+    @timed("objective", counts=("nfev",))
+    def residuals_real(self, *args) -> np.ndarray:
+        """returns the in-phase residuals (length n_omegas)"""
+        args_T2 = self._substitute(args[0])
+        T2_func_values = self.T2_function(*args_T2)
+        return T2_func_values.real - self.T2.x
+
+    @timed("objective", counts=("njev",))
+    def residuals_jacobian(self, *args) -> np.ndarray:
+        """returns the Jacobian of `residuals`, with shape (2 * n_omegas, n_params)"""
+        args_T2 = self._substitute(args[0])
+        T2_jac_values = self.T2_jacobian(*args_T2)
+        return np.concatenate((T2_jac_values.real.T, T2_jac_values.imag.T))
+
+    @timed("objective", counts=("njev",))
+    def residuals_jacobian_real(self, *args) -> np.ndarray:
+        """returns the Jacobian of `residuals_real`, with shape (n_omegas, n_params)"""
+        args_T2 = self._substitute(args[0])
+        T2_jac_values = self.T2_jacobian(*args_T2)
+        return np.ascontiguousarray(T2_jac_values.real.T)
+
+    @timed("T2_function")
     def T2_function(self,
                     kys: List[float],
                     ratio_xys: List[float],
@@ -135,38 +504,352 @@ class Fit3omega(Model):
         Computes a prediction of the 2ω temperature rise based on
         arbitrary layer parameters.
         """
-        # if not self._integrators_ready:
-        self._init_integrators()
+        if self._surrogate is not None:
+            x = self._surrogate.arguments(np.array((kys, ratio_xys, Cvs, Rcs), dtype=float))
+            if x is not None:
+                return -self.power.norm * self._surrogate(x)
+        if not self._integrators_ready:
+            self._init_integrators()
+
+        integral = self._evaluate(lambda integrator, out:
+                                  self._integral(integrator, kys, ratio_xys, Cvs, Rcs, out),
+                                  self._integral_out)
+        if self._model == "bt":
+            # Borca-Tasciuc (Ref. 1) Eq. (1); this model has no contact resistances
+            return -self.power.norm / (np.pi * self.sample.heater.length * kys[0]) * integral
+        return -self.power.norm / self._heater_area * integral
+
+    @timed("T2_function_batch")
+    def T2_function_batch(self,
+                          kys: np.ndarray,
+                          ratio_xys: np.ndarray,
+                          Cvs: np.ndarray,
+                          Rcs: np.ndarray) -> np.ndarray:
+        """
+        `T2_function` for many parameter sets at once: each argument is an (M x n_layers)
+        array with one parameter set per row. Returns an (M x n_omegas) complex array.
 
-        integral = self._integrator_module.ogc_integral(
+        NOTE: OGC model only. This always uses the fixed 200-point rule.
+        """
+        if self._model != "ogc":
+            raise ValueError("batched evaluation is only available for the OGC model")
+        if not self._integrators_ready:
+            self._init_integrators()
+
+        integrals = self._evaluate(lambda integrator, out: integrator.ogc_integral_batch(
             self._layer_heights,
             kys,
             ratio_xys,
             Cvs,
             Rcs
-        )
-        return -self.power.norm / self._heater_area * integral
+        ))
+        return -self.power.norm / self._heater_area * integrals
+
+    def T2_batch(self, xs: np.ndarray) -> np.ndarray:
+        """
+        `T2_function_batch` at each row of `xs`, an (M x n_params) array of fit arguments;
+        the parameters that are not fitted keep their present values.
+        """
+        xs = np.atleast_2d(np.asarray(xs, dtype=float))
+        argv = [np.tile(np.asarray(values, dtype=float), (len(xs), 1))
+                for values in self.sample.argv]
+        for i, (i_param, i_layer) in enumerate(self.sample.fit_indices):
+            argv[i_param][:, i_layer] = xs[:, i]
+        return self.T2_function_batch(*argv)
+
+    @timed("integral")
+    def _integral(self,
+                  integrator,
+                  kys: List[float],
+                  ratio_xys: List[float],
+                  Cvs: List[float],
+                  Rcs: List[float],
+                  out: np.ndarray = None) -> np.ndarray:
+        """the integral of the model at each ω of `integrator`"""
+        if self._model == "bt":
+            args = (self._layer_heights, kys, ratio_xys, Cvs)
+            if self._quad_tol is None:
+                return integrator.bt_integral(*args, out=out)
+            integral, self._quad_errors, self._quad_evals = \
+                integrator.bt_integral_adaptive(self._quad_tol, *args)
+        else:
+            args = (self._layer_heights, kys, ratio_xys, Cvs, Rcs)
+            if self._quad_tol is None:
+                return integrator.ogc_integral(*args, out=out)
+            integral, self._quad_errors, self._quad_evals = \
+                integrator.ogc_integral_adaptive(self._quad_tol, *args)
+        return integral
+
+    def _evaluate(self, evaluate: Callable, out: np.ndarray = None, refine: bool = True):
+        """
+        `evaluate(integrator, out)` at each measured ω, interpolated from the nodes of the
+        frequency interpolation, if any; otherwise evaluated directly into `out`
+        """
+        if self._interpolation is not None:
+            values = self._interpolation(lambda integrator: evaluate(integrator, None), refine)
+            if values is not None:
+                return values
+        return evaluate(self._integrator, out)
+
+    @timed("T2_jacobian")
+    def T2_jacobian(self,
+                    kys: List[float],
+                    ratio_xys: List[float],
+                    Cvs: List[float],
+                    Rcs: List[float]) -> np.ndarray:
+        """
+        Computes the derivatives of the 2ω temperature rise prediction with respect
+        to each fit parameter; the result has shape (n_params, n_omegas).
+
+        NOTE: This always uses the fixed 200-point rule, even if `quad_tol` is set.
+              If interpolating, it uses the nodes that `T2_function` last needed.
+        """
+        if self._model != "ogc":
+            raise ValueError("analytic derivatives are only available for the OGC model")
+        if self._surrogate is not None:
+            x = self._surrogate.arguments(np.array((kys, ratio_xys, Cvs, Rcs), dtype=float))
+            if x is not None:
+                return -self.power.norm * self._surrogate.jacobian(x)
+        if not self._integrators_ready:
+            self._init_integrators()
+
+        jacobian = self._evaluate(lambda integrator, out: integrator.ogc_jacobian(
+            self._layer_heights,
+            kys,
+            ratio_xys,
+            Cvs,
+            Rcs,
+            out=out
+        ), self._jacobian_out, refine=False)
+        return -self.power.norm / self._heater_area * jacobian
 
+    @property
+    def _integrator_key(self) -> tuple:
+        """everything that `_init_integrators` passes to the integrator; the data comes first"""
+        # the key holds the data itself (compared by identity), so its id cannot be reused
+        return (self.data,
+                self.data.revision,
+                tuple(tuple(idx) for idx in self.sample.fit_indices),
+                self.sample.heater.width,
+                len(self.sample.layers),
+                self._model,
+                self._boundary_type,
+                self._interp_tol)
+
+    @property
+    def _integrators_ready(self) -> bool:
+        """false if the integrator was last configured differently"""
+        config, key = self._integrator_config, self._integrator_key
+        if config is None or config[2:] != key[2:]:
+            return False
+        if config[0] is key[0] and config[1] == key[1]:
+            return True
+        # other data at the same frequencies (e.g. a Monte Carlo draw) keeps the configuration
+        omegas = self.data.omegas
+        if omegas is self._integrator_omegas or np.array_equal(omegas, self._integrator_omegas):
+            self._integrator_config = key
+            return True
+        return False
+
+    @timed("init_integrators")
     def _init_integrators(self) -> None:
-        """initialize the integrator module"""
-        self._integrator_module.ogc_set(self.data.omegas,
-                                        self.sample.fit_indices,
-                                        self.sample.heater.width / 2.0,
-                                        1e-6,
-                                        15.,
-                                        len(self.sample.layers))
-        # self._integrators_ready = True
-
-    def _record_result(self, result: OptimizeResult):
-        self._result = FitResult(result, self._previous_sample)
+        """initialize the integrator, and the frequency interpolation if it is on"""
+        omegas = self.data.omegas
+        if self._model == "bt" and any(idx[0] == 3 for idx in self.sample.fit_indices):
+            raise ValueError("the BT model has no contact resistances to fit")
+        self._configure(self._integrator, omegas)
+        if self._model == "ogc":
+            self._jacobian_out = np.empty((len(self.sample.fit_indices), len(omegas)), complex)
+        self._integral_out = np.empty(len(omegas), complex)
+        self._n_omegas = len(omegas)
+
+        if self._interp_tol is None:
+            self._interpolation = None
+        else:
+            def make_integrator(nodes: np.ndarray):
+                integrator = self._integrator_module.Integrator()
+                integrator.set_threads(self._n_threads)
+                self._configure(integrator, nodes)
+                return integrator
+            self._interpolation = OmegaInterpolation(omegas, self._interp_tol, make_integrator)
+        self._integrator_config = self._integrator_key
+        self._integrator_omegas = omegas
+
+    def _configure(self, integrator, omegas: np.ndarray) -> None:
+        """set up `integrator` for the present sample and model at `omegas`"""
+        half_width = self.sample.heater.width / 2.0
+        if self._model == "bt":
+            # λ = χ / b, over the same range as OGC
+            integrator.bt_set(omegas,
+                              half_width,
+                              1e-6 / half_width,
+                              15. / half_width,
+                              len(self.sample.layers),
+                              self._boundary_type.encode())
+        else:
+            integrator.ogc_set(omegas,
+                               self.sample.fit_indices,
+                               half_width,
+                               1e-6,
+                               15.,
+                               len(self.sample.layers))
+
+    def parameter_covariance(self, x: np.ndarray) -> Union[np.ndarray, None]:
+        """
+        Linearized covariance of the fit parameters at `x`: (J^T W J)^-1, for the Jacobian J
+        of the residuals and weights W = 1/σ^2 from the measurement errors of `T2`.
+
+        Without error data (any σ = 0) the residuals are unweighted and the covariance is
+        scaled by their variance, SSR / (n - n_params). Returns None if J^T W J is singular.
+
+        NOTE: The OGC model uses the analytic Jacobian; the BT model, forward differences.
+        """
+        args_T2 = self.sample.substitute(x)
+        if self._model == "ogc":
+            T2_jac_values = self.T2_jacobian(*args_T2)
+        else:
+            T2_jac_values = self._T2_jacobian_fd(x)
+
+        T2 = self.T2
+        if self._ignore_imag_err:
+            jac = T2_jac_values.real.T
+            sigmas = np.abs(T2.x * T2.xerr)
+        else:
+            jac = np.concatenate((T2_jac_values.real.T, T2_jac_values.imag.T))
+            sigmas = np.concatenate((np.abs(T2.x * T2.xerr), np.abs(T2.y * T2.yerr)))
+
+        if np.all(sigmas > 0.0):
+            jac = jac / sigmas[:, np.newaxis]
+            scale = 1.0
+        else:
+            n_dof = len(jac) - len(x)
+            if n_dof < 1:
+                return None
+            residuals = self.residuals_real(x) if self._ignore_imag_err else self.residuals(x)
+            scale = np.sum(residuals**2) / n_dof
+
+        try:
+            return scale * np.linalg.inv(jac.T @ jac)
+        except np.linalg.LinAlgError:
+            return None
+
+    def _T2_jacobian_fd(self, x: np.ndarray) -> np.ndarray:
+        """forward-difference derivatives of T2 w.r.t. each fit parameter; (n_params, n_omegas)"""
+        T2_x = self.T2_function(*self.sample.substitute(x))
+        jacobian = np.empty((len(x), len(T2_x)), dtype=complex)
+        for i in range(len(x)):
+            x_step = np.array(x, dtype=float)
+            h = 1e-6 * abs(x_step[i]) if x_step[i] != 0.0 else 1e-12
+            x_step[i] += h
+            jacobian[i] = (self.T2_function(*self.sample.substitute(x_step)) - T2_x) / h
+        return jacobian
+
+    @timed("substitute")
+    def _substitute(self, x: np.ndarray) -> List[np.ndarray]:
+        """`sample.substitute` into reused arrays, timed when instrumenting"""
+        return self.sample._substitute_in_place(x)
+
+    def _start_stats(self) -> Union[tuple, None]:
+        """reset the instrumentation for a fit; returns its start time and integrator counts"""
+        if self._stats is None:
+            return None
+        self._stats.reset()
+        return time.perf_counter(), counter_snapshot(self._all_integrators())
+
+    def _finish_stats(self, started: Union[tuple, None]) -> Union[dict, None]:
+        """the records of the fit begun by `_start_stats`, with its total time"""
+        if started is None or self._stats is None:
+            return None
+        t0, snapshot = started
+        stats = self._stats.as_dict()
+        stats["seconds"]["fit"] = time.perf_counter() - t0
+        stats["integrator"] = counter_delta(self._all_integrators(), snapshot)
+        return stats
+
+    def _all_integrators(self) -> list:
+        """the integrator, and those of the frequency interpolation"""
+        if self._interpolation is None:
+            return [self._integrator]
+        return [self._integrator] + self._interpolation.integrators
+
+    def _record_result(self,
+                       result: 'OptimizeResult',
+                       started: tuple = None,
+                       covariance: bool = True,
+                       options: dict = None):
+        self._result = FitResult(result,
+                                 self._previous_sample,
+                                 covariance=(self.parameter_covariance(result.x)
+                                             if covariance else None),
+                                 stats=self._finish_stats(started),
+                                 options=options)
         self._previous_sample = self.sample.copy()
 
 
 @dataclass(frozen=True)
 class FitResult:
     """a container for results of a data fit"""
-    result: OptimizeResult
+    result: 'OptimizeResult'
     previous_sample: SampleParameters
+    samples: np.ndarray = None  # (n_draws, n_params) Monte Carlo refits; NaN rows failed
+    covariance: np.ndarray = None  # (n_params, n_params) linearized, at the optimum
+    stats: dict = None  # seconds and calls per stage, evaluation counts; see `Fit3omega.instrument`
+    options: dict = None  # the `jac` and `engine` arguments of the fit
+
+    @property
+    def stderr(self) -> Union[np.ndarray, None]:
+        """standard errors of the parameters, from the linearized covariance"""
+        if self.covariance is None:
+            return None
+        return np.sqrt(np.diag(self.covariance))
+
+    def confidence_intervals(self, n_sigma: float = 1.96) -> Union[np.ndarray, None]:
+        """(n_params, 2) lower and upper bounds, x -/+ n_sigma standard errors"""
+        stderr = self.stderr
+        if stderr is None:
+            return None
+        return np.stack((self.x - n_sigma * stderr, self.x + n_sigma * stderr), axis=1)
+
+    @property
+    def _good_samples(self) -> Union[np.ndarray, None]:
+        """the Monte Carlo refits that succeeded, if there are enough for statistics"""
+        if self.samples is None:
+            return None
+        samples = self.samples[~np.any(np.isnan(self.samples), axis=1)]
+        return samples if len(samples) > 1 else None
+
+    @property
+    def n_draws(self) -> int:
+        """number of successful Monte Carlo refits"""
+        samples = self._good_samples
+        return 0 if samples is None else len(samples)
+
+    @property
+    def n_failed(self) -> int:
+        """number of failed Monte Carlo refits"""
+        if self.samples is None:
+            return 0
+        return int(np.count_nonzero(np.any(np.isnan(self.samples), axis=1)))
+
+    @property
+    def mean(self) -> Union[np.ndarray, None]:
+        """mean of the Monte Carlo refits of each parameter"""
+        samples = self._good_samples
+        return None if samples is None else samples.mean(axis=0)
+
+    @property
+    def std(self) -> Union[np.ndarray, None]:
+        """standard deviation of the Monte Carlo refits of each parameter"""
+        samples = self._good_samples
+        return None if samples is None else samples.std(axis=0, ddof=1)
+
+    @property
+    def correlation(self) -> Union[np.ndarray, None]:
+        """correlation matrix of the Monte Carlo refits; shape (n_params, n_params)"""
+        samples = self._good_samples
+        if samples is None:
+            return None
+        return np.atleast_2d(np.corrcoef(samples, rowvar=False))
 
     @property
     def x(self) -> np.ndarray:
@@ -178,6 +861,11 @@ class FitResult:
         """residual value of the objective function"""
         return self.result.fun
 
+    @property
+    def parameters(self) -> Dict[str, float]:
+        """a descriptive dict of the fitted parameters"""
+        return OrderedDict(zip(self.previous_sample.parameters.keys(), self.x))
+
     @property
     def summary(self) -> str:
         """return a string summarized the result"""
@@ -185,14 +873,17 @@ class FitResult:
         diff_percents = [1e2 * (xf - xi) / xi for xi, xf in zip(x0, self.x)]
         diff_signs = ['+' if p >= 0 else '-' for p in diff_percents]
 
+        stderr = self.stderr
         props_by_layer = {}
         for i, idx in enumerate(self.previous_sample.fit_indices):
             layer_name = self.previous_sample.layers[idx[1]].name
             param_name = self.previous_sample.FIELDS[idx[0]].rstrip('s')
             change_str = (
-                "{:>8} --> {:.2e} ({} %)".format(param_name,
-                                                 self.x[i],
-                                                 diff_signs[i] + "%.2f" % abs(diff_percents[i]))
+                "{:>8} --> {:.2e}{} ({} %)".format(param_name,
+                                                   self.x[i],
+                                                   "" if stderr is None
+                                                   else " ± %.1e" % stderr[i],
+                                                   diff_signs[i] + "%.2f" % abs(diff_percents[i]))
             )
             if layer_name in props_by_layer:
                 props_by_layer[layer_name].append(change_str)
@@ -206,6 +897,26 @@ class FitResult:
                 lines.append("    " + change_str)
         lines.append("\nERROR: %.6e" % self.error)
 
+        if self.samples is not None:
+            lines.append("\nMONTE CARLO ({} draws{}):".format(
+                self.n_draws, ", %d failed" % self.n_failed if self.n_failed else ""))
+        if self.n_draws > 0:
+            for name, mean, std in zip(self.parameters, self.mean, self.std):
+                lines.append("    {:>16} = {:.3e} ± {:.2e}".format(name, mean, std))
+            lines.append("    correlation:")
+            for row in self.correlation:
+                lines.append("    " + " ".join("{:>7.3f}".format(c) for c in row))
+
+        if self.stats is not None:
+            counts = dict(self.stats["counts"], **self.stats["integrator"])
+            lines.append("\nINSTRUMENTATION:")
+            for stage, seconds in sorted(self.stats["seconds"].items(), key=lambda kv: -kv[1]):
+                lines.append("    {:>18} {:>10.2f} ms {:>8} calls".format(
+                    stage, 1e3 * seconds, self.stats["calls"].get(stage, 1)))
+            for name, n in counts.items():
+                if n:
+                    lines.append("    {:>18} {:>10d}".format(name, n))
+
         return "\n".join(lines)
 
     def __repr__(self):
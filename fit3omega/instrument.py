@@ -0,0 +1,103 @@
+"""
+Opt-in counters and timers for the hot paths of a fit.
+
+Methods decorated with `timed` add their wall-clock seconds and call count to the
+`_stats` attribute of their instance, if it is an `Instrumentation`, and may add one to
+named counts such as the number of objective evaluations; when `_stats`
+is None (the default) the only cost is one extra function call. Stages nest, so
+the seconds of each stage include those of the stages it calls.
+
+    ft.instrument = True
+    ft.fit(jac=True)
+    print(ft.result.stats)
+    write_jsonl("fits.jsonl", [ft.result.stats])
+"""
+import os
+import json
+import time
+import functools
+from typing import Callable, Dict, Iterable, Tuple
+
+
+class Instrumentation:
+    """seconds and calls per stage, and named counts, accumulated since the last `reset`"""
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.counts = {}
+
+    def reset(self) -> None:
+        """forget everything recorded so far"""
+        self.seconds.clear()
+        self.calls.clear()
+        self.counts.clear()
+
+    def add(self, stage: str, seconds: float) -> None:
+        """record one call of `stage` that took `seconds`"""
+        self.seconds[stage] = self.seconds.get(stage, 0.) + seconds
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        """add `n` to the count `name`"""
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def as_dict(self) -> Dict[str, dict]:
+        """a JSON-serializable copy of the records"""
+        return {"seconds": dict(self.seconds),
+                "calls": dict(self.calls),
+                "counts": dict(self.counts)}
+
+
+def timed(stage: str, counts: Tuple[str, ...] = ()) -> Callable:
+    """
+    Decorates a method to record its time as `stage` in its instance's `_stats`.
+
+    :param stage: name the time and calls are recorded under
+    :param counts: names of the counts that each call adds one to
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            stats = self._stats
+            if stats is None:
+                return method(self, *args, **kwargs)
+            for name in counts:
+                stats.count(name)
+            t0 = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                stats.add(stage, time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+def counter_snapshot(integrators: Iterable) -> Dict[int, tuple]:
+    """the evaluation counts of each integrator, to pass to `counter_delta` later"""
+    # holding the integrators keeps their ids from being reused
+    return {id(integrator): (integrator, integrator.counters()) for integrator in integrators}
+
+
+def counter_delta(integrators: Iterable, snapshot: Dict[int, tuple]) -> Dict[str, int]:
+    """the evaluation counts of `integrators` since `snapshot`, added up"""
+    total = {}
+    for integrator in integrators:
+        start = snapshot.get(id(integrator), (None, {}))[1]
+        for k, v in integrator.counters().items():
+            total[k] = total.get(k, 0) + v - start.get(k, 0)
+    return total
+
+
+def write_jsonl(filename: str, records: Iterable[dict]) -> None:
+    """append each record to `filename` as one line of JSON"""
+    with open(os.path.expanduser(filename), "a") as f:
+        for record in records:
+            f.write(json.dumps(record, default=_json_default) + "\n")
+
+
+def _json_default(obj):
+    """NumPy scalars and arrays, as plain numbers and lists"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
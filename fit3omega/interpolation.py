@@ -0,0 +1,128 @@
+"""
+Interpolation of the model integral across frequency.
+
+The integral is smooth in log ω, so it can be computed at a few Chebyshev-Lobatto
+nodes in log ω spanning the measured frequencies and interpolated to the rest.
+Level k has 2**k + 1 nodes. The error of the interpolant is estimated by the size
+of its last few Chebyshev coefficients, which costs no extra integrals. Nodes are
+added one level at a time until the estimate is within tolerance.
+"""
+from typing import Callable, Union
+
+import numpy as np
+
+
+class OmegaInterpolation:
+    """
+    Evaluates a function of ω at Chebyshev nodes in log ω and interpolates the results
+    to the measured frequencies.
+
+    The level only increases: a fit keeps the nodes its hardest evaluation needed.
+    If the tolerance is not met before the nodes outnumber half the measured
+    frequencies, every later evaluation is made directly at the measured frequencies.
+    """
+    MIN_LEVEL = 3  # 9 nodes
+    N_TAIL = 4  # number of trailing Chebyshev coefficients in the error estimate
+
+    def __init__(self, omegas: np.ndarray, tol: float, make_integrator: Callable):
+        """
+        :param omegas: the measured frequencies
+        :param tol: relative tolerance of the interpolated values
+        :param make_integrator: returns an integrator configured for a given array of ω
+        """
+        self.omegas = np.asarray(omegas, dtype=float)
+        self.tol = float(tol)
+        self._make_integrator = make_integrator
+        self._integrators = {}  # level: integrator at the nodes of that level
+        self._matrices = {}  # level: interpolation matrix from its nodes to `omegas`
+        self._tail_matrices = {}  # level: from the values at its nodes to the last coefficients
+
+        # the highest level with fewer nodes than half the measured frequencies
+        self.max_level = int(np.floor(np.log2(max(len(self.omegas) // 2 - 1, 1))))
+        self.level = self.MIN_LEVEL if self.max_level >= self.MIN_LEVEL else None
+        self.error = None  # latest error estimate
+
+    @property
+    def n_nodes(self) -> Union[int, None]:
+        """number of nodes at the present level; None if evaluating directly"""
+        return None if self.level is None else 2**self.level + 1
+
+    @property
+    def integrators(self) -> list:
+        """the integrators made so far, one per level"""
+        return list(self._integrators.values())
+
+    def nodes(self, level: int) -> np.ndarray:
+        """frequencies at the Chebyshev-Lobatto nodes of `level`, in decreasing order"""
+        log_lo, log_hi = np.log(self.omegas.min()), np.log(self.omegas.max())
+        t = np.cos(np.pi * np.arange(2**level + 1) / 2**level)
+        return np.exp(log_lo + (t + 1.) * (log_hi - log_lo) / 2.)
+
+    def __call__(self, evaluate: Callable, refine: bool = True) -> Union[np.ndarray, None]:
+        """
+        Values of `evaluate` at the measured frequencies, interpolated from the nodes.
+
+        :param evaluate: maps an integrator to an array whose last axis runs over its ω
+        :param refine: add nodes until the tolerance is met (otherwise keep the level)
+        :return: the interpolated values; None when evaluating directly
+        """
+        while self.level is not None:
+            values = evaluate(self._integrator(self.level))
+            if not refine:
+                break
+            tail = values @ self._tail_matrix(self.level).T
+            scale = np.max(np.abs(values))
+            self.error = np.max(np.abs(tail)) / scale if scale else 0.
+            if self.error <= self.tol:
+                break
+            self.level = self.level + 1 if self.level < self.max_level else None
+        else:
+            return None
+        return values @ self._matrix(self.level).T
+
+    def _integrator(self, level: int):
+        if level not in self._integrators:
+            self._integrators[level] = self._make_integrator(self.nodes(level))
+        return self._integrators[level]
+
+    def _matrix(self, level: int) -> np.ndarray:
+        """(n_omegas, n_nodes) matrix that interpolates from the nodes of `level`"""
+        if level not in self._matrices:
+            self._matrices[level] = barycentric_matrix(self.nodes(level), self.omegas)
+        return self._matrices[level]
+
+    def _tail_matrix(self, level: int) -> np.ndarray:
+        """(N_TAIL, n_nodes) matrix giving the last Chebyshev coefficients of the interpolant"""
+        if level not in self._tail_matrices:
+            self._tail_matrices[level] = chebyshev_matrix(2**level)[-self.N_TAIL:]
+        return self._tail_matrices[level]
+
+
+def barycentric_matrix(nodes: np.ndarray, omegas: np.ndarray) -> np.ndarray:
+    """
+    Matrix of the barycentric interpolation in log ω from Chebyshev-Lobatto `nodes`
+    to `omegas`; rows for `omegas` that are nodes pick that node.
+    """
+    x_nodes = np.log(nodes)
+    x = np.log(np.asarray(omegas, dtype=float))
+    weights = (-1.)**np.arange(len(nodes))
+    weights[[0, -1]] *= 0.5
+
+    diff = x[:, None] - x_nodes[None, :]
+    exact = diff == 0.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = weights / diff
+    terms[exact.any(axis=1)] = exact[exact.any(axis=1)]
+    return terms / terms.sum(axis=1, keepdims=True)
+
+
+def chebyshev_matrix(n: int) -> np.ndarray:
+    """
+    (n + 1, n + 1) matrix from values at the n + 1 Chebyshev-Lobatto nodes to the
+    coefficients of the interpolating Chebyshev series (a type-I discrete cosine transform)
+    """
+    j = np.arange(n + 1)
+    matrix = np.cos(np.pi * np.outer(j, j) / n) * 2. / n
+    matrix[:, [0, -1]] *= 0.5
+    matrix[[0, -1]] *= 0.5
+    return matrix
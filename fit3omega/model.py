@@ -2,6 +2,8 @@
 This module contains the class that converts between voltages
 and derived quantities. Namely current, power, and temperature amplitude.
 """
+from typing import Dict, Callable
+
 import numpy as np
 
 from fit3omega.data import Data, ACReading
@@ -31,11 +33,10 @@ class Model:
         self.data = data
 
         self._refresh_dependents = False
-        self._Ish = None
-        self._T2 = None
-        self._Z2 = None
-        self._dT2 = None
-        self._power = None
+
+        # cached derived quantities: name -> (key of inputs, value)
+        self._nodes = {}
+        self._node_stats = {}
 
     @property
     def refresh(self) -> bool:
@@ -51,30 +52,63 @@ class Model:
         else:
             raise ValueError("argument is not a boolean")
 
+    @property
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """hits and misses of each cached quantity; 'misses' is also its version number"""
+        return {name: dict(stats) for name, stats in self._node_stats.items()}
+
+    def _cached(self, name: str, key: tuple, compute: Callable[[], ACReading]) -> ACReading:
+        """
+        Return the cached value of a derived quantity, unless `key` changed.
+
+        Keys hold the sample fields a quantity depends on and the upstream values
+        themselves, which compare by identity; a recomputed upstream value is a new
+        object, so everything downstream of it is recomputed too.
+        """
+        stats = self._node_stats.setdefault(name, {"hits": 0, "misses": 0})
+        node = self._nodes.get(name)
+        if node is not None and not self._refresh_dependents and node[0] == key:
+            stats["hits"] += 1
+            return node[1]
+        stats["misses"] += 1
+        value = compute()
+        self._nodes[name] = (key, value)
+        return value
+
+    @property
+    def _data_key(self) -> tuple:
+        """identifies the selected measurement data"""
+        return self.data, self.data.revision
+
     @property
     def Ish(self) -> ACReading:
         """RMS series current at each ω"""
-        if self._Ish is None or self.refresh:
-            x = self.data.Vsh.x / self.sample.shunt.R
-            y = self.data.Vsh.y / self.sample.shunt.R
-            xerr = np.sqrt(self.data.Vsh.xerr**2 + self.sample.shunt.err**2)
-            yerr = np.sqrt(self.data.Vsh.yerr**2 + self.sample.shunt.err**2)
-            self._Ish = ACReading(x, y, xerr, yerr)
-        return self._Ish
+        shunt = self.sample.shunt
+        return self._cached("Ish", (self._data_key, shunt.R, shunt.err), self._compute_Ish)
+
+    def _compute_Ish(self) -> ACReading:
+        x = self.data.Vsh.x / self.sample.shunt.R
+        y = self.data.Vsh.y / self.sample.shunt.R
+        xerr = np.sqrt(self.data.Vsh.xerr**2 + self.sample.shunt.err**2)
+        yerr = np.sqrt(self.data.Vsh.yerr**2 + self.sample.shunt.err**2)
+        return ACReading(x, y, xerr, yerr)
 
     @property
     def T2(self) -> ACReading:
         """peak temperature oscillations at each ω"""
-        if self._T2 is None or self.refresh:
-            x = 2. * np.abs(self.data.V3.x) / (self.sample.heater.dRdT * self.Ish.norm)
-            y = -2. * np.abs(self.data.V3.y) / (self.sample.heater.dRdT * self.Ish.norm)
-            xerr = np.sqrt(
-                self.data.V3.xerr**2 + self.sample.heater.dRdT_err**2 + self.Ish.norm_err**2)
-            yerr = np.sqrt(
-                self.data.V3.yerr**2 + self.sample.heater.dRdT_err**2 + self.Ish.norm_err**2)
-            self._T2 = ACReading(x, y, xerr, yerr)
-
-        return self._T2
+        heater = self.sample.heater
+        Ish = self.Ish
+        return self._cached("T2", (self._data_key, Ish, heater.dRdT, heater.dRdT_err),
+                            lambda: self._compute_T2(Ish))
+
+    def _compute_T2(self, Ish: ACReading) -> ACReading:
+        x = 2. * np.abs(self.data.V3.x) / (self.sample.heater.dRdT * Ish.norm)
+        y = -2. * np.abs(self.data.V3.y) / (self.sample.heater.dRdT * Ish.norm)
+        xerr = np.sqrt(
+            self.data.V3.xerr**2 + self.sample.heater.dRdT_err**2 + Ish.norm_err**2)
+        yerr = np.sqrt(
+            self.data.V3.yerr**2 + self.sample.heater.dRdT_err**2 + Ish.norm_err**2)
+        return ACReading(x, y, xerr, yerr)
 
     @property
     def Z2(self) -> ACReading:
@@ -82,14 +116,17 @@ class Model:
         Average 2ω surface thermal impedance at each ω
         (Z2 = T/Q, Joule heat input Q) [K / W ]
         """
-        if self._Z2 is None or self.refresh:
-            x = self.T2.x / self.power.norm
-            y = self.T2.y / self.power.norm
-            xerr = np.sqrt(self.T2.xerr**2 + self.power.norm_err**2)
-            yerr = np.sqrt(self.T2.yerr**2 + self.power.norm_err**2)
-            self._Z2 = ACReading(x, y, xerr, yerr)
-
-        return self._Z2
+        T2 = self.T2
+        power = self.power
+        return self._cached("Z2", (T2, power), lambda: self._compute_Z2(T2, power))
+
+    @staticmethod
+    def _compute_Z2(T2: ACReading, power: ACReading) -> ACReading:
+        x = T2.x / power.norm
+        y = T2.y / power.norm
+        xerr = np.sqrt(T2.xerr**2 + power.norm_err**2)
+        yerr = np.sqrt(T2.yerr**2 + power.norm_err**2)
+        return ACReading(x, y, xerr, yerr)
 
     @property
     def power(self) -> ACReading:
@@ -97,18 +134,21 @@ class Model:
         Average active (x) and reactive (y) power (IEEE Std 1459-2010): S = VI*
         P_ave = I_rms V_rms = |power|
         """
-        if self._power is None or self._refresh_dependents:
-            x = self.data.V.x * self.Ish.x + self.data.V.y * self.Ish.y
-            xerr = np.sqrt(
-                (self.data.V.x * self.Ish.x)**2 * (self.data.V.xerr**2 + self.Ish.xerr**2)
-                + (self.data.V.y * self.Ish.y)**2 * (self.data.V.yerr**2 + self.Ish.yerr**2)
-            ) / x
-
-            y = self.data.V.y * self.Ish.x - self.data.V.x * self.Ish.y
-            yerr = np.sqrt(
-                (self.data.V.y * self.Ish.x)**2 * (self.data.V.yerr**2 + self.Ish.xerr**2)
-                + (self.data.V.x * self.Ish.y)**2 * (self.data.V.xerr**2 + self.Ish.yerr**2)
-            ) / y
-
-            self._power = ACReading(x, y, xerr, yerr)
-        return self._power
+        Ish = self.Ish
+        return self._cached("power", (self._data_key, Ish), lambda: self._compute_power(Ish))
+
+    def _compute_power(self, Ish: ACReading) -> ACReading:
+        V = self.data.V
+        x = V.x * Ish.x + V.y * Ish.y
+        xerr = np.sqrt(
+            (V.x * Ish.x)**2 * (V.xerr**2 + Ish.xerr**2)
+            + (V.y * Ish.y)**2 * (V.yerr**2 + Ish.yerr**2)
+        ) / x
+
+        y = V.y * Ish.x - V.x * Ish.y
+        yerr = np.sqrt(
+            (V.y * Ish.x)**2 * (V.yerr**2 + Ish.xerr**2)
+            + (V.x * Ish.y)**2 * (V.xerr**2 + Ish.yerr**2)
+        ) / y
+
+        return ACReading(x, y, xerr, yerr)
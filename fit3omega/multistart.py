@@ -0,0 +1,176 @@
+"""
+Multi-start fitting: local fits from many starting points, run across a pool of processes.
+
+Starting points are drawn log-uniformly with a Sobol or Latin hypercube sequence, from
+`[x0 * min_frac, x0 * max_frac]` for the starting guess x0. The first start is x0 itself.
+Every local fit is bounded by the same bounds as a fit from x0. Converged points that
+agree within `xtol` (relative) are one minimum. The minima are ranked by error. Once the
+best minimum has been reached from `n_agree` starts, the remaining starts are cancelled.
+"""
+import time
+import warnings
+from typing import Dict, List
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fit3omega.data import Data
+from fit3omega.sample import SampleParameters
+import fit3omega.utils as utils
+
+METHODS = ("sobol", "lhs")
+
+# the fitter of a worker process, and the settings for its fits; see `_init_worker`
+_FITTER = None
+_SETTINGS = None
+
+
+def starting_points(x0: np.ndarray,
+                    n_starts: int,
+                    method: str = "sobol",
+                    min_frac: float = 0.1,
+                    max_frac: float = 10.,
+                    seed: int = None) -> np.ndarray:
+    """
+    Starting points spread log-uniformly about `x0`; the first is `x0` itself.
+
+    :return: (n_starts, len(x0)) array
+    """
+    from scipy.stats import qmc
+    if method not in METHODS:
+        raise ValueError(f"unknown sampling method '{method}'; expected one of {METHODS}")
+    x0 = np.asarray(x0, dtype=float)
+    if method == "sobol":
+        sampler = qmc.Sobol(d=len(x0), scramble=True, seed=seed)
+    else:
+        sampler = qmc.LatinHypercube(d=len(x0), seed=seed)
+    with warnings.catch_warnings():
+        # Sobol points are best balanced in powers of 2, but any number will do here
+        warnings.simplefilter("ignore", UserWarning)
+        unit = sampler.random(max(n_starts - 1, 0))
+    log_lo = np.log(x0 * min_frac)
+    log_hi = np.log(x0 * max_frac)
+    points = np.exp(log_lo + unit * (log_hi - log_lo))
+    return np.vstack((x0, points))[:n_starts]
+
+
+def multistart(ft,
+               n_starts: int = 32,
+               method: str = "sobol",
+               n_agree: int = None,
+               xtol: float = 1e-3,
+               max_workers: int = None,
+               seed: int = None,
+               min_frac: float = 0.1,
+               max_frac: float = 10.,
+               verbose: bool = False,
+               **fit_kwargs) -> List['FitResult']:
+    """
+    Fit from many starting points and collect the distinct minima.
+
+    :param ft: a Fit3omega instance; its present sample parameters are the starting guess
+    :param n_starts: number of starting points
+    :param method: "sobol" or "lhs" (Latin hypercube)
+    :param n_agree: stop once this many starts reach the best minimum (default: never);
+                    starts already running in the workers are not waited for
+    :param xtol: relative tolerance within which converged points are the same minimum
+    :param max_workers: number of worker processes (default: number of CPUs);
+                        1 runs every start in this process
+    :param seed: seed for the starting points
+    :param min_frac: lowest starting value, as a fraction of the starting guess
+    :param max_frac: highest starting value, as a multiple of the starting guess
+    :param verbose: print each local fit as it finishes, and the minima at the end
+    :param fit_kwargs: passed to `Fit3omega.fit` (tol, jac, engine)
+    :return: the result of each minimum, best first
+    """
+    x0 = ft.sample.x
+    bounds = utils.positive_bounds(x0, min_frac=1e-6, max_frac=1e3)
+    starts = starting_points(x0, n_starts, method, min_frac, max_frac, seed)
+    settings = {
+        "model": ft.model,
+        "boundary_type": ft.boundary_type,
+        "ignore_imag_err": ft.ignore_imag_err,
+        "quad_tol": ft.quad_tol,
+        "interp_tol": ft.interp_tol,
+        "bounds": bounds,
+        "fit_kwargs": fit_kwargs,
+    }
+
+    minima = []  # [result, count], in order of discovery
+    t0 = time.perf_counter()
+
+    def collect(result) -> bool:
+        """add a converged fit to its minimum; true if the best minimum has enough starts"""
+        if result is not None:
+            for minimum in minima:
+                if _same_minimum(minimum[0].x, result.x, xtol):
+                    minimum[1] += 1
+                    if result.error < minimum[0].error:
+                        minimum[0] = result
+                    break
+            else:
+                minima.append([result, 1])
+            if verbose:
+                print("==> fit3omega: multistart, {} minima after {:.1f} s (error {:.3e})"
+                      .format(len(minima), time.perf_counter() - t0, result.error))
+        if n_agree is None or not minima:
+            return False
+        return min(minima, key=lambda m: m[0].error)[1] >= n_agree
+
+    if max_workers == 1:
+        _init_worker(ft.sample, ft.data, settings)
+        for x_start in starts:
+            if collect(_fit_start(x_start)):
+                break
+    else:
+        # not a `with` block, whose exit would wait for every running start after an early stop
+        pool = ProcessPoolExecutor(max_workers=max_workers,
+                                   initializer=_init_worker,
+                                   initargs=(ft.sample, ft.data, settings))
+        stopped = False
+        try:
+            futures = [pool.submit(_fit_start, x_start) for x_start in starts]
+            for future in as_completed(futures):
+                if collect(future.result()):
+                    stopped = True
+                    break
+        finally:
+            # after an early stop, starts already running finish in the background, unread
+            pool.shutdown(wait=not stopped, cancel_futures=True)
+
+    minima.sort(key=lambda m: m[0].error)
+    if verbose:
+        for i, (result, count) in enumerate(minima):
+            print("==> fit3omega: minimum {}: error {:.6e}, reached from {} start(s)\n    {}"
+                  .format(i, result.error, count,
+                          ", ".join("{} = {:.4e}".format(k, v)
+                                    for k, v in result.parameters.items())))
+    return [m[0] for m in minima]
+
+
+def _same_minimum(x1: np.ndarray, x2: np.ndarray, xtol: float) -> bool:
+    return bool(np.all(np.abs(x1 - x2) <= xtol * np.maximum(np.abs(x1), np.abs(x2))))
+
+
+def _init_worker(sample: SampleParameters, data: Data, settings: Dict) -> None:
+    """build the fitter that the starts of this process reuse"""
+    from fit3omega.fit import Fit3omega
+    global _FITTER, _SETTINGS
+    _FITTER = Fit3omega(sample.copy(),
+                        data.copy(),
+                        model=settings["model"],
+                        boundary_type=settings["boundary_type"])
+    _FITTER.ignore_imag_err = settings["ignore_imag_err"]
+    _FITTER.quad_tol = settings["quad_tol"]
+    _FITTER.interp_tol = settings["interp_tol"]
+    _SETTINGS = settings
+
+
+def _fit_start(x_start: np.ndarray):
+    """one local fit from `x_start`; None if it failed"""
+    try:
+        _FITTER.fit(x0=x_start, bounds=_SETTINGS["bounds"], covariance=False,
+                    **_SETTINGS["fit_kwargs"])
+    except Exception:
+        return None
+    return _FITTER.result
@@ -0,0 +1,228 @@
+"""
+A pure NumPy implementation of the Olson, Graham, and Chen integral (Ref. 4)
+
+This mirrors the `Integrator` type in the `integrate` C-extension. It is used when
+the extension is not available, and serves as a reference for checking it. Each
+call evaluates the integrand on the full (ω x χ) grid at once.
+"""
+from typing import Sequence, Tuple, List
+
+import numpy as np
+
+N_XPTS = 200  # number of χ sample points, as in the C-extension
+
+_A = 2.0 / np.pi  # 2x because integrand is symmetric in chi [-MAX,MAX]
+
+# evaluation counts, as returned by `integrate.Integrator.counters`
+COUNTER_NAMES = ("integral_calls", "batch_calls", "batch_samples", "jacobian_calls",
+                 "adaptive_calls", "omega_integrals", "integrand_evals", "fixed_refreshes")
+
+
+def max_threads() -> int:
+    """the NumPy integrator is single-threaded"""
+    return 1
+
+
+class OGC_NotSetError(Exception):
+    """raised when integrating before calling `ogc_set`"""
+
+
+class Integrator:
+    """evaluates OGC Eq. (4) and its Jacobian with NumPy array operations"""
+
+    def __init__(self):
+        self._is_set = False
+        self._omegas = None
+        self._chis = None
+        self._weights = None
+        self._half_width = None
+        self._n_layers = None
+        self._param_ids = None
+        self._counters = dict.fromkeys(COUNTER_NAMES, 0)
+
+    def counters(self) -> dict:
+        """dict of evaluation counts since creation or `reset_counters`"""
+        return dict(self._counters)
+
+    def reset_counters(self) -> None:
+        """sets the evaluation counts to zero"""
+        self._counters = dict.fromkeys(COUNTER_NAMES, 0)
+
+    def set_threads(self, n_threads: int):
+        """accepted for compatibility with `integrate.Integrator`; always runs on one thread"""
+        if n_threads < 0:
+            raise ValueError("number of threads must be non-negative")
+
+    def ogc_set(self,
+                omegas: np.ndarray,
+                param_ids: Sequence[Tuple[int, int]],
+                half_width: float,
+                chi_i: float,
+                chi_f: float,
+                n_layers: int) -> None:
+        """mandatory initializer method"""
+        if n_layers <= 0:
+            raise ValueError("invalid number of sample layers")
+        omegas = np.array(omegas, dtype=float)
+        if omegas.ndim != 1 or len(omegas) == 0:
+            raise ValueError("invalid omegas array")
+        for i_param, i_layer in param_ids:
+            if not (0 <= i_param <= 3 and 0 <= i_layer < n_layers):
+                raise ValueError("encountered invalid parameter ID")
+
+        chis = chi_i * (chi_f / chi_i)**(np.arange(N_XPTS) / (N_XPTS - 1))
+        dx = np.diff(chis)
+        trapz_weights = np.zeros(N_XPTS)
+        trapz_weights[:-1] += dx / 2.
+        trapz_weights[1:] += dx / 2.
+
+        self._omegas = omegas[:, None]
+        self._chis = chis[None, :]
+        self._weights = _A * (np.sin(chis) / chis)**2 * trapz_weights
+        self._half_width = float(half_width)
+        self._n_layers = int(n_layers)
+        self._param_ids = [(int(p), int(q)) for p, q in param_ids]
+        self._is_set = True
+
+    def ogc_integral(self,
+                     ds: Sequence[float],
+                     kys: Sequence[float],
+                     ratio_xys: Sequence[float],
+                     Cvs: Sequence[float],
+                     Rcs: Sequence[float],
+                     *,
+                     out: np.ndarray = None) -> np.ndarray:
+        """computes the entire integral in OGC Eq. (4); written into `out`, if given"""
+        result = self._integral(ds, kys, ratio_xys, Cvs, Rcs)
+        self._count(integral_calls=1)
+        return _output(result, out)
+
+    def ogc_integral_batch(self,
+                           ds: Sequence[float],
+                           kys: np.ndarray,
+                           ratio_xys: np.ndarray,
+                           Cvs: np.ndarray,
+                           Rcs: np.ndarray,
+                           *,
+                           out: np.ndarray = None) -> np.ndarray:
+        """`ogc_integral` for each row of (M x n_layers) parameter arrays; shape (M, n_omegas)"""
+        fields = [np.asarray(a, dtype=float) for a in (kys, ratio_xys, Cvs, Rcs)]
+        if any(a.ndim != 2 or a.shape != fields[0].shape for a in fields):
+            raise ValueError("array length incompatible with sample configuration")
+        result = np.empty((fields[0].shape[0], self._omegas.shape[0]), dtype=complex)
+        for m, row in enumerate(zip(*fields)):
+            result[m] = self._integral(ds, *row)
+        self._count(batch_calls=1, batch_samples=len(result), n_integrals=len(result))
+        return _output(result, out)
+
+    def ogc_jacobian(self,
+                     ds: Sequence[float],
+                     kys: Sequence[float],
+                     ratio_xys: Sequence[float],
+                     Cvs: Sequence[float],
+                     Rcs: Sequence[float],
+                     *,
+                     out: np.ndarray = None) -> np.ndarray:
+        """computes Jacobian of integral in OGC Eq. (4); shape (n_params, n_omegas)"""
+        Phis, zs = self._recursion(ds, kys, ratio_xys, Cvs, Rcs)
+        b = self._half_width
+        n = self._n_layers
+
+        # OGC Eq. (11); z_tilde (and Ξ) vanish below the substrate
+        z_tildes = [zs[i + 1] - Rcs[i + 1] for i in range(n - 1)] + [0.]
+        Xis = []
+        for i in range(n - 1):
+            kPhi_b_sq = (kys[i] * Phis[i] / b)**2
+            Xis.append((1. - kPhi_b_sq * zs[i]**2) / (1. - kPhi_b_sq * z_tildes[i]**2))
+        Xis.append(np.zeros_like(zs[-1]))
+
+        # product of Ξ_j for j < i
+        Xi_products = [np.ones_like(zs[0])]
+        for i in range(1, n):
+            Xi_products.append(Xi_products[-1] * Xis[i - 1])
+
+        jacobian = np.empty((len(self._param_ids), self._omegas.shape[0]), dtype=complex)
+        for m, (i_param, i) in enumerate(self._param_ids):
+            ky, Cv, d, P, z = kys[i], Cvs[i], ds[i], Phis[i], zs[i]
+            tail = Xis[i] * z_tildes[i] - z
+            if i_param == 3:
+                # OGC Eq. (15)
+                dz0 = -Xi_products[i]
+            elif i_param == 1:
+                # OGC Eq. (14)
+                dz0 = (Xi_products[i] * self._chis**2 / (2. * P**2)
+                       * (d / ky * (z**2 * ky**2 * P**2 / b**2 - 1.) + tail))
+            else:
+                # OGC Eq. (13); dz/dCv = (-ky / Cv^2) * dz/dα
+                alphaPhi = ky * P / Cv
+                dz0 = (-ky / Cv**2 * Xi_products[i] * -1j * self._omegas * b**2 / alphaPhi**2
+                       * (d / ky * (z**2 * ky**2 * P**2 / b**2 - 1.) + tail))
+                if i_param == 0:
+                    # OGC Eq. (12) holds α = ky/Cv fixed: dz/dky|Cv = dz/dky|α - (Cv/ky) dz/dCv
+                    dz0 = Xi_products[i] / ky * tail - Cv / ky * dz0
+            jacobian[m] = dz0 @ self._weights
+
+        self._count(jacobian_calls=1, n_integrals=0)
+        return _output(jacobian, out)
+
+    def _integral(self,
+                  ds: Sequence[float],
+                  kys: Sequence[float],
+                  ratio_xys: Sequence[float],
+                  Cvs: Sequence[float],
+                  Rcs: Sequence[float]) -> np.ndarray:
+        """OGC Eq. (4) at each ω"""
+        Phis, zs = self._recursion(ds, kys, ratio_xys, Cvs, Rcs)
+        return (zs[0] - Rcs[0]) @ self._weights
+
+    def _count(self, n_integrals: int = 1, **calls) -> None:
+        """add to the call counts, and the integrals over `n_integrals` parameter sets"""
+        for k, v in calls.items():
+            self._counters[k] += v
+        n_omegas = self._omegas.shape[0]
+        self._counters["omega_integrals"] += n_integrals * n_omegas
+        self._counters["integrand_evals"] += max(n_integrals, 1) * n_omegas * N_XPTS
+
+    def _recursion(self,
+                   ds: Sequence[float],
+                   kys: Sequence[float],
+                   ratio_xys: Sequence[float],
+                   Cvs: Sequence[float],
+                   Rcs: Sequence[float]) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """OGC Eqs. (5) and (6) for every layer on the (ω x χ) grid"""
+        if not self._is_set:
+            raise OGC_NotSetError("OGC_Set method has not been called yet")
+        n = self._n_layers
+        if len(ds) != n:
+            raise ValueError("array length incompatible with sample configuration")
+
+        b = self._half_width
+        chis_sq = self._chis**2
+        i_2b2_omegas = 2j * b**2 * self._omegas
+
+        # OGC Eq. (6)
+        Phis = [np.sqrt(ratio_xys[i] * chis_sq + i_2b2_omegas * Cvs[i] / kys[i])
+                for i in range(n)]
+
+        # OGC Eq. (5); from the substrate up
+        zs = [None] * n
+        zs[-1] = -b / (kys[-1] * Phis[-1])
+        for i in range(n - 2, -1, -1):
+            kPhi_b = kys[i] * Phis[i] / b
+            tanh_term = np.tanh(Phis[i] * ds[i] / b)
+            z_tilde = zs[i + 1] - Rcs[i + 1]
+            zs[i] = (kPhi_b * z_tilde - tanh_term) / (kPhi_b - kPhi_b**2 * z_tilde * tanh_term)
+
+        return Phis, zs
+
+
+def _output(result: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """`result`, or `out` with `result` copied into it, as the C-extension's `out` arguments"""
+    if out is None:
+        return result
+    if (not isinstance(out, np.ndarray) or out.dtype != np.complex128 or out.shape != result.shape
+            or not out.flags.c_contiguous or not out.flags.writeable):
+        raise ValueError("'out' must be a writeable, C-contiguous complex128 array "
+                         "of the result's shape")
+    out[...] = result
+    return out
@@ -9,12 +9,13 @@ Use exponentiation instead of unit prefixes. (ex: 2e-9 [m] for 2 nm)
 """
 import copy
 import os
-import yaml
 import numpy as np
 from dataclasses import dataclass
 from typing import List, Tuple, Sequence, Dict
 from collections import OrderedDict
 
+from fit3omega import cache
+
 
 @dataclass
 class Heater:
@@ -161,16 +162,49 @@ class SampleParameters:
         """return the value of the parameter from the specified layer"""
         return self.get_layer(layer_name).__getattribute__(param_name)
 
-    def substitute(self, partial_argv: Sequence[float]) -> Tuple[List[float]]:
+    @property
+    def params(self) -> np.ndarray:
+        """
+        (len(FIELDS), n_layers) float64 array of the layer parameters, as of the latest
+        `_substitute_in_place`
+        """
+        params = getattr(self, "_params", None)
+        if (params is None
+                or params.shape != (len(self.FIELDS), len(self.layers))
+                or self._param_rows[0].base is not params):  # copies detach the rows
+            params = np.empty((len(self.FIELDS), len(self.layers)))
+            self._params = params
+            self._param_rows = tuple(params)
+        return params
+
+    def substitute(self, partial_argv: Sequence[float]) -> Tuple[np.ndarray, ...]:
         """substitute the partial argument vector into complete arguments at fit indices"""
-        complete_argv = self.argv
-        for arg, idx in zip(partial_argv, self.fit_indices):
-            i_param, i_layer = idx
-            complete_argv[i_param][i_layer] = arg
-        return complete_argv
+        return tuple(self._fill_params(np.empty((len(self.FIELDS), len(self.layers))),
+                                       partial_argv))
+
+    def _substitute_in_place(self, partial_argv: Sequence[float]) -> Tuple[np.ndarray, ...]:
+        """
+        `substitute`, into the rows of `params`
+
+        NOTE: The returned rows are overwritten by the next call; for the fit hot path.
+        """
+        self._fill_params(self.params, partial_argv)
+        return self._param_rows
+
+    def _fill_params(self, params: np.ndarray, partial_argv: Sequence[float]) -> np.ndarray:
+        """fill `params` with the layer parameters and the partial argument vector"""
+        for j, layer in enumerate(self.layers):
+            params[0, j] = layer.ky
+            params[1, j] = layer.ratio_xy
+            params[2, j] = layer.Cv
+            params[3, j] = layer.Rc
+        for arg, (i_param, i_layer) in zip(partial_argv, self.fit_indices):
+            params[i_param, i_layer] = arg
+        return params
 
     def write_state(self, filename: str) -> None:
         """write the present state as a new configuration file"""
+        import yaml
         filename = os.path.expanduser(filename)
         with open(filename, 'w') as f:
             yaml.safe_dump(self.state, f)
@@ -187,6 +221,11 @@ class ConfigFileError(Exception):
 def load_sample_parameters(config_filename: str) -> SampleParameters:
     """Read a sample configuration in YAML format into  SampleParameters instance"""
     filename = os.path.expanduser(config_filename)
+    return cache.load_object(filename, _parse_sample_parameters, "sample")
+
+
+def _parse_sample_parameters(filename: str) -> SampleParameters:
+    import yaml
     with open(filename) as f:
         d = yaml.safe_load(f)
         if type(d) is str:
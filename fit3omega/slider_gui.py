@@ -1,18 +1,50 @@
-"""the matplotlib-based real time fitting GUI is defined here"""
+"""
+the matplotlib-based real time fitting GUI is defined here
+
+Slider changes are debounced, then evaluated on a worker thread by a separate
+fitter; results for slider positions that have since changed are discarded. Fits
+run on the same thread and post their latest curve as they go. While a slider moves,
+the curve is previewed to first order, T2 + J·Δx, from the value and Jacobian of the
+last exact evaluation; the exact curve replaces it when it lands. With a canvas that
+supports blitting, updates redraw only the fitted curves, the error text, and the
+sliders over a saved background.
+"""
 import os
+import threading
 import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from typing import Tuple, Union, List
+from concurrent.futures import ThreadPoolExecutor
 from matplotlib.widgets import Slider, Button
 from math import pi as PI
 
 from fit3omega.sample import SampleParameters
 from fit3omega.data import Data
-from fit3omega.fit import Fit3omega
+from fit3omega.fit import Fit3omega, FitResult
 from fit3omega.plots import _set_mpl_defaults
 
 
+class _FitCancelled(Exception):
+    """raised inside a background fit once it is stopped"""
+
+
+class _BackgroundFitter(Fit3omega):
+    """the fitter of the worker thread; keeps the latest curve, and stops when asked"""
+
+    def __init__(self, sample: SampleParameters, data: Data):
+        super().__init__(sample, data)
+        self.stop = threading.Event()  # set to stop the present job
+        self.progress = None  # latest T2 computed
+
+    def T2_function(self, *args) -> np.ndarray:
+        if self.stop.is_set():
+            raise _FitCancelled()
+        T2 = super().T2_function(*args)
+        self.progress = T2
+        return T2
+
+
 class SliderFit(Fit3omega):
     meas_plot_kw = dict(
         markersize=5,
@@ -36,8 +68,12 @@ class SliderFit(Fit3omega):
     slider_valfmt = "%.2e"
 
     error_fmt = "error: {:<10,.6e}"
+    preview_fmt = "linearization error: {:.1e}"
     error_green_thresh = 0.01
 
+    debounce_ms = 40  # wait this long after the last slider change before evaluating
+    poll_ms = 50  # check the worker for results this often
+
     def __init__(self,
                  sample: Union[str, SampleParameters],
                  data: Union[str, Data],
@@ -55,9 +91,34 @@ class SliderFit(Fit3omega):
         self._n_sliders = 0
 
         # PLOT INITIAL STATE
-        self._refresh_dependents = True
         self._enable_heater_params = enable_heater_params
 
+        # artists that change with the sliders, and the background they are blitted onto
+        self._use_blit = False
+        self._background = None
+        self._meas_lines = ()
+        self._fit_lines = ()
+        self._shading = ()
+        self._error_text = None
+        self._preview_text = None
+
+        # first-order previews: (x, T2, jacobian) at the last exact evaluation, and the
+        # preview on display until the exact curve for its slider positions lands
+        self._preview_ref = None
+        self._preview = None
+
+        # background evaluation: one worker thread with its own fitter; a job is stale
+        # once `_generation` has moved on from the value it was submitted with
+        self._executor = None
+        self._worker = None
+        self._job = None  # (generation, kind, future, stop event)
+        self._generation = 0
+        self._heater_changed = False
+        self._shown_progress = None
+        self._syncing_sliders = False
+        self._debounce_timer = None
+        self._poll_timer = None
+
     def show(self):
         """display the slider plot"""
         self._plot_initial_state(self._enable_heater_params)
@@ -65,6 +126,7 @@ class SliderFit(Fit3omega):
     def _create_axes(self):
         self.fig, self.ax = plt.subplots(figsize=(8, 8))
         self.fig.subplots_adjust(bottom=.5, top=0.95)
+        self._use_blit = self.fig.canvas.supports_blit
         self.ax.set_xscale("log")
         self.ax.set_ylabel(r"$\widebar{T}_{2\omega}$")
         self.ax.set_xlabel(r"$\omega$ [Hz]")
@@ -77,23 +139,31 @@ class SliderFit(Fit3omega):
         fcy = u'#550B14'
 
         # measured data
-        self.ax.plot(X, self.T2.x, color=cx, **self.meas_plot_kw)
-        self.ax.plot(X, self.T2.y, color=cy, **self.meas_plot_kw)
+        self._meas_lines = (self.ax.plot(X, self.T2.x, color=cx, **self.meas_plot_kw)[0],
+                            self.ax.plot(X, self.T2.y, color=cy, **self.meas_plot_kw)[0])
 
         # shade to show error ranges
-        self.ax.fill_between(X,
-                             self.T2.x * (1. - self.T2.xerr),
-                             self.T2.x * (1. + self.T2.xerr),
-                             alpha=0.2, color=cx)
-        self.ax.fill_between(X,
-                             self.T2.y * (1. - self.T2.yerr),
-                             self.T2.y * (1. + self.T2.yerr),
-                             alpha=0.2, color=cy)
+        self._shade_errors()
 
         # fitted data curve (initial values)
         fit = self.T2_function(*self.sample.argv)
-        self.ax.plot(X, fit.real, color=fcx, **self.fit_plot_kw)
-        self.ax.plot(X, fit.imag, color=fcy, **self.fit_plot_kw)
+        self._fit_lines = (
+            self.ax.plot(X, fit.real, color=fcx, animated=self._use_blit, **self.fit_plot_kw)[0],
+            self.ax.plot(X, fit.imag, color=fcy, animated=self._use_blit, **self.fit_plot_kw)[0]
+        )
+
+    def _shade_errors(self):
+        cx = 'blue'
+        cy = 'red'
+        X = self.data.omegas / 2. / PI
+        self._shading = (self.ax.fill_between(X,
+                                              self.T2.x * (1. - self.T2.xerr),
+                                              self.T2.x * (1. + self.T2.xerr),
+                                              alpha=0.2, color=cx),
+                         self.ax.fill_between(X,
+                                              self.T2.y * (1. - self.T2.yerr),
+                                              self.T2.y * (1. + self.T2.yerr),
+                                              alpha=0.2, color=cy))
 
     def _create_sliders(self, enable_heater_params):
         # prepare the fit parameters sliders
@@ -108,6 +178,7 @@ class SliderFit(Fit3omega):
                 valfmt=self.slider_valfmt
             )
             # register the new slider
+            self._register_slider(parameter_slider)
             self.sample_sliders[name_string] = parameter_slider
             self.sample_sliders[name_string].on_changed(self._apply_sample_sliders)
             self._n_sliders += 1
@@ -133,9 +204,23 @@ class SliderFit(Fit3omega):
                     valinit=v,
                     valfmt=self.slider_valfmt
                 )
+                self._register_slider(self.heater_sliders[k])
                 self.heater_sliders[k].on_changed(self._apply_heater_sliders)
                 self._n_sliders += 1
 
+    def _register_slider(self, slider: Slider) -> None:
+        """draw the slider with the other blitted artists, instead of redrawing the figure"""
+        if self._use_blit:
+            slider.drawon = False
+            for artist in self._slider_artists(slider):
+                artist.set_animated(True)
+
+    @staticmethod
+    def _slider_artists(slider: Slider) -> list:
+        """the parts of a slider that move with its value"""
+        return [a for a in (slider.poly, getattr(slider, "_handle", None), slider.valtext)
+                if a is not None]
+
     def _create_buttons(self):
         # sloppy reset button creation
         reset_button_dims = self._get_slider_dims()
@@ -168,8 +253,13 @@ class SliderFit(Fit3omega):
         self.buttons["Save"].on_clicked(self._save_sample_state)
 
         err0 = self.objective_func(self.sample.x)
-        self.ax.text(0.0, 1.025, self.error_fmt.format(err0), transform=self.ax.transAxes,
-                     fontsize=10, color=self._get_error_color(err0), fontweight="bold")
+        self._error_text = self.ax.text(0.0, 1.025, self.error_fmt.format(err0),
+                                        transform=self.ax.transAxes, fontsize=10,
+                                        color=self._get_error_color(err0), fontweight="bold",
+                                        animated=self._use_blit)
+        self._preview_text = self.ax.text(1.0, 1.025, "", transform=self.ax.transAxes,
+                                          fontsize=10, color="0.4", ha="right",
+                                          animated=self._use_blit)
         plt.show()
 
     def _plot_initial_state(self, enable_heater_params: bool) -> None:
@@ -178,24 +268,69 @@ class SliderFit(Fit3omega):
         self._create_axes()
         self._plot_markers_and_curves()
         self._create_sliders(enable_heater_params)
+        self._create_background_worker()
         self._create_buttons()
 
+    def _create_background_worker(self) -> None:
+        """the worker thread, its fitter, and the timers that feed it and collect its results"""
+        self._worker = _BackgroundFitter(self.sample.copy(), self.data.copy())
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        canvas = self.fig.canvas
+        self._debounce_timer = canvas.new_timer(interval=self.debounce_ms)
+        self._debounce_timer.single_shot = True
+        self._debounce_timer.add_callback(self._evaluate_in_background)
+        self._poll_timer = canvas.new_timer(interval=self.poll_ms)
+        self._poll_timer.add_callback(self._poll_worker)
+
+        canvas.mpl_connect("draw_event", self._on_draw)
+        canvas.mpl_connect("close_event", self._on_close)
+
+        # the first exact evaluation, for previews from the starting position
+        self._evaluate_in_background()
+
     def _run_fit_and_update(self, _) -> None:
-        """fit from current position and update the fit information with the result"""
-        self.fit()
-        x = self.result.x
-
-        # set sample parameters to fitted values
-        i = 0
-        for k in self.sample.parameters.keys():
-            param_name, layer_name = k.split('.')
-            self.sample.modify_layer(layer_name, param_name, x[i])
-            self.sample_sliders[k].set_val(x[i])
-            i += 1
+        """fit from current position in the background; clicking again stops the fit"""
+        if self._job is not None and self._job[1] == "fit":
+            self._cancel_job()
+            self._set_fit_label("Fit")
+            return
+        self._cancel_job()
+        self._shown_progress = None
+        self._submit("fit", self._fit_job, self.sample.copy())
+        self._set_fit_label("Stop")
+        self._error_text.set_text("fitting ...")
+        self._blit()
+
+    def _set_fit_label(self, label: str) -> None:
+        self.buttons["Fit"].label.set_text(label)
+        self.fig.canvas.draw_idle()
+
+    def _apply_fit(self,
+                   fit_result: FitResult,
+                   T2: np.ndarray,
+                   err: float,
+                   jacobian: Union[np.ndarray, None]) -> None:
+        """move the sliders to the fitted values and show the fitted curve"""
+        x = fit_result.x
+        self._syncing_sliders = True
+        try:
+            for i, k in enumerate(self.sample.parameters.keys()):
+                param_name, layer_name = k.split('.')
+                self.sample.modify_layer(layer_name, param_name, x[i])
+                self.sample_sliders[k].set_val(x[i])
+        finally:
+            self._syncing_sliders = False
+        self._result = fit_result
+        self._previous_sample = self.sample.copy()
+        self._set_preview_ref(x, T2, jacobian)
+        self._preview = None
+        self._preview_text.set_text("")
 
         # update the graph to show fitted curve
         print(self.result)
-        self._update_graph()
+        self._set_fit_label("Fit")
+        self._update_graph(T2, err)
 
     def _save_sample_state(self, _) -> None:
         """save the sample state into a new config file"""
@@ -211,17 +346,19 @@ class SliderFit(Fit3omega):
 
     def _apply_sample_sliders(self, _) -> None:
         """change sample parameters based on slider values"""
+        if self._syncing_sliders:
+            return
         for label, slider in self.sample_sliders.items():
             param_name, layer_name = label.split('.')
             self.sample.modify_layer(layer_name, param_name, slider.val)
-        self._update_graph()
+        self._show_preview()
+        self._request_update()
 
     def _apply_heater_sliders(self, _) -> None:
         """change heater parameters based on slider values"""
         for label, slider in self.heater_sliders.items():
             self.sample.modify_heater(label, slider.val)
-        self._update_graph()
-        self._update_error_shading()
+        self._request_update(heater_changed=True)
 
     def _reset_sliders(self, _) -> None:
         """reset sliders and calculation parameters to starting positions"""
@@ -241,6 +378,7 @@ class SliderFit(Fit3omega):
             self._x_scale = "log(x)"
 
         self.buttons["x-scale"].label.set_text(self._x_scale)
+        self.fig.canvas.draw_idle()
 
     def _get_slider_dims(self) -> List[float]:
         """returns a location for the slider on the canvas"""
@@ -262,34 +400,185 @@ class SliderFit(Fit3omega):
         else:
             return 0.0, 0.0, 0.0
 
-    def _get_fitline_data(self) -> Tuple[np.ndarray, np.ndarray, float]:
-        """returns current T_real, T_imag, and the error vs. measured data"""
-        T_func_vals = self.fitted_T2
-        err = self.objective_func(self.sample.x)
-        return T_func_vals.real, T_func_vals.imag, err
-
-    def _update_graph(self):
-        fit = self._get_fitline_data()
-        self.ax.lines[0].set_ydata(self.T2.x)
-        self.ax.lines[1].set_ydata(self.T2.y)
-        self.ax.lines[2].set_ydata(fit[0])
-        self.ax.lines[3].set_ydata(fit[1])
-        self.ax.texts[0].set_text(self.error_fmt.format(fit[2]))
-        self.ax.texts[0].set_color(self._get_error_color(fit[2]))
-        self.fig.canvas.draw_idle()
-
-    def _update_error_shading(self):
-        # re-shade to show error ranges
-        self.ax.collections = []
-        X = self.data.omegas / 2. / PI
-        cx = 'blue'
-        cy = 'red'
-        self.ax.fill_between(X,
-                             self.T2.x * (1. - self.T2.xerr),
-                             self.T2.x * (1. + self.T2.xerr),
-                             alpha=0.2, color=cx)
-        self.ax.fill_between(X,
-                             self.T2.y * (1. - self.T2.yerr),
-                             self.T2.y * (1. + self.T2.yerr),
-                             alpha=0.2, color=cy)
-        self.fig.canvas.draw_idle()
+    def _request_update(self, heater_changed: bool = False) -> None:
+        """
+        Mark any result in progress as stale and (re)start the debounce timer; the
+        sliders are evaluated once they have been still for `debounce_ms`.
+        """
+        self._generation += 1
+        self._heater_changed |= heater_changed
+        if self._job is not None and self._job[1] == "fit":
+            self._cancel_job()
+            self._set_fit_label("Fit")
+        self._blit()  # move the sliders now; the curves follow when evaluated
+        self._debounce_timer.stop()
+        self._debounce_timer.start()
+
+    def _evaluate_in_background(self) -> None:
+        """evaluate the present sample parameters on the worker thread"""
+        self._cancel_job()
+        self._submit("evaluate", self._evaluate_job, self.sample.copy(), self._heater_changed)
+        self._heater_changed = False
+
+    def _submit(self, kind: str, job, *args) -> None:
+        stop = threading.Event()
+        self._job = (self._generation, kind, self._executor.submit(job, stop, *args), stop)
+        self._poll_timer.start()
+
+    def _cancel_job(self) -> None:
+        """drop the present job: cancel it if it has not started, and stop it if it is a fit"""
+        if self._job is not None:
+            _, _, future, stop = self._job
+            future.cancel()
+            stop.set()
+            self._job = None
+
+    def _evaluate_job(self, stop: threading.Event, sample: SampleParameters,
+                      heater_changed: bool):
+        """
+        (on the worker thread) the fitted curve, its error and Jacobian, and the measured T2
+        if it changed
+        """
+        worker = self._prepare_worker(stop, sample)
+        T2 = worker.fitted_T2
+        err = self._mse(T2, worker.T2)
+        return T2, err, self._jacobian(worker, sample.x), worker.T2 if heater_changed else None
+
+    def _fit_job(self, stop: threading.Event, sample: SampleParameters):
+        """(on the worker thread) a fit from `sample`, with its curve, error and Jacobian"""
+        worker = self._prepare_worker(stop, sample)
+        worker.fit()
+        x = worker.result.x
+        T2 = worker.T2_function(*worker.sample.substitute(x))
+        return worker.result, T2, self._mse(T2, worker.T2), self._jacobian(worker, x)
+
+    @staticmethod
+    def _jacobian(worker: _BackgroundFitter, x: np.ndarray) -> Union[np.ndarray, None]:
+        """T2 derivatives for previews; None where there are no analytic derivatives"""
+        if worker.model != "ogc":
+            return None
+        return worker.T2_jacobian(*worker.sample.substitute(x))
+
+    def _prepare_worker(self, stop: threading.Event, sample: SampleParameters) -> _BackgroundFitter:
+        worker = self._worker
+        worker.stop = stop
+        worker.progress = None
+        worker.sample = sample
+        worker.ignore_imag_err = self.ignore_imag_err
+        worker.quad_tol = self.quad_tol
+        worker.interp_tol = self.interp_tol
+        return worker
+
+    @staticmethod
+    def _mse(T2: np.ndarray, T2_measured) -> float:
+        return float(np.sum((T2.real - T2_measured.x)**2 + (T2.imag - T2_measured.y)**2)
+                     / len(T2))
+
+    def _poll_worker(self) -> None:
+        """show the result of the present job once it is done, or the progress of a fit"""
+        if self._job is None:
+            self._poll_timer.stop()
+            return
+        generation, kind, future, _ = self._job
+        if not future.done():
+            progress = self._worker.progress
+            if kind == "fit" and progress is not None and progress is not self._shown_progress:
+                self._shown_progress = progress
+                self._update_graph(progress, None)
+            return
+
+        self._job = None
+        self._poll_timer.stop()
+        if future.cancelled() or generation != self._generation:
+            return
+        try:
+            result = future.result()
+        except _FitCancelled:
+            return
+        except Exception as e:
+            print("==> fit3omega: %s failed (%s: %s)" % (kind, type(e).__name__, e))
+            if kind == "fit":
+                self._set_fit_label("Fit")
+            return
+
+        if kind == "fit":
+            self._apply_fit(*result)
+            return
+        T2, err, jacobian, T2_measured = result
+        if T2_measured is not None:
+            self._update_measured(T2_measured)
+        if self._preview is not None:
+            # the preview was for the slider positions just evaluated
+            lin_err = np.max(np.abs(self._preview - T2)) / np.max(np.abs(T2))
+            self._preview_text.set_text(self.preview_fmt.format(lin_err))
+            self._preview = None
+        self._set_preview_ref(self.sample.x, T2, jacobian)
+        self._update_graph(T2, err)
+
+    def _set_preview_ref(self, x: np.ndarray, T2: np.ndarray, jacobian: np.ndarray) -> None:
+        self._preview_ref = None if jacobian is None else (np.array(x), T2, jacobian)
+
+    def _show_preview(self) -> None:
+        """set the fitted curve to its first-order estimate at the present slider positions"""
+        if self._preview_ref is None:
+            return
+        x_ref, T2_ref, jacobian = self._preview_ref
+        self._preview = T2_ref + (self.sample.x - x_ref) @ jacobian
+        err = self._mse(self._preview, self.T2)
+        self._fit_lines[0].set_ydata(self._preview.real)
+        self._fit_lines[1].set_ydata(self._preview.imag)
+        self._error_text.set_text(self.error_fmt.format(err))
+        self._error_text.set_color(self._get_error_color(err))
+        self._preview_text.set_text("linear preview")
+
+    def _update_graph(self, T2: np.ndarray, err: Union[float, None]) -> None:
+        """show a fitted curve, and its error (if known)"""
+        self._fit_lines[0].set_ydata(T2.real)
+        self._fit_lines[1].set_ydata(T2.imag)
+        if err is not None:
+            self._error_text.set_text(self.error_fmt.format(err))
+            self._error_text.set_color(self._get_error_color(err))
+        self._blit()
+
+    def _update_measured(self, T2_measured) -> None:
+        """show the measured data and error shading after a change of heater parameters"""
+        self._meas_lines[0].set_ydata(T2_measured.x)
+        self._meas_lines[1].set_ydata(T2_measured.y)
+        for collection in self._shading:
+            collection.remove()
+        self._shade_errors()
+        self.fig.canvas.draw_idle()  # the background changed
+
+    def _animated_artists(self) -> list:
+        artists = list(self._fit_lines)
+        if self._error_text is not None:
+            artists.extend((self._error_text, self._preview_text))
+        for slider in list(self.sample_sliders.values()) + list(self.heater_sliders.values()):
+            artists.extend(self._slider_artists(slider))
+        return artists
+
+    def _on_draw(self, _) -> None:
+        """save the background after a full redraw, then draw the blitted artists over it"""
+        if not self._use_blit:
+            return
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._animated_artists():
+            self.fig.draw_artist(artist)
+
+    def _blit(self) -> None:
+        """redraw only the blitted artists; a full redraw if there is no background yet"""
+        canvas = self.fig.canvas
+        if not self._use_blit or self._background is None:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self._background)
+        for artist in self._animated_artists():
+            self.fig.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+
+    def _on_close(self, _) -> None:
+        """stop the worker when the window closes"""
+        self._cancel_job()
+        self._debounce_timer.stop()
+        self._poll_timer.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,288 @@
+"""
+A precomputed table of the model over a log-spaced grid of the fit parameters.
+
+    python -m fit3omega.surrogate sample.txt data.csv -out table.npz [-points 33]
+
+The table holds T2 per unit heating power, -T2 / |P|, at each measured ω. This
+depends only on the sample geometry, the parameters that are not fitted and the
+frequencies, so one table serves every dataset of the same stack and sweep.
+Between grid points it is interpolated by 4-point Lagrange cubics along each log
+axis, which also gives the derivatives for fits with `jac`. See
+`Fit3omega.fit_surrogate`.
+"""
+import os
+import time
+import argparse
+from typing import List, Union, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from scipy.optimize import Bounds
+
+
+class SurrogateMismatchError(ValueError):
+    """raised when a table was built for a different sample, model or frequencies"""
+
+
+class Surrogate:
+    """T2 per unit heating power, tabulated over a log-spaced grid of the fit parameters"""
+
+    def __init__(self,
+                 table: np.ndarray,
+                 lower: np.ndarray,
+                 upper: np.ndarray,
+                 omegas: np.ndarray,
+                 fit_indices: List[List[int]],
+                 params: np.ndarray,
+                 geometry: np.ndarray,
+                 model: str):
+        """
+        :param table: (n_points, ..., n_points, n_omegas) complex array, one axis per fit parameter
+        :param lower: lowest value of each fit parameter
+        :param upper: highest value of each fit parameter
+        :param omegas: frequencies of the table
+        :param fit_indices: (parameter, layer) of each fit parameter
+        :param params: (4, n_layers) parameters of the stack; only the fixed ones matter
+        :param geometry: heater width and length, then the layer heights
+        :param model: thermal model of the table
+        """
+        self.table = np.asarray(table)
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.omegas = np.asarray(omegas, dtype=float)
+        self.fit_indices = [list(idx) for idx in fit_indices]
+        self.params = np.asarray(params, dtype=float)
+        self.geometry = np.asarray(geometry, dtype=float)
+        self.model = str(model)
+
+        n_params = len(self.fit_indices)
+        if self.table.ndim != n_params + 1 or min(self.table.shape[:-1]) < 4:
+            raise ValueError("the table needs at least 4 points along each fit parameter")
+        self._log_lower = np.log(self.lower)
+        self._steps = (np.log(self.upper) - self._log_lower) / (np.array(self.shape) - 1)
+        self._fixed = np.ones(self.params.shape, dtype=bool)
+        for i_param, i_layer in self.fit_indices:
+            self._fixed[i_param, i_layer] = False
+
+    @property
+    def shape(self) -> tuple:
+        """number of grid points along each fit parameter"""
+        return self.table.shape[:-1]
+
+    @property
+    def bounds(self) -> 'Bounds':
+        """the extent of the grid, as bounds on the fit arguments"""
+        from scipy.optimize import Bounds
+        return Bounds(self.lower, self.upper, keep_feasible=True)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """-T2 / |P| at each ω, for the fit arguments `x`"""
+        block, weights, _ = self._stencil(x)
+        for w in weights:
+            block = np.tensordot(w, block, axes=(0, 0))
+        return block
+
+    def jacobian(self, x: np.ndarray) -> np.ndarray:
+        """derivatives of -T2 / |P| w.r.t. each fit argument; (n_params, n_omegas)"""
+        block, weights, d_weights = self._stencil(x)
+        jacobian = np.empty((len(weights), self.table.shape[-1]), dtype=self.table.dtype)
+        for k in range(len(weights)):
+            b = block
+            for i, w in enumerate(weights):
+                b = np.tensordot(d_weights[i] if i == k else w, b, axes=(0, 0))
+            jacobian[k] = b
+        return jacobian
+
+    def _stencil(self, x: np.ndarray):
+        """the 4 x ... x 4 block of the table about `x`, and the weights along each axis"""
+        u = (np.log(np.asarray(x, dtype=float)) - self._log_lower) / self._steps
+        starts = np.clip(np.floor(u).astype(int) - 1, 0, np.array(self.shape) - 4)
+        block = self.table[tuple(slice(s, s + 4) for s in starts)]
+        weights, d_weights = [], []
+        for t, x_i, step in zip(u - starts - 1, x, self._steps):
+            w, dw = _cubic_weights(t)
+            weights.append(w)
+            d_weights.append(dw / (x_i * step))  # du/dx = 1 / (x * step)
+        return block, weights, d_weights
+
+    def contains(self, x: np.ndarray) -> bool:
+        """whether the fit arguments `x` are within the grid"""
+        return bool(np.all(x >= self.lower) and np.all(x <= self.upper))
+
+    def arguments(self, params: np.ndarray) -> Union[np.ndarray, None]:
+        """the fit arguments of a (4, n_layers) parameter array; None if it is off the table"""
+        if not np.array_equal(params[self._fixed], self.params[self._fixed]):
+            return None
+        x = np.array([params[i_param, i_layer] for i_param, i_layer in self.fit_indices])
+        return x if self.contains(x) else None
+
+    def check(self, ft) -> None:
+        """raise `SurrogateMismatchError` unless the table was built for the fitter's setup"""
+        sample = ft.sample
+        if ft.model != self.model:
+            raise SurrogateMismatchError(f"table built for the '{self.model}' model")
+        if [list(idx) for idx in sample.fit_indices] != self.fit_indices:
+            raise SurrogateMismatchError("table built for different fit parameters")
+        if not np.array_equal(_geometry(sample), self.geometry):
+            raise SurrogateMismatchError("table built for a different heater or layer heights")
+        params = np.array(sample.argv, dtype=float)
+        if not np.array_equal(params[self._fixed], self.params[self._fixed]):
+            raise SurrogateMismatchError("table built for different fixed parameters")
+        omegas = ft.data.omegas
+        if len(omegas) != len(self.omegas) or not np.allclose(omegas, self.omegas, rtol=1e-12):
+            raise SurrogateMismatchError("table built for different frequencies")
+
+    def save(self, filename: str) -> None:
+        """write the table to a compressed .npz file"""
+        np.savez_compressed(os.path.expanduser(filename),
+                            table=self.table,
+                            lower=self.lower,
+                            upper=self.upper,
+                            omegas=self.omegas,
+                            fit_indices=np.array(self.fit_indices, dtype=int),
+                            params=self.params,
+                            geometry=self.geometry,
+                            model=np.array(self.model))
+
+    @classmethod
+    def load(cls, filename: str) -> 'Surrogate':
+        """read a table written by `save`"""
+        with np.load(os.path.expanduser(filename)) as f:
+            return cls(f["table"],
+                       f["lower"],
+                       f["upper"],
+                       f["omegas"],
+                       f["fit_indices"].tolist(),
+                       f["params"],
+                       f["geometry"],
+                       str(f["model"]))
+
+
+def build_surrogate(ft,
+                    n_points: int = 33,
+                    min_frac: float = 0.1,
+                    max_frac: float = 10.,
+                    chunk_size: int = 256,
+                    verbose: bool = False) -> Surrogate:
+    """
+    Tabulate the model of a fitter over a log-spaced grid about its sample parameters.
+
+    :param ft: a Fit3omega instance
+    :param n_points: number of grid points along each fit parameter
+    :param min_frac: lowest grid value, as a fraction of the present value
+    :param max_frac: highest grid value, as a multiple of the present value
+    :param chunk_size: number of grid points evaluated per batch
+    :param verbose: print progress as chunks finish
+    """
+    x0 = np.asarray(ft.sample.x, dtype=float)
+    lower, upper = x0 * min_frac, x0 * max_frac
+    axes = [np.exp(np.linspace(lo, hi, n_points)) for lo, hi in zip(np.log(lower), np.log(upper))]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(x0))
+
+    power = ft.power.norm
+    table = np.empty((len(grid), len(power)), dtype=complex)
+    t0 = time.perf_counter()
+    for start in range(0, len(grid), chunk_size):
+        xs = grid[start:start + chunk_size]
+        if ft.model == "ogc":
+            table[start:start + len(xs)] = ft.T2_batch(xs)
+        else:
+            for i, x in enumerate(xs):
+                table[start + i] = ft.T2_function(*ft.sample.substitute(x))
+        if verbose:
+            print("==> fit3omega: surrogate, {}/{} points ({:.1f} s)"
+                  .format(min(start + chunk_size, len(grid)), len(grid), time.perf_counter() - t0))
+    table /= -power
+
+    return Surrogate(table.reshape((n_points,) * len(x0) + (len(power),)),
+                     lower,
+                     upper,
+                     ft.data.omegas,
+                     ft.sample.fit_indices,
+                     np.array(ft.sample.argv, dtype=float),
+                     _geometry(ft.sample),
+                     ft.model)
+
+
+def _geometry(sample) -> np.ndarray:
+    """heater width and length, then the layer heights"""
+    return np.array([sample.heater.width, sample.heater.length]
+                    + [layer.height for layer in sample.layers])
+
+
+def _cubic_weights(t: float):
+    """4-point Lagrange weights (nodes -1, 0, 1, 2) at t, and their derivatives"""
+    w = np.array([-t * (t - 1.) * (t - 2.) / 6.,
+                  (t + 1.) * (t - 1.) * (t - 2.) / 2.,
+                  -(t + 1.) * t * (t - 2.) / 2.,
+                  (t + 1.) * t * (t - 1.) / 6.])
+    dw = np.array([-(3. * t**2 - 6. * t + 2.) / 6.,
+                   (3. * t**2 - 4. * t - 1.) / 2.,
+                   -(3. * t**2 - 2. * t - 2.) / 2.,
+                   (3. * t**2 - 1.) / 6.])
+    return w, dw
+
+
+if __name__ == "__main__":
+    from fit3omega import cache
+    from fit3omega.fit import Fit3omega
+
+    parser = argparse.ArgumentParser(description="Precompute a surrogate table for fast fits.")
+
+    parser.add_argument("sample_file",
+                        help="path to YAML formatted sample configuration file.",
+                        type=str)
+    parser.add_argument("data_file",
+                        help="path to CSV file with the frequency sweep of the table.",
+                        type=str)
+
+    parser.add_argument("-out",
+                        help="output table (.npz).",
+                        type=str,
+                        default="fit3omega_surrogate.npz")
+
+    parser.add_argument("-points",
+                        help="number of grid points along each fit parameter.",
+                        type=int,
+                        default=33)
+
+    parser.add_argument("-range",
+                        help="grid from a fraction to a multiple of the sample parameters.",
+                        nargs=2,
+                        type=float,
+                        default=[0.1, 10.])
+
+    parser.add_argument("-model",
+                        help="thermal model: Olson-Graham-Chen or Borca-Tasciuc.",
+                        choices=Fit3omega.MODELS,
+                        default="ogc")
+
+    parser.add_argument("-threads",
+                        help="integrator threads (0 for all available).",
+                        type=int,
+                        default=0)
+
+    parser.add_argument("-data_lims",
+                        help="limit the data range by taking data[a:b]",
+                        nargs=2,
+                        type=int,
+                        default=None)
+
+    parser.add_argument("-cache",
+                        help="directory for caching parsed input files between runs "
+                             "(default: $%s, if set)." % cache.ENV_VAR,
+                        type=str,
+                        default=None)
+
+    args = parser.parse_args()
+    if args.cache:
+        os.environ[cache.ENV_VAR] = args.cache
+
+    fitter = Fit3omega(args.sample_file, args.data_file, model=args.model)
+    if args.data_lims:
+        fitter.data.set_limits(*args.data_lims)
+    fitter.n_threads = args.threads
+    surrogate = build_surrogate(fitter, args.points, *args.range, verbose=True)
+    surrogate.save(args.out)
+    print("==> fit3omega: saved surrogate table\n%s" % os.path.abspath(args.out))
@@ -0,0 +1,151 @@
+"""
+Monte Carlo estimates of the uncertainty in fitted parameters.
+
+Each draw redraws the measured voltages from their error data (see `Data.resampled`)
+and the shunt resistance and heater dR/dT from their relative errors, then refits,
+starting from the nominal fit. Draws are split into chunks that run across a pool of
+processes. Each chunk has its own seed, so the draws do not depend on the number of
+workers.
+"""
+import time
+from typing import Dict
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fit3omega.data import Data
+from fit3omega.sample import SampleParameters
+
+# the fitter of a worker process, and the settings for its fits; see `_init_worker`
+_FITTER = None
+_SETTINGS = None
+
+
+def perturbed_sample(sample: SampleParameters, rng: np.random.Generator) -> SampleParameters:
+    """a copy with the shunt resistance and heater dR/dT redrawn from their relative errors"""
+    new = sample.copy()
+    new.shunt.R = sample.shunt.R * (1. + sample.shunt.err * rng.standard_normal())
+    new.heater.dRdT = sample.heater.dRdT * (1. + sample.heater.dRdT_err * rng.standard_normal())
+    return new
+
+
+def monte_carlo(ft,
+                n_draws: int = 1000,
+                max_workers: int = None,
+                seed: int = None,
+                chunk_size: int = 20,
+                tol: float = 1e-12,
+                jac: bool = None,
+                engine: str = None,
+                verbose: bool = False) -> np.ndarray:
+    """
+    Refit resampled copies of the data and sample parameters of a fitter.
+
+    :param ft: a Fit3omega instance; it is fitted first if it has no result
+    :param n_draws: number of resampled datasets
+    :param max_workers: number of worker processes (default: number of CPUs);
+                        1 runs every draw in this process
+    :param seed: seed for the random draws
+    :param chunk_size: number of draws sent to a worker at a time
+    :param tol: termination tolerance of each refit
+    :param jac: use analytic derivatives (default: as in the nominal fit, or whenever the
+                model allows)
+    :param engine: fit engine for the refits (default: as in the nominal fit, or
+                   "least_squares")
+    :param verbose: print progress as chunks finish
+    :return: (n_draws, n_params) array of refitted parameters; NaN rows for failed refits
+    """
+    options = (ft.result.options if ft.result is not None else None) or {}
+    if jac is None:
+        jac = options.get("jac", ft.model == "ogc")
+    if engine is None:
+        engine = options.get("engine", "least_squares")
+    if ft.result is None:
+        ft.fit(tol=tol, jac=jac, engine=engine)
+
+    settings = {
+        "model": ft.model,
+        "boundary_type": ft.boundary_type,
+        "ignore_imag_err": ft.ignore_imag_err,
+        "quad_tol": ft.quad_tol,
+        "interp_tol": ft.interp_tol,
+        "tol": tol,
+        "jac": jac,
+        "engine": engine,
+    }
+    x0 = ft.result.x
+    chunks = [min(chunk_size, n_draws - i) for i in range(0, n_draws, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    samples = np.full((n_draws, len(x0)), np.nan)
+    offsets = np.cumsum([0] + chunks[:-1])
+
+    t0 = time.perf_counter()
+    n_done = 0
+    if max_workers == 1:
+        _init_worker(ft.sample, ft.data, settings)
+        for i, (seed_i, n) in enumerate(zip(seeds, chunks)):
+            samples[offsets[i]:offsets[i] + n] = _fit_chunk(seed_i, n, x0)
+            n_done += n
+            if verbose:
+                _print_progress(n_done, n_draws, t0)
+        return samples
+
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             initializer=_init_worker,
+                             initargs=(ft.sample, ft.data, settings)) as pool:
+        futures = {pool.submit(_fit_chunk, seed_i, n, x0): i
+                   for i, (seed_i, n) in enumerate(zip(seeds, chunks))}
+        for future in as_completed(futures):
+            i = futures[future]
+            samples[offsets[i]:offsets[i] + chunks[i]] = future.result()
+            n_done += chunks[i]
+            if verbose:
+                _print_progress(n_done, n_draws, t0)
+    return samples
+
+
+def _init_worker(sample: SampleParameters, data: Data, settings: Dict) -> None:
+    """build the fitter that the draws of this process reuse"""
+    from fit3omega.fit import Fit3omega
+    global _FITTER, _SETTINGS
+    _FITTER = Fit3omega(sample.copy(),
+                        data.copy(),
+                        model=settings["model"],
+                        boundary_type=settings["boundary_type"])
+    _FITTER.ignore_imag_err = settings["ignore_imag_err"]
+    _FITTER.quad_tol = settings["quad_tol"]
+    _FITTER.interp_tol = settings["interp_tol"]
+    _SETTINGS = settings
+
+
+def _fit_chunk(seed: np.random.SeedSequence,
+               n_draws: int,
+               x0: np.ndarray) -> np.ndarray:
+    """refit `n_draws` resampled datasets, starting from `x0`"""
+    rng = np.random.default_rng(seed)
+    nominal_sample = _FITTER.sample
+    nominal_data = _FITTER.data
+    xs = np.full((n_draws, len(x0)), np.nan)
+    try:
+        for i in range(n_draws):
+            _FITTER.sample = perturbed_sample(nominal_sample, rng)
+            _FITTER.data = nominal_data.resampled(rng)
+            try:
+                _FITTER.fit(tol=_SETTINGS["tol"],
+                            x0=x0,
+                            jac=_SETTINGS["jac"],
+                            engine=_SETTINGS["engine"],
+                            covariance=False)
+            except Exception:
+                continue
+            xs[i] = _FITTER.result.x
+    finally:
+        _FITTER.sample = nominal_sample
+        _FITTER.data = nominal_data
+    return xs
+
+
+def _print_progress(n_done: int, n_draws: int, t0: float) -> None:
+    print("==> fit3omega: monte carlo, {}/{} draws ({:.1f} s)"
+          .format(n_done, n_draws, time.perf_counter() - t0))
+
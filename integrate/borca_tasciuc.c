@@ -10,31 +10,31 @@
 // =================================================================================================
 
 
-double complex fB(int i_layer, double lambda, double omega)
+double complex fB(const Sample *s, int i_layer, double lambda, double omega)
 {
 	/* Borca-Tasciuc Eq. (3) */
-	return csqrt(psis_[i_layer]*lambda*lambda
-							 + I*2.0*omega*Cvs_[i_layer]/kys_[i_layer]);
+	return csqrt(s->psis[i_layer]*lambda*lambda
+							 + I*2.0*omega*s->Cvs[i_layer]/s->kys[i_layer]);
 }
 
-double complex fA(int i_layer, double lambda, double omega)
+double complex fA(const Sample *s, int i_layer, double lambda, double omega)
 {
 	/* Borca-Tasciuc Eq. (2); with i -> i+1 */
 	// base case - depends_ on boundary type
-	if (i_layer == n_LAYERS - 1) {
-		switch (boundary_type_)
+	if (i_layer == s->n_layers - 1) {
+		switch (s->boundary_type)
 		{
 			case 's':
 				return -1.0;
 			case 'a':
 			{
-				complex double Bn = fB(i_layer,lambda,omega);
-				return -1.0 * ctanh(Bn * ds_[i_layer]);
+				complex double Bn = fB(s,i_layer,lambda,omega);
+				return -1.0 * ctanh(Bn * s->ds[i_layer]);
 			}
 			case 'i':
 			{
-				complex double Bn = fB(i_layer,lambda,omega);
-				return -1.0 / ctanh(Bn * ds_[i_layer]);
+				complex double Bn = fB(s,i_layer,lambda,omega);
+				return -1.0 / ctanh(Bn * s->ds[i_layer]);
 			}
 			default:
 				return -1.0;
@@ -42,13 +42,13 @@ double complex fA(int i_layer, double lambda, double omega)
 	}
 
 	// recursive call until base case
-	double complex A_ii = fA(i_layer+1,lambda,omega);
+	double complex A_ii = fA(s,i_layer+1,lambda,omega);
 
-	double complex B_i = fB(i_layer,lambda,omega);
-	double complex B_ii = fB(i_layer+1,lambda,omega);
-	double k_i = kys_[i_layer];
-	double k_ii = kys_[i_layer+1];
-	double d_i = ds_[i_layer];
+	double complex B_i = fB(s,i_layer,lambda,omega);
+	double complex B_ii = fB(s,i_layer+1,lambda,omega);
+	double k_i = s->kys[i_layer];
+	double k_ii = s->kys[i_layer+1];
+	double d_i = s->ds[i_layer];
 	
 	double complex AkB = A_ii * k_ii * B_ii / (k_i * B_i);
 	double complex tanh_term = ctanh(B_i * d_i);
@@ -59,17 +59,26 @@ double complex fA(int i_layer, double lambda, double omega)
 // =================================================================================================
 
 
-double complex bt_integrand(double lambda, double omega)
+double complex bt_integrand(const Sample *s, double lambda, double omega)
 {
 	/* Borca-Tasciuc Eq. (1) integrand */
-	double complex A_top = fA(0,lambda,omega);
-	double complex B_top = fB(0,lambda,omega);
-	return sinc_sq(HALF_WIDTH * lambda) / (A_top * B_top);
+	double complex A_top = fA(s,0,lambda,omega);
+	double complex B_top = fB(s,0,lambda,omega);
+	return sinc_sq(s->half_width * lambda) / (A_top * B_top);
 }
 
 
-double complex *bt_integral(void)
+void bt_integral(const Config *config, const Sample *s, double complex *result)
 {
 	/* Borca-Tasciuc Eq. (1) integral */
-	return omega_trapz(bt_integrand,LAMBDAS,bt_integral_result_);
+	omega_trapz(bt_integrand,s,config,result);
+}
+
+
+void bt_integral_adaptive(const Config *config, const Sample *s, double tol,
+													const Partition *start, Partition *end,
+													double complex *result, double *errs, int *n_evals)
+{
+	/* Borca-Tasciuc Eq. (1) integral, to relative tolerance `tol` */
+	omega_adaptive(bt_integrand,s,config,tol,start,end,result,errs,n_evals);
 }
@@ -1,11 +1,16 @@
+#ifndef BORCA_TASCIUC_H
+#define BORCA_TASCIUC_H
+
+#include "integrate.h"
+
 // =================================================================================================
 // Borca-Tasciuc model (no contact resistance)
 // =================================================================================================
-char boundary_type_;
-double LAMBDAS[N_XPTS];
 
-double complex bt_integrand_x_[N_XPTS];
-double complex bt_integrand(double lambda, double omega);
+double complex bt_integrand(const Sample *s, double lambda, double omega);
+void bt_integral(const Config *config, const Sample *s, double complex *result);
+void bt_integral_adaptive(const Config *config, const Sample *s, double tol,
+													const Partition *start, Partition *end,
+													double complex *result, double *errs, int *n_evals);
 
-double complex bt_integral_result_[MAX_n_OMEGAS];
-double complex *bt_integral(void);
+#endif
@@ -1,14 +1,57 @@
 #include "exceptions.h"
 
 
+// names and messages, declared in exceptions.h
+const char *const ARGS_ERROR_MSG = "invalid (missing or extra) arguments";
+const char *const LENGTH_ERROR_MSG = "array length incompatible with sample configuration";
+const char *const OUT_ERROR_MSG =
+	"'out' must be a writeable, C-contiguous complex128 array of the result's shape";
+const char *const BUSY_ERROR_MSG =
+	"cannot re-set the configuration while another thread is integrating with it";
+const char *const PARAM_IDS_ERROR_MSG =
+	"parameter ids must be a sequence of (parameter index, layer index) integer pairs";
+const char *const BT_IntegralError_NAME = "integrate.BT_IntegralError";
+const char *const BT_SetArgsError_NAME = "integrate.BT_SetArgsError";
+const char *const BT_NotSetError_NAME = "integral.BT_NotSetError";
+const char *const BT_NotSetError_MSG = "BT_Set method has not been called yet";
+const char *const OGC_IntegralError_NAME = "integrate.OGC_IntegralError";
+const char *const OGC_IntegralDerError_NAME = "integrate.OGC_IntegralDerError";
+const char *const OGC_SetArgsError_NAME = "integrate.OGC_SetArgsError";
+const char *const OGC_NotSetError_NAME = "integral.OGC_NotSetError";
+const char *const OGC_NotSetError_MSG = "OGC_Set method has not been called yet";
+const char *const n_LAYERS_Error_NAME = "integrate.NumberOfLayersError";
+const char *const n_LAYERS_Error_MSG = "invalid number of sample layers (must be positive)";
+const char *const n_OMEGAS_Error_NAME = "integrate.NumberOfOmegasError";
+const char *const n_OMEGAS_Error_MSG = "invalid length of omegas array (must be non-empty)";
+const char *const NullOmegasError_NAME = "integrate.NullOmegasError";
+const char *const NullOmegasError_MSG = "pointer to omegas array is null";
+const char *const ParameterIDError_NAME = "integrate.ParameterIDError";
+const char *const ParameterIDError_MSG = "encountered invalid parameter ID";
+
+
+PyObject *BT_IntegralError;
+PyObject *BT_SetArgsError;
+PyObject *BT_NotSetError;
+PyObject *OGC_IntegralError;
+PyObject *OGC_IntegralDerError;
+PyObject *OGC_SetArgsError;
+PyObject *OGC_NotSetError;
+PyObject *n_LAYERS_Error;
+PyObject *n_OMEGAS_Error;
+PyObject *NullOmegasError;
+PyObject *ParameterIDError;
+
+
 void init_exceptions(void)
 {
 	BT_IntegralError = PyErr_NewException(BT_IntegralError_NAME, NULL, NULL);
 	BT_NotSetError = PyErr_NewException(BT_NotSetError_NAME, NULL, NULL);
+	BT_SetArgsError = PyErr_NewException(BT_SetArgsError_NAME, NULL, NULL);
 
 	OGC_IntegralError = PyErr_NewException(OGC_IntegralError_NAME, NULL, NULL);
 	OGC_NotSetError = PyErr_NewException(OGC_NotSetError_NAME, NULL, NULL);
-	OGC_IntegralDerError = PyErr_NewException(OGC_IntegralError_NAME, NULL, NULL);
+	OGC_IntegralDerError = PyErr_NewException(OGC_IntegralDerError_NAME, NULL, NULL);
+	OGC_SetArgsError = PyErr_NewException(OGC_SetArgsError_NAME, NULL, NULL);
 
 	n_LAYERS_Error = PyErr_NewException(n_LAYERS_Error_NAME, NULL, NULL);
 
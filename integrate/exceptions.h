@@ -1,48 +1,56 @@
+#ifndef EXCEPTIONS_H
+#define EXCEPTIONS_H
+
 #include <Python.h>
 
 
-static const char *ARGS_ERROR_MSG = "invalid (missing or extra) arguments";
-static const char *LENGTH_ERROR_MSG = "array length incompatible with sample configuration";
+extern const char *const ARGS_ERROR_MSG;
+extern const char *const LENGTH_ERROR_MSG;
+extern const char *const OUT_ERROR_MSG;
+extern const char *const BUSY_ERROR_MSG;
+extern const char *const PARAM_IDS_ERROR_MSG;
 
 
-PyObject *BT_IntegralError;
-static const char *BT_IntegralError_NAME = "integrate.BT_IntegralError";
+extern PyObject *BT_IntegralError;
+extern const char *const BT_IntegralError_NAME;
 
-PyObject *BT_SetArgsError;
-static const char *BT_SetArgsError_NAME = "integrate.BT_SetArgsError";
+extern PyObject *BT_SetArgsError;
+extern const char *const BT_SetArgsError_NAME;
 
-PyObject *BT_NotSetError;
-static const char *BT_NotSetError_NAME = "integral.BT_NotSetError";
-static const char *BT_NotSetError_MSG = "BT_Set method has not been called yet";
+extern PyObject *BT_NotSetError;
+extern const char *const BT_NotSetError_NAME;
+extern const char *const BT_NotSetError_MSG;
 
-PyObject *OGC_IntegralError;
-static const char *OGC_IntegralError_NAME = "integrate.OGC_IntegralError";
+extern PyObject *OGC_IntegralError;
+extern const char *const OGC_IntegralError_NAME;
 
-PyObject *OGC_IntegralDerError;
-static const char *OGC_IntegralDerError_NAME = "integrate.OGC_IntegralDerError";
+extern PyObject *OGC_IntegralDerError;
+extern const char *const OGC_IntegralDerError_NAME;
 
-PyObject *OGC_SetArgsError;
-static const char *OGC_SetArgsError_NAME = "integrate.OGC_SetArgsError";
+extern PyObject *OGC_SetArgsError;
+extern const char *const OGC_SetArgsError_NAME;
 
-PyObject *OGC_NotSetError;
-static const char *OGC_NotSetError_NAME = "integral.OGC_NotSetError";
-static const char *OGC_NotSetError_MSG = "OGC_Set method has not been called yet";
+extern PyObject *OGC_NotSetError;
+extern const char *const OGC_NotSetError_NAME;
+extern const char *const OGC_NotSetError_MSG;
 
-PyObject *n_LAYERS_Error;
-static const char *n_LAYERS_Error_NAME = "integrate.NumberOfLayersError";
-static const char *n_LAYERS_Error_MSG = "invalid number of sample layers (exceeds max?)";
+extern PyObject *n_LAYERS_Error;
+extern const char *const n_LAYERS_Error_NAME;
+extern const char *const n_LAYERS_Error_MSG;
 
-PyObject *n_OMEGAS_Error;
-static const char *n_OMEGAS_Error_NAME = "integrate.NumberOfOmegasError";
-static const char *n_OMEGAS_Error_MSG = "invalid length of omegas array (exceeds max?)";
+extern PyObject *n_OMEGAS_Error;
+extern const char *const n_OMEGAS_Error_NAME;
+extern const char *const n_OMEGAS_Error_MSG;
 
-PyObject *NullOmegasError;
-static const char *NullOmegasError_NAME = "integrate.NullOmegasError";
-static const char *NullOmegasError_MSG = "pointer to omegas array is null";
+extern PyObject *NullOmegasError;
+extern const char *const NullOmegasError_NAME;
+extern const char *const NullOmegasError_MSG;
 
-PyObject *ParameterIDError;
-static const char *ParameterIDError_NAME = "integrate.ParameterIDError";
-static const char *ParameterIDError_MSG = "encountered invalid parameter ID";
+extern PyObject *ParameterIDError;
+extern const char *const ParameterIDError_NAME;
+extern const char *const ParameterIDError_MSG;
 
 
 void init_exceptions(void);
+
+#endif
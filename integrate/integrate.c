@@ -8,12 +8,30 @@
 #include "exceptions.h"
 
 
-// flags == "Python-side `set` method called successfully; parameters received."
-int BT_PARAMS_SET;
-int OGC_PARAMS_SET;
+// evaluation counts of a configuration, for instrumentation; see `counters_dict`
+typedef struct {
+	long long integral_calls;    // fixed-rule integrals
+	long long batch_calls;
+	long long batch_samples;     // parameter sets integrated by batch calls
+	long long jacobian_calls;
+	long long adaptive_calls;
+	long long omega_integrals;   // integrals at a single ω (per parameter set)
+	long long integrand_evals;   // points at which an integrand was evaluated
+} Counters;
 
-// byte size of a `double complex` variable
-static const size_t DBL_CPLX_SIZE = sizeof(double complex);
+
+// the fixed-layer cache of a configuration; a call uses it only while holding `lock`
+typedef struct {
+	FixedLayers layers;
+	PyThread_type_lock lock;
+} FixedCache;
+
+
+// configurations used by the module-level functions (`bt_set`, `ogc_integral`, etc.)
+static Config BT_CONFIG;
+static Config OGC_CONFIG;
+static FixedCache OGC_FIXED;
+static Counters COUNTERS;
 
 
 // =================================================================================================
@@ -25,24 +43,121 @@ static const size_t DBL_CPLX_SIZE = sizeof(double complex);
 // =================================================================================================
 
 
-static PyObject *as_complex_1darray(double complex *arr, int size)
+static PyObject *output_array(PyObject *out, int n_dims, npy_intp *dims)
+{
+	/*
+	`out` (a new reference) if it is a writeable, C-contiguous complex array of shape `dims`;
+	a new array if `out` is NULL or None
+	*/
+	if (out == NULL || out == Py_None)
+		return PyArray_SimpleNew(n_dims, dims, NPY_COMPLEX128);
+
+	PyArrayObject *arr = (PyArrayObject *) out;
+	if (!PyArray_Check(out)
+			|| PyArray_TYPE(arr) != NPY_COMPLEX128
+			|| !PyArray_IS_C_CONTIGUOUS(arr)
+			|| !PyArray_ISALIGNED(arr)
+			|| !PyArray_ISWRITEABLE(arr)
+			|| PyArray_NDIM(arr) != n_dims
+			|| !PyArray_CompareLists(PyArray_DIMS(arr), dims, n_dims)) {
+		PyErr_SetString(PyExc_ValueError, OUT_ERROR_MSG);
+		return NULL;
+	}
+	Py_INCREF(out);
+	return out;
+}
+
+
+static PyArrayObject *as_double_array(PyObject *obj, int n_dims)
+{
+	/*
+	a contiguous float64 array with `n_dims` dimensions; a new reference to `obj` itself if
+	it already is one, otherwise a converted copy (any sequence or buffer of numbers)
+	*/
+	return (PyArrayObject *) PyArray_FROMANY(obj, NPY_DOUBLE, n_dims, n_dims, NPY_ARRAY_IN_ARRAY);
+}
+
+
+// a Sample whose layer arrays view the callers' buffers
+typedef struct {
+	Sample s;
+	PyArrayObject *arrays[5];  // ds, kys, ratio_xys, Cvs, Rcs; owned references
+} SampleView;
+
+
+static void release_sample(SampleView *v)
 {
-	const npy_intp dims[] = { size };
-	return PyArray_SimpleNewFromData(1, dims, NPY_COMPLEX128, (void *) arr);
+	for (int f = 0; f < 5; f++)
+		Py_CLEAR(v->arrays[f]);
 }
 
 
-static PyObject *as_complex_2darray(double complex arr[MAX_n_PARAMS][MAX_n_OMEGAS],
-									int n_rows, int n_cols)
+static int parse_sample(const Config *config, SampleView *v, PyObject **fields, int with_Rcs,
+												PyObject *error_type)
 {
-	PyArray_Descr *descr = PyArray_DescrFromType(NPY_COMPLEX128);
-	const npy_intp dims[] = { n_rows, n_cols};
-	const npy_intp strides[] = { MAX_n_OMEGAS * DBL_CPLX_SIZE, DBL_CPLX_SIZE };
-	PyObject *arr_Py = PyArray_NewFromDescr(
-		&PyArray_Type, descr, 2, dims, strides, (void *) arr, NPY_ARRAY_WRITEABLE, NULL
+	/*
+	view the layer parameters (ds, kys, ratio_xys, Cvs and optionally Rcs) in `v`, without
+	copying any that are contiguous float64 arrays already; returns -1 with an exception set
+	on failure. On success, the caller must release `v` with `release_sample`.
+	*/
+	*v = (SampleView) { 0 };
+	const int n_fields = with_Rcs ? 5 : 4;
+	for (int f = 0; f < n_fields; f++) {
+		v->arrays[f] = as_double_array(fields[f], 1);
+		if (v->arrays[f] == NULL || PyArray_SIZE(v->arrays[f]) != config->n_layers) {
+			release_sample(v);
+			PyErr_SetString(error_type, LENGTH_ERROR_MSG);
+			return -1;
+		}
+	}
+
+	v->s = (Sample) {
+		.n_layers = config->n_layers,
+		.half_width = config->half_width,
+		.boundary_type = config->boundary_type,
+		.ds = (double *) PyArray_DATA(v->arrays[0]),
+		.kys = (double *) PyArray_DATA(v->arrays[1]),
+		.psis = (double *) PyArray_DATA(v->arrays[2]),
+		.Cvs = (double *) PyArray_DATA(v->arrays[3]),
+		.Rcs = with_Rcs ? (double *) PyArray_DATA(v->arrays[4]) : NULL  // not used by BT
+	};
+	return 0;
+}
+
+
+static int set_domain(Config *config, PyArrayObject *omegas_Py, double x_i, double x_f)
+{
+	/* copy the measurement frequencies and prepare the integration points */
+	if (config->n_layers <= 0) {
+		PyErr_SetString(n_LAYERS_Error, n_LAYERS_Error_MSG);
+		return -1;
+	}
+
+	npy_intp n_omegas = PyArray_Size((PyObject *) omegas_Py);
+	if (n_omegas <= 0 || n_omegas > INT_MAX) {
+		PyErr_SetString(n_OMEGAS_Error, n_OMEGAS_Error_MSG);
+		return -1;
+	}
+
+	PyArrayObject *omegas_contig = (PyArrayObject *) PyArray_FROMANY(
+		(PyObject *) omegas_Py, NPY_DOUBLE, 1, 1, NPY_ARRAY_IN_ARRAY
 	);
+	if (omegas_contig == NULL) {
+		PyErr_SetString(NullOmegasError, NullOmegasError_MSG);
+		return -1;
+	}
+	config->omegas = malloc(n_omegas * sizeof(double));
+	if (config->omegas == NULL) {
+		Py_DECREF(omegas_contig);
+		PyErr_NoMemory();
+		return -1;
+	}
+	memcpy(config->omegas, PyArray_DATA(omegas_contig), n_omegas * sizeof(double));
+	Py_DECREF(omegas_contig);
+	config->n_omegas = (int) n_omegas;
 
-	return arr_Py;
+	make_logspace(config->xs, x_i, x_f, N_XPTS);
+	return 0;
 }
 
 
@@ -53,145 +168,352 @@ THE WRAPPED INTEGRAL FUNCTIONS
 */
 
 
-static PyObject *BT_Integral(PyObject *self, PyObject *args)
+// keyword names; the layer parameters are positional-only
+static char *BT_KWLIST[] = { "", "", "", "", "out", NULL };
+static char *OGC_KWLIST[] = { "", "", "", "", "", "out", NULL };
+
+
+static FixedLayers *fixed_cache_acquire(FixedCache *cache)
 {
-	if (!BT_PARAMS_SET) {
-		PyErr_SetString(BT_NotSetError, BT_NotSetError_MSG);
+	/*
+	the cached fixed layers, if no other call is using them; otherwise NULL, and the caller
+	integrates in full rather than waiting (called without the GIL)
+	*/
+	if (cache->lock == NULL || !PyThread_acquire_lock(cache->lock, NOWAIT_LOCK))
 		return NULL;
+	return &cache->layers;
+}
+
+
+static void fixed_cache_release(FixedCache *cache, const FixedLayers *layers)
+{
+	/* release the cache if `layers` came from `fixed_cache_acquire` */
+	if (layers != NULL)
+		PyThread_release_lock(cache->lock);
+}
+
+
+static int check_idle(const Config *config)
+{
+	/* 0 if no call is integrating with `config`; otherwise -1 with a RuntimeError set */
+	if (config->n_busy > 0) {
+		PyErr_SetString(PyExc_RuntimeError, BUSY_ERROR_MSG);
+		return -1;
 	}
+	return 0;
+}
 
-	PyObject *Py_ds;
-	PyObject *Py_kys;
-	PyObject *Py_ratio_xys;
-	PyObject *Py_Cvs;
 
-	if (!PyArg_ParseTuple(args,"OOOO",
-												&Py_ds,
-												&Py_kys,
-												&Py_ratio_xys,
-												&Py_Cvs)) {
-		PyErr_SetString(BT_IntegralError, ARGS_ERROR_MSG);
+static PyObject *counters_dict(const Counters *c, const FixedLayers *fixed)
+{
+	return Py_BuildValue("{sLsLsLsLsLsLsLsL}",
+											 "integral_calls", c->integral_calls,
+											 "batch_calls", c->batch_calls,
+											 "batch_samples", c->batch_samples,
+											 "jacobian_calls", c->jacobian_calls,
+											 "adaptive_calls", c->adaptive_calls,
+											 "omega_integrals", c->omega_integrals,
+											 "integrand_evals", c->integrand_evals,
+											 "fixed_refreshes", fixed->n_refreshes);
+}
+
+
+static PyObject *bt_integral_Py(Config *config, Counters *counters,
+																PyObject *args, PyObject *kwargs)
+{
+	if (!config->is_set) {
+		PyErr_SetString(BT_NotSetError, BT_NotSetError_MSG);
 		return NULL;
-	 }
+	}
 
-	if (PyObject_Length(Py_ds) != n_LAYERS) {
-		PyErr_SetString(BT_IntegralError, LENGTH_ERROR_MSG);
+	PyObject *fields[4];
+	PyObject *out = NULL;
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOO|$O", BT_KWLIST,
+																	 &fields[0], &fields[1], &fields[2], &fields[3], &out)) {
+		PyErr_SetString(BT_IntegralError, ARGS_ERROR_MSG);
 		return NULL;
 	}
 
-	for (int j = 0; j < n_LAYERS; j++) {
-		PyObject *d = PyList_GetItem(Py_ds, j);
-		ds_[j] = PyFloat_AsDouble(d);
+	SampleView v;
+	if (parse_sample(config, &v, fields, 0, BT_IntegralError))
+		return NULL;
 
-		PyObject *ky = PyList_GetItem(Py_kys, j);
-		kys_[j] = PyFloat_AsDouble(ky);
+	npy_intp dims[] = { config->n_omegas };
+	PyObject *result = output_array(out, 1, dims);
+	if (result == NULL) {
+		release_sample(&v);
+		return NULL;
+	}
 
-		PyObject *rat = PyList_GetItem(Py_ratio_xys, j);
-		psis_[j] = PyFloat_AsDouble(rat);
+	double complex *result_data = (double complex *) PyArray_DATA((PyArrayObject *) result);
+	config->n_busy++;  // `set` refuses while the GIL is released here
+	Py_BEGIN_ALLOW_THREADS
+	bt_integral(config, &v.s, result_data);
+	Py_END_ALLOW_THREADS
+	config->n_busy--;
+	release_sample(&v);
 
-		PyObject *Cv = PyList_GetItem(Py_Cvs, j);
-		Cvs_[j] = PyFloat_AsDouble(Cv);
-	}
+	counters->integral_calls++;
+	counters->omega_integrals += config->n_omegas;
+	counters->integrand_evals += (long long) config->n_omegas * N_XPTS;
 
-	return as_complex_1darray(bt_integral(), n_OMEGAS);
+	return result;
 }
 
 
-static PyObject *OGC_Integral(PyObject *self, PyObject *args)
+static PyObject *ogc_integral_Py(Config *config, FixedCache *cache, Counters *counters,
+																 PyObject *args, PyObject *kwargs)
 {
-	if (!OGC_PARAMS_SET) {
+	if (!config->is_set) {
 		PyErr_SetString(OGC_NotSetError, OGC_NotSetError_MSG);
 		return NULL;
 	}
 
-	PyObject *Py_ds;
-	PyObject *Py_kys;
-	PyObject *Py_ratio_xys;
-	PyObject *Py_Cvs;
-	PyObject *Py_Rcs;
-
-	if (!PyArg_ParseTuple(args,"OOOOO",
-												&Py_ds,
-												&Py_kys,
-												&Py_ratio_xys,
-												&Py_Cvs,
-												&Py_Rcs)) {
+	PyObject *fields[5];
+	PyObject *out = NULL;
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOOO|$O", OGC_KWLIST, &fields[0],
+																	 &fields[1], &fields[2], &fields[3], &fields[4], &out)) {
 		PyErr_SetString(OGC_IntegralError, ARGS_ERROR_MSG);
 		return NULL;
 	}
 
-	if (PyObject_Length(Py_ds) != n_LAYERS) {
-		PyErr_SetString(OGC_IntegralError, LENGTH_ERROR_MSG);
+	SampleView v;
+	if (parse_sample(config, &v, fields, 1, OGC_IntegralError))
+		return NULL;
+
+	npy_intp dims[] = { config->n_omegas };
+	PyObject *result = output_array(out, 1, dims);
+	if (result == NULL) {
+		release_sample(&v);
 		return NULL;
 	}
 
-	for (int j = 0; j < n_LAYERS; j++) {
-		PyObject *d = PyList_GetItem(Py_ds, j);
-		ds_[j] = PyFloat_AsDouble(d);
+	double complex *result_data = (double complex *) PyArray_DATA((PyArrayObject *) result);
+	config->n_busy++;
+	Py_BEGIN_ALLOW_THREADS
+	FixedLayers *fixed = fixed_cache_acquire(cache);
+	ogc_integral(config, fixed, &v.s, result_data);
+	fixed_cache_release(cache, fixed);
+	Py_END_ALLOW_THREADS
+	config->n_busy--;
+	release_sample(&v);
+
+	counters->integral_calls++;
+	counters->omega_integrals += config->n_omegas;
+	counters->integrand_evals += (long long) config->n_omegas * N_XPTS;
+
+	return result;
+}
 
-		PyObject *ky = PyList_GetItem(Py_kys, j);
-		kys_[j] = PyFloat_AsDouble(ky);
 
-		PyObject *rat = PyList_GetItem(Py_ratio_xys, j);
-		psis_[j] = PyFloat_AsDouble(rat);
+static PyObject *ogc_jacobian_Py(Config *config, FixedCache *cache, Counters *counters,
+																 PyObject *args, PyObject *kwargs)
+{
+	if (!config->is_set) {
+		PyErr_SetString(OGC_NotSetError, OGC_NotSetError_MSG);
+		return NULL;
+	}
+
+	PyObject *fields[5];
+	PyObject *out = NULL;
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOOO|$O", OGC_KWLIST, &fields[0],
+																	 &fields[1], &fields[2], &fields[3], &fields[4], &out)) {
+		PyErr_SetString(OGC_IntegralDerError, ARGS_ERROR_MSG);
+		return NULL;
+	}
 
-		PyObject *Cv = PyList_GetItem(Py_Cvs, j);
-		Cvs_[j] = PyFloat_AsDouble(Cv);
+	SampleView v;
+	if (parse_sample(config, &v, fields, 1, OGC_IntegralDerError))
+		return NULL;
 
-		PyObject *Rc = PyList_GetItem(Py_Rcs, j);
-		Rcs_[j] = PyFloat_AsDouble(Rc);
+	npy_intp dims[] = { config->n_params, config->n_omegas };
+	PyObject *result = output_array(out, 2, dims);
+	if (result == NULL) {
+		release_sample(&v);
+		return NULL;
 	}
 
-	return as_complex_1darray(ogc_integral(), n_OMEGAS);
+	int status;
+	double complex *result_data = (double complex *) PyArray_DATA((PyArrayObject *) result);
+	config->n_busy++;
+	Py_BEGIN_ALLOW_THREADS
+	FixedLayers *fixed = fixed_cache_acquire(cache);
+	status = jac_Z(config, fixed, &v.s, result_data);
+	fixed_cache_release(cache, fixed);
+	Py_END_ALLOW_THREADS
+	config->n_busy--;
+	release_sample(&v);
+
+	counters->jacobian_calls++;
+	counters->integrand_evals += (long long) config->n_omegas * N_XPTS;
+
+	if (status) {
+		Py_DECREF(result);
+		PyErr_SetString(ParameterIDError, ParameterIDError_MSG);
+		return NULL;
+	}
+	return result;
 }
 
 
-static PyObject *OGC_Integral_Der(PyObject* self, PyObject *args)
+static PyObject *ogc_integral_batch_Py(Config *config, FixedCache *cache,
+																			 Counters *counters, PyObject *args, PyObject *kwargs)
 {
-	if (!OGC_PARAMS_SET) {
+	/*
+	Call signature is (ds, kys, ratio_xys, Cvs, Rcs), with `ds` of length n_layers and
+	the others (M x n_layers) arrays, one parameter set per row. Returns an (M x n_omegas)
+	array. The rows are read in place, without copies, if they are C-contiguous doubles.
+	*/
+	if (!config->is_set) {
 		PyErr_SetString(OGC_NotSetError, OGC_NotSetError_MSG);
 		return NULL;
 	}
 
-	PyObject *Py_ds;
-	PyObject *Py_kys;
-	PyObject *Py_ratio_xys;
-	PyObject *Py_Cvs;
-	PyObject *Py_Rcs;
-
-	if (!PyArg_ParseTuple(args,"OOOOO",
-												&Py_ds,
-												&Py_kys,
-												&Py_ratio_xys,
-												&Py_Cvs,
-												&Py_Rcs)) {
-		PyErr_SetString(OGC_IntegralDerError, ARGS_ERROR_MSG);
+	PyObject *fields_Py[5];
+	PyObject *out = NULL;
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOOO|$O", OGC_KWLIST, &fields_Py[0],
+																	 &fields_Py[1], &fields_Py[2], &fields_Py[3], &fields_Py[4],
+																	 &out)) {
+		PyErr_SetString(OGC_IntegralError, ARGS_ERROR_MSG);
 		return NULL;
 	}
 
-	if (PyObject_Length(Py_ds) != n_LAYERS) {
-		PyErr_SetString(OGC_IntegralDerError, LENGTH_ERROR_MSG);
-		return NULL;
+	// ds, then each (M x n_layers) field
+	PyArrayObject *fields[5] = { NULL };
+	PyObject *result = NULL;
+	Sample *samples = NULL;
+	npy_intp n_samples = 0;
+	for (int f = 0; f < 5; f++) {
+		fields[f] = as_double_array(fields_Py[f], f ? 2 : 1);
+		if (fields[f] == NULL) {
+			PyErr_SetString(OGC_IntegralError, LENGTH_ERROR_MSG);
+			goto done;
+		}
+		npy_intp *dims = PyArray_DIMS(fields[f]);
+		if (f == 1)
+			n_samples = dims[0];
+		if (dims[f ? 1 : 0] != config->n_layers || (f && dims[0] != n_samples)
+				|| n_samples > INT_MAX) {
+			PyErr_SetString(OGC_IntegralError, LENGTH_ERROR_MSG);
+			goto done;
+		}
 	}
 
-	for (int j = 0; j < n_LAYERS; j++) {
-		PyObject *d = PyList_GetItem(Py_ds, j);
-		ds_[j] = PyFloat_AsDouble(d);
+	npy_intp dims[] = { n_samples, config->n_omegas };
+	result = output_array(out, 2, dims);
+	if (result == NULL)
+		goto done;
+	samples = malloc((n_samples > 0 ? n_samples : 1) * sizeof(Sample));
+	if (samples == NULL) {
+		Py_CLEAR(result);
+		PyErr_NoMemory();
+		goto done;
+	}
 
-		PyObject *ky = PyList_GetItem(Py_kys, j);
-		kys_[j] = PyFloat_AsDouble(ky);
+	// each sample views its row of the input arrays
+	const int n = config->n_layers;
+	double *ds = (double *) PyArray_DATA(fields[0]);
+	double *kys = (double *) PyArray_DATA(fields[1]);
+	double *psis = (double *) PyArray_DATA(fields[2]);
+	double *Cvs = (double *) PyArray_DATA(fields[3]);
+	double *Rcs = (double *) PyArray_DATA(fields[4]);
+	for (npy_intp m = 0; m < n_samples; m++) {
+		samples[m] = (Sample) {
+			.n_layers = n, .half_width = config->half_width, .boundary_type = config->boundary_type,
+			.ds = ds, .kys = kys + m * n, .psis = psis + m * n, .Cvs = Cvs + m * n, .Rcs = Rcs + m * n
+		};
+	}
 
-		PyObject *rat = PyList_GetItem(Py_ratio_xys, j);
-		psis_[j] = PyFloat_AsDouble(rat);
+	double complex *result_data = (double complex *) PyArray_DATA((PyArrayObject *) result);
+	config->n_busy++;
+	Py_BEGIN_ALLOW_THREADS
+	FixedLayers *fixed = fixed_cache_acquire(cache);
+	ogc_integral_samples(config, fixed, samples, (int) n_samples, result_data);
+	fixed_cache_release(cache, fixed);
+	Py_END_ALLOW_THREADS
+	config->n_busy--;
+
+	counters->batch_calls++;
+	counters->batch_samples += n_samples;
+	counters->omega_integrals += (long long) n_samples * config->n_omegas;
+	counters->integrand_evals += (long long) n_samples * config->n_omegas * N_XPTS;
+
+done:
+	free(samples);
+	for (int f = 0; f < 5; f++)
+		Py_XDECREF(fields[f]);
+	return result;
+}
 
-		PyObject *Cv = PyList_GetItem(Py_Cvs, j);
-		Cvs_[j] = PyFloat_AsDouble(Cv);
 
-		PyObject *Rc = PyList_GetItem(Py_Rcs, j);
-		Rcs_[j] = PyFloat_AsDouble(Rc);
+typedef void (*adaptive_integral_fn)(const Config *, const Sample *, double,
+																		 const Partition *, Partition *,
+																		 double complex *, double *, int *);
+
+
+static PyObject *integral_adaptive_Py(Config *config, Partition **partition,
+																			Counters *counters, PyObject *args, int with_Rcs,
+																			PyObject *error_type, adaptive_integral_fn integral)
+{
+	/*
+	Call signature is (tol, *layer_parameters). Returns (integral, abs. error estimates,
+	number of integrand evaluations), each per ω. The final panels replace `*partition`.
+	*/
+	double tol;
+	PyObject *fields[5];
+	int ok = with_Rcs
+		? PyArg_ParseTuple(args, "dOOOOO", &tol,
+											 &fields[0], &fields[1], &fields[2], &fields[3], &fields[4])
+		: PyArg_ParseTuple(args, "dOOOO", &tol, &fields[0], &fields[1], &fields[2], &fields[3]);
+	if (!ok) {
+		PyErr_SetString(error_type, ARGS_ERROR_MSG);
+		return NULL;
 	}
+	if (!(tol > 0.0)) {
+		PyErr_SetString(PyExc_ValueError, "tolerance must be positive");
+		return NULL;
+	}
+
+	SampleView v;
+	if (parse_sample(config, &v, fields, with_Rcs, error_type))
+		return NULL;
 
-	return as_complex_2darray(jac_Z(), n_PARAMS, n_OMEGAS);
+	npy_intp dims[] = { config->n_omegas };
+	PyObject *result = PyArray_SimpleNew(1, dims, NPY_COMPLEX128);
+	PyObject *errs = PyArray_SimpleNew(1, dims, NPY_DOUBLE);
+	PyObject *n_evals = PyArray_SimpleNew(1, dims, NPY_INT);
+	Partition *work = partition_new(config->n_omegas);
+	if (result == NULL || errs == NULL || n_evals == NULL || work == NULL) {
+		Py_XDECREF(result);
+		Py_XDECREF(errs);
+		Py_XDECREF(n_evals);
+		partition_free(work);
+		release_sample(&v);
+		return PyErr_Occurred() ? NULL : PyErr_NoMemory();
+	}
+
+	// start from the previous partition; `omega_adaptive` may read and write the same one
+	if (*partition != NULL && (*partition)->n_omegas == config->n_omegas)
+		partition_copy(work, *partition);
+
+	double complex *result_data = (double complex *) PyArray_DATA((PyArrayObject *) result);
+	double *errs_data = (double *) PyArray_DATA((PyArrayObject *) errs);
+	int *n_evals_data = (int *) PyArray_DATA((PyArrayObject *) n_evals);
+	config->n_busy++;
+	Py_BEGIN_ALLOW_THREADS
+	integral(config, &v.s, tol, work, work, result_data, errs_data, n_evals_data);
+	Py_END_ALLOW_THREADS
+	config->n_busy--;
+	release_sample(&v);
+
+	partition_free(*partition);
+	*partition = work;
+
+	counters->adaptive_calls++;
+	counters->omega_integrals += config->n_omegas;
+	for (int i = 0; i < config->n_omegas; i++)
+		counters->integrand_evals += n_evals_data[i];
+	return Py_BuildValue("NNN", result, errs, n_evals);
 }
 
 
@@ -200,100 +522,418 @@ static PyObject *OGC_Integral_Der(PyObject* self, PyObject *args)
 INITIALIZER FUNCTIONS
 ----------------------------------------------------------------------------------------------------
 */
-static PyObject *BT_Set(PyObject *self, PyObject *args)
+static int bt_set_Py(Config *config, PyObject *args)
 {
 	PyArrayObject *omegas_Py;
 	double lambda_i_, lambda_f_;
+	Config new_config = { 0 };
 	if (!PyArg_ParseTuple(args,"O!dddic",
 												&PyArray_Type,
 												&omegas_Py,
-												&HALF_WIDTH,
+												&new_config.half_width,
 												&lambda_i_,
 												&lambda_f_,
-												&n_LAYERS,
-												&boundary_type_)) {
+												&new_config.n_layers,
+												&new_config.boundary_type)) {
 		PyErr_SetString(BT_SetArgsError, ARGS_ERROR_MSG);
-		return NULL;
+		return -1;
 	}
 
-	if (n_LAYERS <= 0 || n_LAYERS > MAX_n_LAYERS) {
-		PyErr_SetString(n_LAYERS_Error, n_LAYERS_Error_MSG);
-		return NULL;
-	}
+	if (set_domain(&new_config, omegas_Py, lambda_i_, lambda_f_))
+		return -1;
 
-	n_OMEGAS = PyArray_Size((PyObject *) omegas_Py);
-	if (n_OMEGAS <= 0 || n_OMEGAS > MAX_n_OMEGAS) {
-		PyErr_SetString(n_OMEGAS_Error, n_OMEGAS_Error_MSG);
-		return NULL;
-	}
-
-	npy_intp start_index = 0;
-	OMEGAS = PyArray_GetPtr(omegas_Py, &start_index); // global
-	if (OMEGAS == NULL) {
-		PyErr_SetString(NullOmegasError, NullOmegasError_MSG);
-		return NULL;
+	if (check_idle(config)) {
+		config_free(&new_config);
+		return -1;
 	}
-	Py_INCREF(omegas_Py);
-
-	make_logspace(LAMBDAS, lambda_i_, lambda_f_, N_XPTS);
-	BT_PARAMS_SET = 1;
-	Py_RETURN_NONE;
+	new_config.is_set = 1;
+	new_config.n_threads = config->n_threads;
+	config_free(config);
+	*config = new_config;
+	return 0;
 }
 
 
-static PyObject *OGC_Set(PyObject *self, PyObject *args)
+static int ogc_set_Py(Config *config, FixedCache *cache, PyObject *args)
 {
 	PyArrayObject *omegas_Py;
 	PyObject *param_ids_Py;
 	double chi_i_, chi_f_;
+	Config new_config = { 0 };
 	if (!PyArg_ParseTuple(args,"O!Odddi",
 												&PyArray_Type,
 												&omegas_Py,
 												&param_ids_Py,
-												&HALF_WIDTH,
+												&new_config.half_width,
 												&chi_i_,
 												&chi_f_,
-												&n_LAYERS)) {
+												&new_config.n_layers)) {
 		PyErr_SetString(OGC_SetArgsError, ARGS_ERROR_MSG);
-		return NULL;
+		return -1;
 	}
 
-	if (n_LAYERS <= 0 || n_LAYERS > MAX_n_LAYERS) {
-		PyErr_SetString(n_LAYERS_Error, n_LAYERS_Error_MSG);
+	if (set_domain(&new_config, omegas_Py, chi_i_, chi_f_))
+		return -1;
+
+	// any sequence of (parameter index, layer index) pairs of integers
+	PyObject *param_ids_seq = PySequence_Fast(param_ids_Py, "");
+	if (param_ids_seq == NULL) {
+		config_free(&new_config);
+		PyErr_SetString(OGC_SetArgsError, PARAM_IDS_ERROR_MSG);
+		return -1;
+	}
+	Py_ssize_t n_params = PySequence_Fast_GET_SIZE(param_ids_seq);
+	if (n_params > 4 * (Py_ssize_t) new_config.n_layers) {
+		Py_DECREF(param_ids_seq);
+		config_free(&new_config);
+		PyErr_SetString(ParameterIDError, ParameterIDError_MSG);
+		return -1;
+	}
+	new_config.n_params = (int) n_params;
+	new_config.param_ids = malloc((n_params > 0 ? n_params : 1) * sizeof(*new_config.param_ids));
+	if (new_config.param_ids == NULL) {
+		Py_DECREF(param_ids_seq);
+		config_free(&new_config);
+		PyErr_NoMemory();
+		return -1;
+	}
+
+	int n_top = 0;  // down to the deepest fitted layer; the layers below are fixed
+	for (int n = 0; n < new_config.n_params; n++) {
+		PyObject *pair = PySequence_Fast(PySequence_Fast_GET_ITEM(param_ids_seq, n), "");
+		int valid = pair != NULL && PySequence_Fast_GET_SIZE(pair) == 2;
+		for (int j = 0; valid && j < 2; j++) {
+			long index = PyLong_AsLong(PySequence_Fast_GET_ITEM(pair, j));
+			valid = !(index == -1 && PyErr_Occurred()) && index >= INT_MIN && index <= INT_MAX;
+			new_config.param_ids[n][j] = (int) index;
+		}
+		Py_XDECREF(pair);
+		if (!valid) {
+			Py_DECREF(param_ids_seq);
+			config_free(&new_config);
+			PyErr_Clear();
+			PyErr_SetString(OGC_SetArgsError, PARAM_IDS_ERROR_MSG);
+			return -1;
+		}
+
+		if (new_config.param_ids[n][0] < 0 || new_config.param_ids[n][0] > 3
+				|| new_config.param_ids[n][1] < 0
+				|| new_config.param_ids[n][1] >= new_config.n_layers) {
+			Py_DECREF(param_ids_seq);
+			config_free(&new_config);
+			PyErr_SetString(ParameterIDError, ParameterIDError_MSG);
+			return -1;
+		}
+		if (new_config.param_ids[n][1] + 1 > n_top)
+			n_top = new_config.param_ids[n][1] + 1;
+	}
+	Py_DECREF(param_ids_seq);
+
+	FixedLayers new_fixed;
+	if (fixed_layers_alloc(&new_fixed, &new_config, n_top)) {
+		config_free(&new_config);
+		PyErr_NoMemory();
+		return -1;
+	}
+
+	// the configuration and the cache sized for it are replaced together, holding the cache
+	// and the GIL throughout, so no call sees one without the other
+	if (check_idle(config) || !PyThread_acquire_lock(cache->lock, NOWAIT_LOCK)) {
+		if (!PyErr_Occurred())
+			PyErr_SetString(PyExc_RuntimeError, BUSY_ERROR_MSG);
+		fixed_layers_free(&new_fixed);
+		config_free(&new_config);
+		return -1;
+	}
+	new_config.is_set = 1;
+	new_config.n_threads = config->n_threads;
+	config_free(config);
+	*config = new_config;
+	new_fixed.n_refreshes = cache->layers.n_refreshes;
+	fixed_layers_free(&cache->layers);
+	cache->layers = new_fixed;
+	PyThread_release_lock(cache->lock);
+	return 0;
+}
+
+
+static int parse_threads(PyObject *args)
+{
+	/* thread count for the ω loops; 0 means all available. Returns -1 with an exception set. */
+	int n_threads;
+	if (!PyArg_ParseTuple(args, "i", &n_threads))
+		return -1;
+	if (n_threads < 0) {
+		PyErr_SetString(PyExc_ValueError, "number of threads must be non-negative");
+		return -1;
+	}
+	return n_threads == 0 ? max_threads() : n_threads;
+}
+
+
+/*
+----------------------------------------------------------------------------------------------------
+MODULE-LEVEL FUNCTIONS (share a single configuration per model)
+----------------------------------------------------------------------------------------------------
+*/
+static PyObject *BT_Set(PyObject *self, PyObject *args)
+{
+	if (bt_set_Py(&BT_CONFIG, args))
+		return NULL;
+	Py_RETURN_NONE;
+}
+
+
+static PyObject *OGC_Set(PyObject *self, PyObject *args)
+{
+	if (ogc_set_Py(&OGC_CONFIG, &OGC_FIXED, args))
 		return NULL;
+	Py_RETURN_NONE;
+}
+
+
+static PyObject *Set_Threads(PyObject *self, PyObject *args)
+{
+	int n_threads = parse_threads(args);
+	if (n_threads < 0)
+		return NULL;
+	BT_CONFIG.n_threads = n_threads;
+	OGC_CONFIG.n_threads = n_threads;
+	Py_RETURN_NONE;
+}
+
+
+static PyObject *Max_Threads(PyObject *self, PyObject *Py_UNUSED(args))
+{
+	return PyLong_FromLong(max_threads());
+}
+
+
+static PyObject *Get_Counters(PyObject *self, PyObject *Py_UNUSED(args))
+{
+	return counters_dict(&COUNTERS, &OGC_FIXED.layers);
+}
+
+
+static PyObject *Reset_Counters(PyObject *self, PyObject *Py_UNUSED(args))
+{
+	COUNTERS = (Counters) { 0 };
+	OGC_FIXED.layers.n_refreshes = 0;
+	Py_RETURN_NONE;
+}
+
+
+static PyObject *BT_Integral(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+	return bt_integral_Py(&BT_CONFIG, &COUNTERS, args, kwargs);
+}
+
+
+static PyObject *OGC_Integral(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+	return ogc_integral_Py(&OGC_CONFIG, &OGC_FIXED, &COUNTERS, args, kwargs);
+}
+
+
+static PyObject *OGC_Integral_Batch(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+	return ogc_integral_batch_Py(&OGC_CONFIG, &OGC_FIXED, &COUNTERS, args, kwargs);
+}
+
+
+static PyObject *OGC_Integral_Der(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+	return ogc_jacobian_Py(&OGC_CONFIG, &OGC_FIXED, &COUNTERS, args, kwargs);
+}
+
+
+/*
+----------------------------------------------------------------------------------------------------
+INTEGRATOR TYPE (one configuration per instance)
+----------------------------------------------------------------------------------------------------
+*/
+typedef struct {
+	PyObject_HEAD
+	Config bt;
+	Config ogc;
+	FixedCache ogc_fixed;      // recursion through the layers below the fitted ones
+	Partition *bt_partition;   // adaptive quadrature panels from the last call
+	Partition *ogc_partition;
+	Counters counters;
+} IntegratorObject;
+
+
+static PyObject *Integrator_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+	IntegratorObject *self = (IntegratorObject *) type->tp_alloc(type, 0);
+	if (self != NULL) {
+		self->bt = (Config) { .n_threads = 1 };
+		self->ogc = (Config) { .n_threads = 1 };
+		self->ogc_fixed = (FixedCache) { .lock = PyThread_allocate_lock() };
+		self->bt_partition = NULL;
+		self->ogc_partition = NULL;
+		self->counters = (Counters) { 0 };
+		if (self->ogc_fixed.lock == NULL) {
+			Py_DECREF(self);
+			return PyErr_NoMemory();
+		}
 	}
+	return (PyObject *) self;
+}
 
-	n_OMEGAS = PyArray_Size((PyObject *) omegas_Py);
-	if (n_OMEGAS <= 0 || n_OMEGAS > MAX_n_OMEGAS) {
-		PyErr_SetString(n_OMEGAS_Error, n_OMEGAS_Error_MSG);
+
+static void Integrator_dealloc(IntegratorObject *self)
+{
+	config_free(&self->bt);
+	config_free(&self->ogc);
+	fixed_layers_free(&self->ogc_fixed.layers);
+	if (self->ogc_fixed.lock != NULL)
+		PyThread_free_lock(self->ogc_fixed.lock);
+	partition_free(self->bt_partition);
+	partition_free(self->ogc_partition);
+	Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+
+static PyObject *Integrator_bt_set(IntegratorObject *self, PyObject *args)
+{
+	if (bt_set_Py(&self->bt, args))
+		return NULL;
+	partition_free(self->bt_partition);
+	self->bt_partition = NULL;
+	Py_RETURN_NONE;
+}
+
+
+static PyObject *Integrator_ogc_set(IntegratorObject *self, PyObject *args)
+{
+	if (ogc_set_Py(&self->ogc, &self->ogc_fixed, args))
+		return NULL;
+	partition_free(self->ogc_partition);
+	self->ogc_partition = NULL;
+	Py_RETURN_NONE;
+}
+
+
+static PyObject *Integrator_set_threads(IntegratorObject *self, PyObject *args)
+{
+	int n_threads = parse_threads(args);
+	if (n_threads < 0)
+		return NULL;
+	self->bt.n_threads = n_threads;
+	self->ogc.n_threads = n_threads;
+	Py_RETURN_NONE;
+}
+
+
+static PyObject *Integrator_bt_integral(IntegratorObject *self, PyObject *args,
+																				PyObject *kwargs)
+{
+	return bt_integral_Py(&self->bt, &self->counters, args, kwargs);
+}
+
+
+static PyObject *Integrator_ogc_integral(IntegratorObject *self, PyObject *args,
+																				 PyObject *kwargs)
+{
+	return ogc_integral_Py(&self->ogc, &self->ogc_fixed, &self->counters, args, kwargs);
+}
+
+
+static PyObject *Integrator_ogc_integral_batch(IntegratorObject *self, PyObject *args,
+																							 PyObject *kwargs)
+{
+	return ogc_integral_batch_Py(&self->ogc, &self->ogc_fixed, &self->counters, args, kwargs);
+}
+
+
+static PyObject *Integrator_ogc_jacobian(IntegratorObject *self, PyObject *args,
+																				 PyObject *kwargs)
+{
+	return ogc_jacobian_Py(&self->ogc, &self->ogc_fixed, &self->counters, args, kwargs);
+}
+
+
+static PyObject *Integrator_bt_integral_adaptive(IntegratorObject *self, PyObject *args)
+{
+	if (!self->bt.is_set) {
+		PyErr_SetString(BT_NotSetError, BT_NotSetError_MSG);
 		return NULL;
 	}
+	return integral_adaptive_Py(&self->bt, &self->bt_partition, &self->counters, args, 0,
+															BT_IntegralError, bt_integral_adaptive);
+}
 
-	npy_intp start_index = 0;
-	OMEGAS = PyArray_GetPtr(omegas_Py, &start_index); // global
-	if (OMEGAS == NULL) {
-		PyErr_SetString(NullOmegasError, NullOmegasError_MSG);
+
+static PyObject *Integrator_ogc_integral_adaptive(IntegratorObject *self, PyObject *args)
+{
+	if (!self->ogc.is_set) {
+		PyErr_SetString(OGC_NotSetError, OGC_NotSetError_MSG);
 		return NULL;
 	}
-	Py_INCREF(omegas_Py);
+	return integral_adaptive_Py(&self->ogc, &self->ogc_partition, &self->counters, args, 1,
+															OGC_IntegralError, ogc_integral_adaptive);
+}
 
-	n_PARAMS = PyObject_Length(param_ids_Py);
-	for (int n = 0; n < n_PARAMS; n++) {
-		PyObject *param_id_Py = PyList_GetItem(param_ids_Py, n);
 
-		PyObject *i_param = PyTuple_GetItem(param_id_Py, 0);
-		param_ids_[n][0] = (int) PyLong_AsLong(i_param);
+static PyObject *Integrator_counters(IntegratorObject *self, PyObject *Py_UNUSED(args))
+{
+	return counters_dict(&self->counters, &self->ogc_fixed.layers);
+}
 
-		PyObject *i_layer = PyTuple_GetItem(param_id_Py, 1);  // layer index
-		param_ids_[n][1] = (int) PyLong_AsLong(i_layer);
-	}
 
-	make_logspace(CHIS, chi_i_, chi_f_, N_XPTS);
-	OGC_PARAMS_SET = 1;
+static PyObject *Integrator_reset_counters(IntegratorObject *self, PyObject *Py_UNUSED(args))
+{
+	self->counters = (Counters) { 0 };
+	self->ogc_fixed.layers.n_refreshes = 0;
 	Py_RETURN_NONE;
 }
 
 
+static PyMethodDef Integrator_Methods[] = {
+	{"bt_set", (PyCFunction) Integrator_bt_set, METH_VARARGS,
+	 "mandatory initializer method"},
+	{"ogc_set", (PyCFunction) Integrator_ogc_set, METH_VARARGS,
+	 "mandatory initializer method"},
+	{"set_threads", (PyCFunction) Integrator_set_threads, METH_VARARGS,
+	 "sets the number of threads used across frequencies (0 for all available)"},
+	{"bt_integral", (PyCFunction) (void (*)(void)) Integrator_bt_integral, METH_VARARGS | METH_KEYWORDS,
+	 "computes the integral term in Borca-Tascuic Eq. (1)"},
+	{"ogc_integral", (PyCFunction) (void (*)(void)) Integrator_ogc_integral, METH_VARARGS | METH_KEYWORDS,
+	 "computes the entire integral in OGC Eq. (4)"},
+	{"ogc_integral_batch", (PyCFunction) (void (*)(void)) Integrator_ogc_integral_batch, METH_VARARGS | METH_KEYWORDS,
+	 "ogc_integral for each row of (M x n_layers) parameter arrays; returns (M x n_omegas)"},
+	{"ogc_jacobian", (PyCFunction) (void (*)(void)) Integrator_ogc_jacobian, METH_VARARGS | METH_KEYWORDS,
+	 "computes Jacobian of integral in OGC Eq. (4)"},
+	{"bt_integral_adaptive", (PyCFunction) Integrator_bt_integral_adaptive, METH_VARARGS,
+	 "bt_integral to a relative tolerance; returns (integral, error, evaluations)"},
+	{"ogc_integral_adaptive", (PyCFunction) Integrator_ogc_integral_adaptive, METH_VARARGS,
+	 "ogc_integral to a relative tolerance; returns (integral, error, evaluations)"},
+	{"counters", (PyCFunction) Integrator_counters, METH_NOARGS,
+	 "dict of evaluation counts since creation or `reset_counters`"},
+	{"reset_counters", (PyCFunction) Integrator_reset_counters, METH_NOARGS,
+	 "sets the evaluation counts to zero"},
+	{NULL, NULL, 0, NULL}
+};
+
+
+static PyTypeObject IntegratorType = {
+	PyVarObject_HEAD_INIT(NULL, 0)
+	.tp_name = "integrate.Integrator",
+	.tp_doc = "Integrator with its own configuration; releases the GIL while integrating.\n\n"
+						"Results are new arrays. Re-`set`ting an instance while another thread\n"
+						"is integrating with it raises RuntimeError. The OGC recursion through the layers below the\n"
+						"deepest fitted one is cached; a call that finds the cache in use by\n"
+						"another thread integrates in full instead.",
+	.tp_basicsize = sizeof(IntegratorObject),
+	.tp_itemsize = 0,
+	.tp_flags = Py_TPFLAGS_DEFAULT,
+	.tp_new = Integrator_new,
+	.tp_dealloc = (destructor) Integrator_dealloc,
+	.tp_methods = Integrator_Methods,
+};
+
+
 /*
 ----------------------------------------------------------------------------------------------------
 MODULE DEFINITIONS
@@ -302,9 +942,23 @@ MODULE DEFINITIONS
 static PyMethodDef Integrate_FunctionsTable[] = {
 	{"bt_set", BT_Set, METH_VARARGS, "mandatory initializer method"},
 	{"ogc_set", OGC_Set, METH_VARARGS, "mandatory initializer method"},
-	{"bt_integral", BT_Integral, METH_VARARGS, "computes the integral term in Borca-Tascuic Eq. (1)"},
-	{"ogc_integral", OGC_Integral, METH_VARARGS, "computes the entire integral in OGC Eq. (4)"},
-	{"ogc_jacobian", OGC_Integral_Der, METH_VARARGS, "computes Jacobian of integral in OGC Eq. (4)"},
+	{"bt_integral", (PyCFunction) (void (*)(void)) BT_Integral, METH_VARARGS | METH_KEYWORDS,
+	 "computes the integral term in Borca-Tascuic Eq. (1)"},
+	{"ogc_integral", (PyCFunction) (void (*)(void)) OGC_Integral, METH_VARARGS | METH_KEYWORDS,
+	 "computes the entire integral in OGC Eq. (4)"},
+	{"ogc_integral_batch", (PyCFunction) (void (*)(void)) OGC_Integral_Batch,
+	 METH_VARARGS | METH_KEYWORDS,
+	 "ogc_integral for each row of (M x n_layers) parameter arrays; returns (M x n_omegas)"},
+	{"ogc_jacobian", (PyCFunction) (void (*)(void)) OGC_Integral_Der, METH_VARARGS | METH_KEYWORDS,
+	 "computes Jacobian of integral in OGC Eq. (4)"},
+	{"set_threads", Set_Threads, METH_VARARGS,
+	 "sets the number of threads used across frequencies (0 for all available)"},
+	{"max_threads", Max_Threads, METH_NOARGS,
+	 "number of threads available to the integrals (1 if built without OpenMP)"},
+	{"counters", Get_Counters, METH_NOARGS,
+	 "dict of evaluation counts of the module-level functions since import or `reset_counters`"},
+	{"reset_counters", Reset_Counters, METH_NOARGS,
+	 "sets the evaluation counts of the module-level functions to zero"},
 	{NULL, NULL, 0, NULL}
 };
 
@@ -322,7 +976,26 @@ PyMODINIT_FUNC PyInit_integrate(void) {
 	import_array();
 	init_exceptions();
 
-	BT_PARAMS_SET = 0;
-	OGC_PARAMS_SET = 0;
-	return PyModule_Create(&Integrate_Module);
+	BT_CONFIG.is_set = 0;
+	OGC_CONFIG.is_set = 0;
+	BT_CONFIG.n_threads = 1;
+	OGC_CONFIG.n_threads = 1;
+	OGC_FIXED.lock = PyThread_allocate_lock();
+	if (OGC_FIXED.lock == NULL)
+		return PyErr_NoMemory();
+
+	if (PyType_Ready(&IntegratorType) < 0)
+		return NULL;
+
+	PyObject *module = PyModule_Create(&Integrate_Module);
+	if (module == NULL)
+		return NULL;
+
+	Py_INCREF(&IntegratorType);
+	if (PyModule_AddObject(module, "Integrator", (PyObject *) &IntegratorType) < 0) {
+		Py_DECREF(&IntegratorType);
+		Py_DECREF(module);
+		return NULL;
+	}
+	return module;
 };
@@ -1,31 +1,100 @@
+#ifndef INTEGRATE_H
+#define INTEGRATE_H
+
 #include <math.h>
 #include <complex.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 
-#define MAX_n_LAYERS 10
-#define MAX_n_OMEGAS 150
 #define N_XPTS       200  // number of x sample points for integrations
 
+// adaptive quadrature: initial and maximum number of Gauss-Kronrod panels per ω
+#define N_PANELS_INIT 4
+#define MAX_n_PANELS  128
+
+
+// integrator configuration (set from Python side by a `set` method)
+typedef struct {
+	int is_set;                       // `set` method called successfully
+
+	// measurement domain; array of angular frequencies
+	int n_omegas;
+	double *omegas;                   // [n_omegas], owned
+
+	// integration variable sample points (χ for OGC, λ for BT)
+	double xs[N_XPTS];
+
+	int n_layers;                     // number of layers
+	double half_width;                // heater half-width
+	char boundary_type;               // substrate boundary type (BT only)
+
+	int n_params;                     // number of fitting parameters (OGC only)
+	int (*param_ids)[2];              // [n_params] (parameter index, layer index) pairs, owned
+
+	int n_threads;                    // threads sharing the loop over ω (kept across `set` calls)
+	int n_busy;                       // calls integrating with this configuration right now
+} Config;
+
+
+// sample parameters for one evaluation of an integral
+typedef struct {
+	int n_layers;
+	double half_width;
+	char boundary_type;
 
-// measurement domain; array of angular frequencies
-const double *OMEGAS;
-int n_OMEGAS;
+	// 5 layer parameters in general; each [n_layers], views of the caller's arrays
+	double *ds;    // heights
+	double *psis;  // (x/y)-thermal conductivity ratio
+	double *kys;   // y-thermal conductivity
+	double *Cvs;   // heat capacities
+	double *Rcs;   // thermal contact resistances (NULL for BT)
+} Sample;
+
+
+// the OGC recursion (Eq. 5) through the layers below the deepest fitted one, on the (ω, χ)
+// grid; it depends only on those layers' parameters, so it is kept while they do not change
+typedef struct {
+	int n_top;            // number of layers from the top down to the deepest fitted one
+	int is_valid;         // `zs` is computed for `params`
+	double *params;       // [5][n_layers - n_top] (d, ψ, ky, Cv, Rc) of the fixed layers, owned
+	double complex *zs;   // [n_omegas][N_XPTS] z of layer `n_top`, owned; NULL if none is fixed
+	long long n_refreshes;  // number of times `zs` was computed
+} FixedLayers;
+
+
+// panel boundaries in log(x) for each ω; the end state of one adaptive integration
+// is the starting partition of the next one
+typedef struct {
+	int n_omegas;
+	int *n_panels;   // [n_omegas]
+	double *bounds;  // [n_omegas][MAX_n_PANELS + 1]
+} Partition;
+
+#define PARTITION_BOUNDS(p, i) ((p)->bounds + (size_t) (i) * (MAX_n_PANELS + 1))
+
+
+// number of threads available to the ω loops (1 without OpenMP)
+int max_threads(void);
+
+
+// heap helpers; `fixed_layers_alloc` returns -1 (with nothing allocated) on failure
+void config_free(Config *config);
+int fixed_layers_alloc(FixedLayers *fixed, const Config *config, int n_top);
+void fixed_layers_free(FixedLayers *fixed);
+Partition *partition_new(int n_omegas);
+void partition_copy(Partition *dst, const Partition *src);
+void partition_free(Partition *p);
 
-// maximum number of fitting parameters (for either method)
-static const int MAX_n_PARAMS = 4 * MAX_n_LAYERS;
 
 // utility functions
 void make_logspace(double *arr, double min, double max, int size);
 double sinc_sq(double x);
-double complex *omega_trapz(double complex (*fp)(double,double), double *xs, double complex *Fs);
-double complex val_trapz(double complex *fs, double *xs);
-
-// sample parameters (set from Python side)
-int n_LAYERS;       // number of layers
-double HALF_WIDTH;  // heater half-width
-
-// 5 layer parameters in general
-double ds_[MAX_n_LAYERS];   // heights
-double psis_[MAX_n_LAYERS];  // (x/y)-thermal conductivity ratio
-double kys_[MAX_n_LAYERS];  // y-thermal conductivity
-double Cvs_[MAX_n_LAYERS];  // heat capacities
-double Rcs_[MAX_n_LAYERS];  // thermal contact resistances
+void omega_trapz(double complex (*fp)(const Sample *, double, double),
+								 const Sample *sample, const Config *config, double complex *Fs);
+void omega_adaptive(double complex (*fp)(const Sample *, double, double),
+										const Sample *sample, const Config *config, double tol,
+										const Partition *start, Partition *end,
+										double complex *Fs, double *errs, int *n_evals);
+
+#endif
@@ -1,6 +1,6 @@
+#include <stdlib.h>
 #include "integrate.h"
 #include "olson_graham_chen.h"
-#include "exceptions.h"
 
 
 // =================================================================================================
@@ -11,19 +11,20 @@
 // ================================================================================================
 
 
-void fXis(double chi, double omega)
+void fXis(const Sample *s, OGC_Point *p)
 {
-	/* OGC Eq. (11); for all layers at (χ,ω) */
-	int i_layer = n_LAYERS - 1;
-	Xis_[i_layer] = 0.0*I;
-
-	i_layer--;
+	/* OGC Eq. (11); for the top `n_top` layers at (χ,ω) */
+	int i_layer = p->n_top - 1;
+	if (p->n_top == s->n_layers) {
+		p->Xis[i_layer] = 0.0*I;
+		i_layer--;
+	}
 	while (i_layer >= 0) {
-		double complex kPhi_b = kys_[i_layer] * Phis_[i_layer] / HALF_WIDTH;
+		double complex kPhi_b = s->kys[i_layer] * p->Phis[i_layer] / s->half_width;
 		double complex kPhi_b_sq = kPhi_b * kPhi_b;
-		double complex z_i = zs_[i_layer];
-		double complex z_tilde = zs_[i_layer+1] - Rcs_[i_layer+1];
-		Xis_[i_layer] = (1.0 - kPhi_b_sq * z_i * z_i) / (1.0 - kPhi_b_sq * z_tilde * z_tilde);
+		double complex z_i = p->zs[i_layer];
+		double complex z_tilde = p->zs[i_layer+1] - s->Rcs[i_layer+1];
+		p->Xis[i_layer] = (1.0 - kPhi_b_sq * z_i * z_i) / (1.0 - kPhi_b_sq * z_tilde * z_tilde);
 		i_layer--;
 	}
 }
@@ -32,193 +33,239 @@ void fXis(double chi, double omega)
 // ================================================================================================
 
 
-double complex *fdz0_dky(double c, double o)
+void fdz0_dky(const Sample *s, const OGC_Point *p, double complex *dz0_dky)
 {
-	/* OGC Eq. (12); for all layers at (χ,ω) */
-	int i_layer = n_LAYERS - 1;
+	/* OGC Eq. (12); for the top `n_top` layers at (χ,ω) */
+	const double complex *Xis = p->Xis;
+	const double complex *zs = p->zs;
+	int i_layer = p->n_top - 1;
 
-	dz0_dky_[i_layer] = 1.0 / kys_[i_layer] + 0.0*I;
+	if (p->n_top == s->n_layers) {
+		dz0_dky[i_layer] = 1.0 / s->kys[i_layer] + 0.0*I;
 
-	for (int j = i_layer-1; j >= 0; j--)
-		dz0_dky_[i_layer] *= Xis_[j];
-	dz0_dky_[i_layer] *= -zs_[i_layer];  // z_tilde is 0 for substrate
+		for (int j = i_layer-1; j >= 0; j--)
+			dz0_dky[i_layer] *= Xis[j];
+		dz0_dky[i_layer] *= -zs[i_layer];  // z_tilde is 0 for substrate
 
-	i_layer--;
+		i_layer--;
+	}
 	while (i_layer >= 0) {
-		dz0_dky_[i_layer] = 1.0 / kys_[i_layer] + 0.0*I;
+		dz0_dky[i_layer] = 1.0 / s->kys[i_layer] + 0.0*I;
 		for (int j = i_layer-1; j >= 0; j--)
-			dz0_dky_[i_layer] *= Xis_[j];
+			dz0_dky[i_layer] *= Xis[j];
 
-		double complex z_tilde = zs_[i_layer+1] - Rcs_[i_layer+1];
-		dz0_dky_[i_layer] *= (Xis_[i_layer]*z_tilde - zs_[i_layer]);
+		double complex z_tilde = zs[i_layer+1] - s->Rcs[i_layer+1];
+		dz0_dky[i_layer] *= (Xis[i_layer]*z_tilde - zs[i_layer]);
 		i_layer--;
 	}
-	return dz0_dky_;
+
+	/*
+	Eq. (12) holds the diffusivity α = ky/Cv fixed, but Cv is the independent parameter here
+
+	Note: dz/dky|Cv = dz/dky|α + dz/dα * dα/dky = dz/dky|α - (Cv / ky) * dz/dCv
+	*/
+	double complex dz0_dCv[s->n_layers];
+	fdz0_dCv(s,p,dz0_dCv);
+	for (int j = 0; j < p->n_top; j++)
+		dz0_dky[j] -= s->Cvs[j] / s->kys[j] * dz0_dCv[j];
 }
 
 
-double complex *fdz0_dCv(double chi, double omega)
+void fdz0_dCv(const Sample *s, const OGC_Point *p, double complex *dz0_dCv)
 {
 	/*
-	OGC Eq. (13); for all layers at (χ,ω)
+	OGC Eq. (13); for the top `n_top` layers at (χ,ω)
 
 	Note: dz/dCv = dz/da * da/dCv = (-ky / Cv^2) * dz/da
 	*/
 
-	int i_layer = n_LAYERS - 1;
+	const double complex *Xis = p->Xis;
+	const double complex *zs = p->zs;
+	int i_layer = p->n_top - 1;
 
-	const double b = HALF_WIDTH;
-	double ky = kys_[i_layer];
-	double Cv = Cvs_[i_layer];
-	double d = ds_[i_layer];
+	const double b = s->half_width;
+	const double omega = p->omega;
+	double ky;
+	double Cv;
+	double d;
 	double complex z;
 	double complex P;
 	double complex alphaPhi;
 
-	dz0_dCv_[i_layer] = -ky / (Cv * Cv);  // chain rule factor
+	if (p->n_top == s->n_layers) {
+		ky = s->kys[i_layer];
+		Cv = s->Cvs[i_layer];
+		d = s->ds[i_layer];
+		dz0_dCv[i_layer] = -ky / (Cv * Cv);  // chain rule factor
 
-	for (int j = i_layer-1; j >= 0; j--)
-		dz0_dCv_[i_layer] *= Xis_[j];
+		for (int j = i_layer-1; j >= 0; j--)
+			dz0_dCv[i_layer] *= Xis[j];
 
-	P = Phis_[i_layer];
-	alphaPhi = ky * P / Cv;
-	dz0_dCv_[i_layer] *= -I*omega*b*b / (alphaPhi*alphaPhi);
+		P = p->Phis[i_layer];
+		alphaPhi = ky * P / Cv;
+		dz0_dCv[i_layer] *= -I*omega*b*b / (alphaPhi*alphaPhi);
 
-	z = zs_[i_layer];
-	dz0_dCv_[i_layer] *= d/ky * (z*z*ky*ky*P*P/(b*b) - 1.0) - z;
+		z = zs[i_layer];
+		dz0_dCv[i_layer] *= d/ky * (z*z*ky*ky*P*P/(b*b) - 1.0) - z;
 
-	i_layer--;
+		i_layer--;
+	}
 	while (i_layer >= 0) {
-		ky = kys_[i_layer];
-		Cv = Cvs_[i_layer];
-		d = ds_[i_layer];
-		dz0_dCv_[i_layer] = -ky / (Cv * Cv);
+		ky = s->kys[i_layer];
+		Cv = s->Cvs[i_layer];
+		d = s->ds[i_layer];
+		dz0_dCv[i_layer] = -ky / (Cv * Cv);
 
 		for (int j = i_layer-1; j >= 0; j--)
-			dz0_dCv_[i_layer] *= Xis_[j];
+			dz0_dCv[i_layer] *= Xis[j];
 
-		P = Phis_[i_layer];
+		P = p->Phis[i_layer];
 		alphaPhi = ky * P / Cv;
-		dz0_dCv_[i_layer] *= -I*omega*b*b / (alphaPhi*alphaPhi);
+		dz0_dCv[i_layer] *= -I*omega*b*b / (alphaPhi*alphaPhi);
 
-		z = zs_[i_layer];
-		double complex z_tilde = zs_[i_layer+1] - Rcs_[i_layer+1];
-		dz0_dCv_[i_layer] *= d/ky * (z*z*ky*ky*P*P/(b*b) - 1.0) + Xis_[i_layer]*z_tilde - z;
+		z = zs[i_layer];
+		double complex z_tilde = zs[i_layer+1] - s->Rcs[i_layer+1];
+		dz0_dCv[i_layer] *= d/ky * (z*z*ky*ky*P*P/(b*b) - 1.0) + Xis[i_layer]*z_tilde - z;
 		i_layer--;
 	}
-	return dz0_dCv_;
 }
 
 
 
-double complex *fdz0_dpsi(double chi, double omega)
+void fdz0_dpsi(const Sample *s, const OGC_Point *p, double complex *dz0_dpsi)
 {
-	/* OGC Eq. (14); for all layers at (χ,ω) */
+	/* OGC Eq. (14); for the top `n_top` layers at (χ,ω) */
 
-	int i_layer = n_LAYERS - 1;
+	const double complex *Xis = p->Xis;
+	const double complex *zs = p->zs;
+	int i_layer = p->n_top - 1;
 
-	const double b = HALF_WIDTH;
-	double ky = kys_[i_layer];
-	double Cv = Cvs_[i_layer];
-	double d = ds_[i_layer];
+	const double b = s->half_width;
+	const double chi = p->chi;
+	double ky;
+	double d;
 	double complex z;
 	double complex P;
 
-	dz0_dpsi_[i_layer] = 1.0;  // chain rule factor
+	if (p->n_top == s->n_layers) {
+		ky = s->kys[i_layer];
+		d = s->ds[i_layer];
+		dz0_dpsi[i_layer] = 1.0;  // chain rule factor
 
-	for (int j = i_layer-1; j >= 0; j--)
-		dz0_dpsi_[i_layer] *= Xis_[j];
+		for (int j = i_layer-1; j >= 0; j--)
+			dz0_dpsi[i_layer] *= Xis[j];
 
-	P = Phis_[i_layer];
-	dz0_dpsi_[i_layer] *= chi*chi/(2.0*P*P);
+		P = p->Phis[i_layer];
+		dz0_dpsi[i_layer] *= chi*chi/(2.0*P*P);
 
-	z = zs_[i_layer];
-	dz0_dpsi_[i_layer] *= d/ky * (z*z*ky*ky*P*P/(b*b) - 1.0) - z;
+		z = zs[i_layer];
+		dz0_dpsi[i_layer] *= d/ky * (z*z*ky*ky*P*P/(b*b) - 1.0) - z;
 
-	i_layer--;
+		i_layer--;
+	}
 	while (i_layer >= 0) {
-		ky = kys_[i_layer];
-		Cv = Cvs_[i_layer];
-		d = ds_[i_layer];
-		dz0_dpsi_[i_layer] = 1.0;
+		ky = s->kys[i_layer];
+		d = s->ds[i_layer];
+		dz0_dpsi[i_layer] = 1.0;
 
 		for (int j = i_layer-1; j >= 0; j--)
-			dz0_dpsi_[i_layer] *= Xis_[j];
+			dz0_dpsi[i_layer] *= Xis[j];
 
-		P = Phis_[i_layer];
-		dz0_dpsi_[i_layer] *=  chi*chi/(2.0*P*P);
+		P = p->Phis[i_layer];
+		dz0_dpsi[i_layer] *=  chi*chi/(2.0*P*P);
 
-		z = zs_[i_layer];
-		double complex z_tilde = zs_[i_layer+1] - Rcs_[i_layer+1];
-		dz0_dpsi_[i_layer] *= d/ky * (z*z*ky*ky*P*P/(b*b) - 1.0) + Xis_[i_layer]*z_tilde - z;
+		z = zs[i_layer];
+		double complex z_tilde = zs[i_layer+1] - s->Rcs[i_layer+1];
+		dz0_dpsi[i_layer] *= d/ky * (z*z*ky*ky*P*P/(b*b) - 1.0) + Xis[i_layer]*z_tilde - z;
 		i_layer--;
 	}
-	return dz0_dpsi_;
 }
 
 
-double complex *fdz0_dRc(double c, double o)
+void fdz0_dRc(const Sample *s, const OGC_Point *p, double complex *dz0_dRc)
 {
-	/* OGC Eq. (15); for all layers at (χ,ω) */
-	int i_layer = n_LAYERS - 1;
+	/* OGC Eq. (15); for the top `n_top` layers at (χ,ω) */
+	int i_layer = p->n_top - 1;
 
 	while (i_layer >= 0) {
-		dz0_dRc_[i_layer] = -1.0;
+		dz0_dRc[i_layer] = -1.0;
 		for (int j = i_layer-1; j >= 0; j--)
-			dz0_dRc_[i_layer] *= Xis_[j];
+			dz0_dRc[i_layer] *= p->Xis[j];
 		i_layer--;
 	}
-	return dz0_dRc_;
-};
+}
 
 
 // ================================================================================================
 
 
-double complex (*jac_Z(void))[MAX_n_OMEGAS]
+int jac_Z(const Config *config, FixedLayers *fixed, const Sample *s, double complex *result)
 {
 	static const double A = 2.0 / M_PI;  // 2x because integrand is symmetric in chi [-MAX,MAX]
 
-	for (int i = 0; i < n_OMEGAS; i++) {
-		double omega = OMEGAS[i];
+	const int n_params = config->n_params;
+	const double *chis = config->xs;
 
-		for (int k = 0; k < N_XPTS; k++) {
-			double chi = CHIS[k];
-			double sinq_sq_ = sinc_sq(chi);
-			fPhis(chi,omega);
-			fzs(chi,omega);
-			fXis(chi,omega);
+	for (int n = 0; n < n_params; n++) {
+		if (config->param_ids[n][0] < 0 || config->param_ids[n][0] > 3)
+			return -1;
+	}
 
-			for (int n = 0; n < n_PARAMS; n++) {
-				int i_param = param_ids_[n][0];
-				int i_layer = param_ids_[n][1];
+	// start the recursion below the deepest fitted layer from the cache, if possible
+	const FixedLayers *from = fixed_layers_update(config, fixed, s, 1) ? fixed : NULL;
+	const int n_top = from ? from->n_top : s->n_layers;
+
+	// scratch is declared inside the loop, so each thread has its own
+	#pragma omp parallel for num_threads(config->n_threads) if(config->n_threads > 1) schedule(static)
+	for (int i = 0; i < config->n_omegas; i++) {
+		double complex f_values[s->n_layers];
+		double complex fs_prev[n_params > 0 ? n_params : 1];
+		double complex Phis[s->n_layers];
+		double complex zs[s->n_layers];
+		double complex Xis[s->n_layers];
+		OGC_Point p = { .omega = config->omegas[i], .n_top = n_top,
+										.Phis = Phis, .zs = zs, .Xis = Xis };
+		const double complex *z_fixed = from ? from->zs + (size_t) i * N_XPTS : NULL;
+
+		for (int n = 0; n < n_params; n++)
+			result[n * config->n_omegas + i] = 0.0*I;
+
+		// trapezoidal rule, accumulated one χ point at a time
+		for (int k = 0; k < N_XPTS; k++) {
+			p.chi = chis[k];
+			double sinq_sq_ = sinc_sq(p.chi);
+			if (z_fixed)
+				zs[n_top] = z_fixed[k];
+			fPhis(s,&p);
+			fzs(s,&p);
+			fXis(s,&p);
+
+			for (int n = 0; n < n_params; n++) {
+				int i_param = config->param_ids[n][0];
+				int i_layer = config->param_ids[n][1];
 
-				double complex *f_values = NULL;
 				switch(i_param)
 				{
 					case 0:
-						f_values = fdz0_dky(chi,omega);
+						fdz0_dky(s,&p,f_values);
 						break;
 					case 1:
-						f_values = fdz0_dpsi(chi,omega);
+						fdz0_dpsi(s,&p,f_values);
 						break;
 					case 2:
-						f_values = fdz0_dCv(chi,omega);
+						fdz0_dCv(s,&p,f_values);
 						break;
-					case 3:
-						f_values = fdz0_dRc(chi,omega);
+					default:  // 3, checked above
+						fdz0_dRc(s,&p,f_values);
 						break;
-					default:
-						PyErr_SetString(ParameterIDError, ParameterIDError_MSG);
-						return jac_Z_result_;
 				}
-				jac_Z_fs_buff_[n][k] = A * sinq_sq_ * f_values[i_layer];
+				double complex fk = A * sinq_sq_ * f_values[i_layer];
+				if (k > 0)
+					result[n * config->n_omegas + i] += (chis[k] - chis[k-1]) / 2.0 * (fk + fs_prev[n]);
+				fs_prev[n] = fk;
 			}
 		}
-
-		for (int n = 0; n < n_PARAMS; n++)
-			jac_Z_result_[n][i] = val_trapz(jac_Z_fs_buff_[n],CHIS);
 	}
 
-	return jac_Z_result_;
+	return 0;
 }
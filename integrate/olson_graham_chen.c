@@ -1,3 +1,4 @@
+#include <stdlib.h>
 #include "integrate.h"
 #include "olson_graham_chen.h"
 
@@ -10,40 +11,44 @@
 // =================================================================================================
 
 
-double complex Phi(int i_layer, double chi, double omega)
+static const double A = 2.0 / M_PI; // 2x because integrand is symmetric in chi [-MAX,MAX]
+
+
+double complex Phi(const Sample *s, int i_layer, double chi, double omega)
 {
 		/* OGC Eq. (6) */
-		double b = HALF_WIDTH;
-		return csqrt(psis_[i_layer]*chi*chi + I*b*b*2.0*omega*Cvs_[i_layer]/kys_[i_layer]);
+		double b = s->half_width;
+		return csqrt(s->psis[i_layer]*chi*chi + I*b*b*2.0*omega*s->Cvs[i_layer]/s->kys[i_layer]);
 }
 
 
-void fPhis(double chi, double omega)
+void fPhis(const Sample *s, OGC_Point *p)
 {
-	/* OGC Eq. (6);  for all layers at (χ,ω) */
-	int i_layer = n_LAYERS - 1;
-	Phis_[i_layer] = Phi(i_layer,chi,omega);
-	i_layer--;
+	/* OGC Eq. (6);  for the top `n_top` layers at (χ,ω) */
+	int i_layer = p->n_top - 1;
 	while (i_layer >= 0) {
-		Phis_[i_layer] = Phi(i_layer,chi,omega);
+		p->Phis[i_layer] = Phi(s,i_layer,p->chi,p->omega);
 		i_layer--;
 	}
 }
 
 
-void fzs(double chi, double omega)
+void fzs(const Sample *s, OGC_Point *p)
 {
-	/* OGC Eq. (5); (the z w/ no tilde) for all layers at (χ,ω)  */
-	int i_layer = n_LAYERS - 1;
-	zs_[i_layer] = -HALF_WIDTH / (kys_[i_layer] * Phis_[i_layer]);
-	i_layer--;
+	/* OGC Eq. (5); (the z w/ no tilde) for the top `n_top` layers at (χ,ω)  */
+	const double b = s->half_width;
+	int i_layer = p->n_top - 1;
+	if (p->n_top == s->n_layers) {
+		p->zs[i_layer] = -b / (s->kys[i_layer] * p->Phis[i_layer]);
+		i_layer--;
+	}
 	while (i_layer >= 0) {
-		double complex P = Phis_[i_layer];
-		double complex kPhi_b = kys_[i_layer] * P / HALF_WIDTH;
-		double complex tanh_term = ctanh(P * ds_[i_layer] / HALF_WIDTH);
-		double complex z_tilde = zs_[i_layer+1] - Rcs_[i_layer+1];
-		zs_[i_layer] = (kPhi_b * z_tilde - tanh_term)
-										/ (kPhi_b - kPhi_b * kPhi_b * z_tilde * tanh_term);
+		double complex P = p->Phis[i_layer];
+		double complex kPhi_b = s->kys[i_layer] * P / b;
+		double complex tanh_term = ctanh(P * s->ds[i_layer] / b);
+		double complex z_tilde = p->zs[i_layer+1] - s->Rcs[i_layer+1];
+		p->zs[i_layer] = (kPhi_b * z_tilde - tanh_term)
+										 / (kPhi_b - kPhi_b * kPhi_b * z_tilde * tanh_term);
 		i_layer--;
 	}
 }
@@ -52,20 +57,146 @@ void fzs(double chi, double omega)
 // =================================================================================================
 
 
-double complex ogc_integrand(double chi, double omega)
+double complex ogc_integrand(const Sample *s, double chi, double omega)
 {
 	/* OGC Eq. (4) integrand */
-	static const double A = 2.0 / M_PI; // 2x because integrand is symmetric in chi [-MAX,MAX]
+	double complex Phis[s->n_layers];
+	double complex zs[s->n_layers];
+	OGC_Point p = { .chi = chi, .omega = omega, .n_top = s->n_layers, .Phis = Phis, .zs = zs };
+	fPhis(s,&p);
+	fzs(s,&p);
+
+	return A * (p.zs[0] - s->Rcs[0]) * sinc_sq(chi);
+}
+
+
+static int fixed_params_match(const FixedLayers *fixed, const Sample *s)
+{
+	const int n_top = fixed->n_top;
+	const int n_fixed = s->n_layers - n_top;
+	const double *fields[5] = { s->ds, s->psis, s->kys, s->Cvs, s->Rcs };
+	for (int f = 0; f < 5; f++) {
+		for (int j = 0; j < n_fixed; j++) {
+			if (fixed->params[f * n_fixed + j] != fields[f][n_top + j])
+				return 0;
+		}
+	}
+	return 1;
+}
+
+
+int fixed_layers_update(const Config *config, FixedLayers *fixed, const Sample *s, int refresh)
+{
+	/*
+	1 if `fixed` holds the recursion through the fixed layers of `s`, after recomputing it
+	for `s` if needed and `refresh` is set; 0 if there are no fixed layers, or they differ
+	*/
+	if (fixed == NULL || fixed->zs == NULL)
+		return 0;
+	if (fixed->is_valid && fixed_params_match(fixed, s))
+		return 1;
+	if (!refresh)
+		return 0;
+
+	const int n_top = fixed->n_top;
+	const int n_fixed = s->n_layers - n_top;
+	const double *fields[5] = { s->ds, s->psis, s->kys, s->Cvs, s->Rcs };
+	for (int f = 0; f < 5; f++) {
+		for (int j = 0; j < n_fixed; j++)
+			fixed->params[f * n_fixed + j] = fields[f][n_top + j];
+	}
 
-	fPhis(chi,omega);
-	fzs(chi,omega);
+	#pragma omp parallel for num_threads(config->n_threads) if(config->n_threads > 1) schedule(static)
+	for (int i = 0; i < config->n_omegas; i++) {
+		double complex Phis[s->n_layers];
+		double complex zs[s->n_layers];
+		OGC_Point p = { .omega = config->omegas[i], .n_top = s->n_layers, .Phis = Phis, .zs = zs };
+		for (int k = 0; k < N_XPTS; k++) {
+			p.chi = config->xs[k];
+			fPhis(s,&p);
+			fzs(s,&p);
+			fixed->zs[(size_t) i * N_XPTS + k] = zs[n_top];
+		}
+	}
+	fixed->is_valid = 1;
+	fixed->n_refreshes++;
+	return 1;
+}
 
-	return A * (zs_[0] - Rcs_[0]) * sinc_sq(chi);
+
+static double complex ogc_trapz(const Config *config, const FixedLayers *fixed,
+																const Sample *s, int i)
+{
+	/*
+	OGC Eq. (4) integral at ω_i by the trapezoidal rule, as `omega_trapz`; starting from the
+	fixed layers if `fixed` is given (and up to date)
+	*/
+	const double *xs = config->xs;
+	double complex Phis[s->n_layers];
+	double complex zs[s->n_layers];
+	OGC_Point p = { .omega = config->omegas[i], .n_top = fixed ? fixed->n_top : s->n_layers,
+									.Phis = Phis, .zs = zs };
+	const double complex *z_fixed = fixed ? fixed->zs + (size_t) i * N_XPTS : NULL;
+
+	double complex F = 0.0*I;
+	double complex f_prev = 0.0*I;
+	for (int k = 0; k < N_XPTS; k++) {
+		p.chi = xs[k];
+		if (z_fixed)
+			zs[p.n_top] = z_fixed[k];
+		fPhis(s,&p);
+		fzs(s,&p);
+		double complex fk = A * (zs[0] - s->Rcs[0]) * sinc_sq(p.chi);
+		if (k > 0)
+			F += ((xs[k] - xs[k-1]) / 2.0) * (fk + f_prev);
+		f_prev = fk;
+	}
+	return F;
 }
 
 
-double complex *ogc_integral(void)
+void ogc_integral(const Config *config, FixedLayers *fixed, const Sample *s,
+									double complex *result)
 {
 	/* OGC Eq. (4) integral */
-	return omega_trapz(ogc_integrand,CHIS,ogc_integral_result_);
+	const FixedLayers *from = fixed_layers_update(config, fixed, s, 1) ? fixed : NULL;
+
+	#pragma omp parallel for num_threads(config->n_threads) if(config->n_threads > 1) schedule(static)
+	for (int i = 0; i < config->n_omegas; i++)
+		result[i] = ogc_trapz(config, from, s, i);
+}
+
+
+void ogc_integral_samples(const Config *config, FixedLayers *fixed,
+													const Sample *samples, int n_samples, double complex *result)
+{
+	/*
+	OGC Eq. (4) integral for each of `n_samples` samples; result is [n_samples][n_omegas]
+
+	The fixed layers are cached for the first sample; others with the same fixed layers
+	start from them, the rest are integrated in full.
+	*/
+	const int n_omegas = config->n_omegas;
+	const long n_total = (long) n_samples * n_omegas;
+	char *use_fixed = malloc(n_samples > 0 ? n_samples : 1);  // if NULL, integrate all in full
+	for (int m = 0; use_fixed != NULL && m < n_samples; m++)
+		use_fixed[m] = (char) fixed_layers_update(config, fixed, &samples[m], m == 0);
+
+	// one loop over all (sample, ω) pairs keeps every thread busy for any shape
+	#pragma omp parallel for num_threads(config->n_threads) if(config->n_threads > 1) schedule(static)
+	for (long k = 0; k < n_total; k++) {
+		int m = (int) (k / n_omegas);
+		const FixedLayers *from = (use_fixed && use_fixed[m]) ? fixed : NULL;
+		result[k] = ogc_trapz(config, from, &samples[m], (int) (k % n_omegas));
+	}
+	free(use_fixed);
+}
+
+
+void ogc_integral_adaptive(const Config *config, const Sample *s, double tol,
+													 const Partition *start, Partition *end,
+													 double complex *result, double *errs, int *n_evals)
+{
+	/* OGC Eq. (4) integral, to relative tolerance `tol` */
+	omega_adaptive(ogc_integrand,s,config,tol,start,end,result,errs,n_evals);
 }
@@ -1,32 +1,50 @@
+#ifndef OLSON_GRAHAM_CHEN_H
+#define OLSON_GRAHAM_CHEN_H
+
+#include "integrate.h"
+
 // =================================================================================================
 // Olson, Graham, and Chen model
 // =================================================================================================
 
-// OGC model for surface impedance, Z
-double CHIS[N_XPTS];
-double complex Phis_[MAX_n_LAYERS];
-void fPhis(double chi, double omega);
+// layer-wise quantities at a single (χ,ω); each array is [n_layers], on the caller's stack
+//
+// Only the top `n_top` layers are computed. If n_top < n_layers, the caller sets zs[n_top]
+// (from `FixedLayers`) before calling `fzs`.
+typedef struct {
+	double chi;
+	double omega;
+	int n_top;
+	double complex *Phis;
+	double complex *zs;
+	double complex *Xis;
+} OGC_Point;
 
-double complex zs_[MAX_n_LAYERS];
-void fzs(double chi, double omega);
 
-double complex ogc_integrand(double lambda, double omega);
-double complex ogc_integral_result_[MAX_n_OMEGAS];
-double complex *ogc_integral(void);
+// OGC model for surface impedance, Z
+void fPhis(const Sample *s, OGC_Point *p);
+void fzs(const Sample *s, OGC_Point *p);
+
+double complex ogc_integrand(const Sample *s, double chi, double omega);
+int fixed_layers_update(const Config *config, FixedLayers *fixed, const Sample *s, int refresh);
+void ogc_integral(const Config *config, FixedLayers *fixed, const Sample *s,
+									double complex *result);
+void ogc_integral_samples(const Config *config, FixedLayers *fixed,
+													const Sample *samples, int n_samples, double complex *result);
+void ogc_integral_adaptive(const Config *config, const Sample *s, double tol,
+													 const Partition *start, Partition *end,
+													 double complex *result, double *errs, int *n_evals);
 
 
 // OGC model for dZ/dX_k, for sample parameter X_k
-double complex Xis_[MAX_n_LAYERS];
-void fXis(double chi, double omega);
+void fXis(const Sample *s, OGC_Point *p);
 
-double complex dz0_dky_[MAX_n_LAYERS];
-double complex dz0_dCv_[MAX_n_LAYERS];
-double complex dz0_dpsi_[MAX_n_LAYERS];
-double complex dz0_dRc_[MAX_n_LAYERS];
+void fdz0_dky(const Sample *s, const OGC_Point *p, double complex *dz0_dky);
+void fdz0_dCv(const Sample *s, const OGC_Point *p, double complex *dz0_dCv);
+void fdz0_dpsi(const Sample *s, const OGC_Point *p, double complex *dz0_dpsi);
+void fdz0_dRc(const Sample *s, const OGC_Point *p, double complex *dz0_dRc);
 
-int n_PARAMS;
-int param_ids_[MAX_n_PARAMS][2];
+// writes an (n_params x n_omegas) row-major array; returns -1 for an invalid parameter ID
+int jac_Z(const Config *config, FixedLayers *fixed, const Sample *s, double complex *result);
 
-double complex jac_Z_result_[MAX_n_PARAMS][MAX_n_OMEGAS];
-double complex jac_Z_fs_buff_[MAX_n_PARAMS][N_XPTS];
-double complex (*jac_Z(void))[MAX_n_OMEGAS];
+#endif
@@ -1,6 +1,96 @@
+#include <stdlib.h>
+#include <string.h>
 #include "integrate.h"
 
 
+int max_threads(void)
+{
+#ifdef _OPENMP
+	return omp_get_max_threads();
+#else
+	return 1;
+#endif
+}
+
+
+// =================================================================================================
+// allocation helpers
+// =================================================================================================
+
+void config_free(Config *config)
+{
+	free(config->omegas);
+	free(config->param_ids);
+	config->omegas = NULL;
+	config->param_ids = NULL;
+	config->is_set = 0;
+}
+
+
+int fixed_layers_alloc(FixedLayers *fixed, const Config *config, int n_top)
+{
+	/* room for the recursion through layers [n_top, n_layers); none if no layer is fixed */
+	*fixed = (FixedLayers) { .n_top = n_top };
+	int n_fixed = config->n_layers - n_top;
+	if (n_fixed <= 0)
+		return 0;
+	fixed->params = malloc(5 * n_fixed * sizeof(double));
+	fixed->zs = malloc((size_t) config->n_omegas * N_XPTS * sizeof(double complex));
+	if (fixed->params == NULL || fixed->zs == NULL) {
+		fixed_layers_free(fixed);
+		return -1;
+	}
+	return 0;
+}
+
+
+void fixed_layers_free(FixedLayers *fixed)
+{
+	free(fixed->params);
+	free(fixed->zs);
+	fixed->params = NULL;
+	fixed->zs = NULL;
+	fixed->is_valid = 0;
+}
+
+
+Partition *partition_new(int n_omegas)
+{
+	Partition *p = malloc(sizeof(Partition));
+	if (p == NULL)
+		return NULL;
+	p->n_panels = calloc(n_omegas, sizeof(int));
+	p->bounds = malloc((size_t) n_omegas * (MAX_n_PANELS + 1) * sizeof(double));
+	if (p->n_panels == NULL || p->bounds == NULL) {
+		partition_free(p);
+		return NULL;
+	}
+	p->n_omegas = n_omegas;
+	return p;
+}
+
+
+void partition_copy(Partition *dst, const Partition *src)
+{
+	/* both must have the same `n_omegas` */
+	memcpy(dst->n_panels, src->n_panels, src->n_omegas * sizeof(int));
+	memcpy(dst->bounds, src->bounds, (size_t) src->n_omegas * (MAX_n_PANELS + 1) * sizeof(double));
+}
+
+
+void partition_free(Partition *p)
+{
+	if (p == NULL)
+		return;
+	free(p->n_panels);
+	free(p->bounds);
+	free(p);
+}
+
+
+// =================================================================================================
+
+
 // writes into array points linear in log-space, between min and max
 void make_logspace(double *arr, double min, double max, int size)
 {
@@ -17,38 +107,180 @@ double sinc_sq(double x)
 }
 
 
-// a general trapezoidal-rule integrator of f(x,ω_i)dx, for each ω_i 
-double complex *omega_trapz(double complex (*fp)(double,double),
-														double *xs,
-														double complex *Fs)
+// trapezoidal rule for f(x,ω)dx at a single ω, over the N_XPTS points `xs`
+static double complex trapz(double complex (*fp)(const Sample *, double, double),
+														const Sample *sample, const double *xs, double omega)
 {
-	for (int i = 0; i < n_OMEGAS; i++) {
-		Fs[i] = 0.0*I;
-		double complex f0 = fp(xs[0],OMEGAS[i]);
-		double complex f_prev = f0;
-		for (int k = 1; k < N_XPTS; k++) {
-			double complex fk = fp(xs[k],OMEGAS[i]);
-			double dx = xs[k] - xs[k-1];
-			Fs[i] += (dx / 2.0) * (fk + f_prev);
-			f_prev = fk;
-		}
+	double complex F = 0.0*I;
+	double complex f_prev = fp(sample,xs[0],omega);
+	for (int k = 1; k < N_XPTS; k++) {
+		double complex fk = fp(sample,xs[k],omega);
+		double dx = xs[k] - xs[k-1];
+		F += (dx / 2.0) * (fk + f_prev);
+		f_prev = fk;
 	}
+	return F;
+}
+
+
+// a general trapezoidal-rule integrator of f(x,ω_i)dx, for each ω_i
+void omega_trapz(double complex (*fp)(const Sample *, double, double),
+								 const Sample *sample,
+								 const Config *config,
+								 double complex *Fs)
+{
+	const double *xs = config->xs;
+	const double *omegas = config->omegas;
 
-	return Fs;
+	#pragma omp parallel for num_threads(config->n_threads) if(config->n_threads > 1) schedule(static)
+	for (int i = 0; i < config->n_omegas; i++)
+		Fs[i] = trapz(fp,sample,xs,omegas[i]);
 }
 
 
-// more generic integrator, takes values x and f(x), computes scalar result
-double complex val_trapz(double complex *fs, double *xs)
+// =================================================================================================
+// adaptive Gauss-Kronrod (7-15) quadrature in log(x)
+// =================================================================================================
+
+// Kronrod nodes on [0,1]; the odd-indexed nodes (and 0) are the Gauss nodes
+static const double XGK[8] = {
+	0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+	0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+	0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+	0.207784955007898467600689403773245, 0.000000000000000000000000000000000
+};
+static const double WGK[8] = {
+	0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+	0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+	0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+	0.204432940075298892414161999234649, 0.209482141084727828012999174891714
+};
+static const double WG[4] = {
+	0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+	0.381830050505118944950369775488975, 0.417959183673469387755102040816327
+};
+
+
+// one panel [a,b] in u = log(x); f(x)dx = f(e^u)e^u du
+static double complex gk15(double complex (*fp)(const Sample *, double, double),
+													 const Sample *sample, double omega, double a, double b, double *err)
 {
-	double complex F = 0.0*I;
-	double complex f_prev = fs[0];
-	
-	for (int k = 1; k < N_XPTS; k++) {
-		double dx = xs[k] - xs[k-1];
-		F += (dx / 2.0) * (fs[k] + f_prev);
-		f_prev = fs[k];
+	double c = 0.5 * (a + b);
+	double h = 0.5 * (b - a);
+	double complex K = 0.0*I;
+	double complex G = 0.0*I;
+
+	for (int j = 0; j < 8; j++) {
+		double complex f_sum;
+		if (j == 7) {
+			double x = exp(c);
+			f_sum = fp(sample,x,omega) * x;
+		} else {
+			double x1 = exp(c - h * XGK[j]);
+			double x2 = exp(c + h * XGK[j]);
+			f_sum = fp(sample,x1,omega) * x1 + fp(sample,x2,omega) * x2;
+		}
+		K += WGK[j] * f_sum;
+		if (j % 2 == 1)
+			G += WG[j / 2] * f_sum;
 	}
 
-	return F;
+	*err = cabs(h * (K - G));
+	return h * K;
+}
+
+
+static int compare_doubles(const void *a, const void *b)
+{
+	double da = *(const double *) a;
+	double db = *(const double *) b;
+	return (da > db) - (da < db);
+}
+
+
+// integrates f(x,ω_i)dx over [xs[0], xs[N_XPTS-1]] for each ω_i, bisecting the panel with
+// the largest error estimate until the total error is below tol * |F_i| (or panels run out)
+void omega_adaptive(double complex (*fp)(const Sample *, double, double),
+										const Sample *sample,
+										const Config *config,
+										double tol,
+										const Partition *start,
+										Partition *end,
+										double complex *Fs,
+										double *errs,
+										int *n_evals)
+{
+	const double u_i = log(config->xs[0]);
+	const double u_f = log(config->xs[N_XPTS-1]);
+
+	// panel counts vary by ω, so threads take frequencies one at a time
+	#pragma omp parallel for num_threads(config->n_threads) if(config->n_threads > 1) schedule(dynamic)
+	for (int i = 0; i < config->n_omegas; i++) {
+		double a[MAX_n_PANELS];
+		double b[MAX_n_PANELS];
+		double e[MAX_n_PANELS];
+		double complex F[MAX_n_PANELS];
+		double omega = config->omegas[i];
+		int n = 0;
+
+		if (start != NULL && start->n_panels[i] > 0) {
+			const double *bounds = PARTITION_BOUNDS(start,i);
+			n = start->n_panels[i];
+			for (int p = 0; p < n; p++) {
+				a[p] = bounds[p];
+				b[p] = bounds[p+1];
+			}
+		} else {
+			n = N_PANELS_INIT;
+			for (int p = 0; p < n; p++) {
+				a[p] = u_i + (u_f - u_i) * p / n;
+				b[p] = u_i + (u_f - u_i) * (p + 1) / n;
+			}
+		}
+
+		double complex F_total = 0.0*I;
+		double err_total = 0.0;
+		for (int p = 0; p < n; p++) {
+			F[p] = gk15(fp,sample,omega,a[p],b[p],&e[p]);
+			F_total += F[p];
+			err_total += e[p];
+		}
+		n_evals[i] = 15 * n;
+
+		while (err_total > tol * cabs(F_total) && n < MAX_n_PANELS) {
+			int p_max = 0;
+			for (int p = 1; p < n; p++) {
+				if (e[p] > e[p_max])
+					p_max = p;
+			}
+
+			// bisect the worst panel; left half in place, right half appended
+			double mid = 0.5 * (a[p_max] + b[p_max]);
+			F_total -= F[p_max];
+			err_total -= e[p_max];
+
+			a[n] = mid;
+			b[n] = b[p_max];
+			b[p_max] = mid;
+			F[p_max] = gk15(fp,sample,omega,a[p_max],b[p_max],&e[p_max]);
+			F[n] = gk15(fp,sample,omega,a[n],b[n],&e[n]);
+			F_total += F[p_max] + F[n];
+			err_total += e[p_max] + e[n];
+
+			n++;
+			n_evals[i] += 30;
+		}
+
+		Fs[i] = F_total;
+		errs[i] = err_total;
+
+		if (end != NULL) {
+			double *bounds = PARTITION_BOUNDS(end,i);
+			qsort(a, n, sizeof(double), compare_doubles);
+			for (int p = 0; p < n; p++)
+				bounds[p] = a[p];
+			bounds[n] = u_f;
+			end->n_panels[i] = n;
+		}
+	}
 }
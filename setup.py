@@ -1,7 +1,17 @@
+import sys
+
 import numpy as np
 from setuptools import setup, find_packages, Extension
 from fit3omega import __version__
 
+# OpenMP parallelizes the frequency loops; Apple's clang has no -fopenmp, so it builds serial there
+if sys.platform == "win32":
+    openmp_flags = ["/openmp"], []
+elif sys.platform == "darwin":
+    openmp_flags = [], []
+else:
+    openmp_flags = ["-fopenmp"], ["-fopenmp"]
+
 C_module = Extension("integrate",
                      sources=["./integrate/integrate.c",
                               "./integrate/exceptions.c",
@@ -9,7 +19,10 @@ C_module = Extension("integrate",
                               "./integrate/borca_tasciuc.c",
                               "./integrate/olson_graham_chen.c",
                               "./integrate/ogc_derivatives.c"],
-                     include_dirs=[np.get_include()])
+                     include_dirs=[np.get_include()],
+                     extra_compile_args=openmp_flags[0],
+                     extra_link_args=openmp_flags[1],
+                     optional=True)  # falls back to fit3omega.numpy_integrate
 
 setup(
     name="fit3omega",
@@ -0,0 +1,138 @@
+"""
+Checks of the on-disk cache of parsed input files (`fit3omega.cache`).
+
+    python -m pytest tests
+"""
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from fit3omega import cache
+from fit3omega.data import Data, _parse_columns
+from fit3omega.sample import load_sample_parameters, _parse_sample_parameters
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+
+
+@pytest.fixture
+def cache_root(tmp_path, monkeypatch) -> str:
+    root = str(tmp_path / "cache")
+    monkeypatch.setenv(cache.ENV_VAR, root)
+    return root
+
+
+@pytest.fixture
+def inputs(tmp_path) -> dict:
+    """copies of the example files, free to edit"""
+    files = {}
+    for name in ("data.csv", "data.error.csv", "sample.txt"):
+        files[name] = str(tmp_path / name)
+        shutil.copy(os.path.join(EXAMPLE_DIR, name), files[name])
+    return files
+
+
+class CountingParse:
+    """a parse function that counts its calls"""
+
+    def __init__(self, parse):
+        self.parse = parse
+        self.calls = 0
+
+    def __call__(self, filename):
+        self.calls += 1
+        return self.parse(filename)
+
+
+def edit_first_value(csv_file: str) -> None:
+    with open(csv_file) as f:
+        lines = f.readlines()
+    fields = lines[1].split(',')
+    fields[1] = repr(float(fields[1]) * 1.01)
+    lines[1] = ','.join(fields)
+    with open(csv_file, 'w') as f:
+        f.writelines(lines)
+
+
+def test_off_without_directory(inputs, monkeypatch):
+    monkeypatch.delenv(cache.ENV_VAR, raising=False)
+    parse = CountingParse(_parse_columns)
+    cache.load_columns(inputs["data.csv"], parse)
+    cache.load_columns(inputs["data.csv"], parse)
+    assert parse.calls == 2
+    assert cache.cache_dir() is None
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_columns_round_trip(cache_root, inputs, mmap):
+    parse = CountingParse(_parse_columns)
+    parsed = cache.load_columns(inputs["data.csv"], parse)
+    assert sorted(f.split('.', 1)[1] for f in os.listdir(cache_root)) == ["columns.json", "npy"]
+
+    cached = cache.load_columns(inputs["data.csv"], parse, mmap=mmap)
+    assert parse.calls == 1
+    assert list(cached) == list(parsed)
+    for k in parsed:
+        assert np.array_equal(cached[k], parsed[k])
+    assert isinstance(cached["freq"], np.memmap) == mmap
+
+
+def test_data_from_cache(cache_root, inputs):
+    data = Data(inputs["data.csv"])
+    cached = Data(inputs["data.csv"], mmap=True)
+    assert len(os.listdir(cache_root)) == 4  # the data and the error files
+    assert np.array_equal(cached.omegas, data.omegas)
+    assert np.array_equal(cached.V3.x, data.V3.x)
+
+
+def test_edited_file_is_parsed_again(cache_root, inputs):
+    parse = CountingParse(_parse_columns)
+    before = cache.load_columns(inputs["data.csv"], parse)
+    edit_first_value(inputs["data.csv"])
+    after = cache.load_columns(inputs["data.csv"], parse)
+    assert parse.calls == 2
+    assert after["Vs_3w"][0] == pytest.approx(1.01 * before["Vs_3w"][0])
+    assert np.array_equal(after["Vs_3w"][1:], before["Vs_3w"][1:])
+    assert len(os.listdir(cache_root)) == 4  # old entries stay until the directory is cleared
+
+
+def test_key_depends_on_contents_and_kind(inputs, tmp_path):
+    copied = str(tmp_path / "other_name.csv")
+    shutil.copy(inputs["data.csv"], copied)
+    key = cache.file_key(inputs["data.csv"], "columns")
+    assert cache.file_key(copied, "columns") == key
+    assert cache.file_key(inputs["data.csv"], "sample") != key
+    edit_first_value(copied)
+    assert cache.file_key(copied, "columns") != key
+
+
+def test_corrupt_entry_is_parsed_again(cache_root, inputs):
+    parse = CountingParse(_parse_columns)
+    parsed = cache.load_columns(inputs["data.csv"], parse)
+    for name in os.listdir(cache_root):
+        if name.endswith(".npy"):
+            with open(os.path.join(cache_root, name), 'wb') as f:
+                f.write(b"not an array")
+    again = cache.load_columns(inputs["data.csv"], parse)
+    assert parse.calls == 2
+    assert np.array_equal(again["freq"], parsed["freq"])
+    assert np.array_equal(cache.load_columns(inputs["data.csv"], parse)["freq"], parsed["freq"])
+    assert parse.calls == 2  # rewritten
+
+
+def test_sample_round_trip(cache_root, inputs):
+    parse = CountingParse(_parse_sample_parameters)
+    parsed = cache.load_object(inputs["sample.txt"], parse, "sample")
+    cached = cache.load_object(inputs["sample.txt"], parse, "sample")
+    assert parse.calls == 1
+    assert cached == parsed
+    assert load_sample_parameters(inputs["sample.txt"]) == parsed
+
+    with open(inputs["sample.txt"]) as f:
+        text = f.read()
+    with open(inputs["sample.txt"], 'w') as f:
+        f.write(text.replace("ky: 150.0", "ky: 140.0"))
+    edited = cache.load_object(inputs["sample.txt"], parse, "sample")
+    assert parse.calls == 2
+    assert edited.get_value("Si", "ky") == 140.0
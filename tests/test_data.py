@@ -0,0 +1,115 @@
+"""
+Checks of the row selection of `Data` and of the revisions that track it.
+
+    python -m pytest tests
+"""
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from fit3omega.data import Data
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+DATA_CSV = os.path.join(EXAMPLE_DIR, "data.csv")
+ERROR_CSV = os.path.join(EXAMPLE_DIR, "data.error.csv")
+
+
+@pytest.fixture
+def data() -> Data:
+    return Data(DATA_CSV)
+
+
+def all_omegas() -> np.ndarray:
+    return 2 * np.pi * np.loadtxt(DATA_CSV, delimiter=',', skiprows=1)[:, 0]
+
+
+def test_selection_starts_with_all_rows(data):
+    assert data.revision == 0
+    assert np.array_equal(data.index, np.arange(len(all_omegas())))
+    assert np.array_equal(data.omegas, all_omegas())
+
+
+def test_set_limits(data):
+    data.set_limits(2, -3)
+    assert data.revision == 1
+    assert np.array_equal(data.omegas, all_omegas()[2:-3])
+    assert len(data.V.x) == len(data) == len(all_omegas()) - 5
+
+    data.set_limits(2, -3)  # unchanged
+    assert data.revision == 1
+
+
+def test_drop_row(data):
+    V_x = data.V.x.copy()
+    data.drop_row(4)
+    assert data.revision == 1
+    assert 4 not in data.index
+    assert np.array_equal(data.V.x, np.delete(V_x, 4))
+
+    # row numbers are those of the CSV file, before and after limits
+    data.set_limits(3, len(all_omegas()))
+    assert data.index[:2].tolist() == [3, 5]
+    data.drop_row(5)
+    assert data.index[0] == 3 and 5 not in data.index
+
+
+@pytest.mark.parametrize("row_index", [-1, 50, 1000])
+def test_drop_row_out_of_range(data, row_index):
+    with pytest.raises(KeyError):
+        data.drop_row(row_index)
+    assert data.revision == 0
+    assert len(data) == 50
+
+
+def test_drop_row_twice(data):
+    data.drop_row(7)
+    with pytest.raises(KeyError):
+        data.drop_row(7)
+    assert data.revision == 1
+
+
+def test_reset(data):
+    omegas = data.omegas
+    data.set_limits(1, 10)
+    data.drop_row(3)
+    revision = data.revision
+    data.reset()
+    assert data.revision == revision + 1
+    assert np.array_equal(data.omegas, omegas)
+
+    data.set_limits(0, len(omegas))  # the limits of a fresh Data
+    assert np.array_equal(data.omegas, omegas)
+
+
+def test_error_assignment(tmp_path):
+    data_csv = str(tmp_path / "data.csv")
+    shutil.copy(DATA_CSV, data_csv)
+    data = Data(data_csv)
+    assert data.no_error
+    assert not np.any(data.V.xerr)
+
+    data.error = ERROR_CSV
+    assert data.revision == 1
+    assert not data.no_error
+    assert np.array_equal(data.V.xerr, Data(DATA_CSV, ERROR_CSV).V.xerr)
+
+    with pytest.raises(ValueError):
+        data.error = ERROR_CSV
+
+
+def test_copy_has_its_own_selection(data):
+    data.drop_row(2)
+    V_x = data.V.x
+    new = data.copy()
+    assert np.array_equal(new.V.x, V_x)
+
+    new.drop_row(3)
+    new.set_limits(0, 10)
+    assert 3 in data.index and len(data) == 49
+    assert data.V.x is V_x
+    assert len(new.V.x) == 10 and 3 not in new.index
+
+    data.reset()
+    assert 2 not in new.index
@@ -0,0 +1,112 @@
+"""
+Checks of the linearized parameter covariance of `Fit3omega` against finite differences.
+
+    python -m pytest tests
+"""
+import os
+import shutil
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from fit3omega.fit import Fit3omega
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+SAMPLE_FILE = os.path.join(EXAMPLE_DIR, "sample.txt")
+DATA_CSV = os.path.join(EXAMPLE_DIR, "data.csv")
+
+
+def residuals_jacobian_cd(ft: Fit3omega, x: np.ndarray) -> np.ndarray:
+    """central-difference Jacobian of the residuals; (n_residuals, n_params)"""
+    columns = []
+    for i in range(len(x)):
+        h = 1e-5 * abs(x[i])
+        x_plus, x_minus = np.array(x, dtype=float), np.array(x, dtype=float)
+        x_plus[i] += h
+        x_minus[i] -= h
+        columns.append((ft.residuals(x_plus) - ft.residuals(x_minus)) / (2. * h))
+    return np.stack(columns, axis=1)
+
+
+def without_errors(tmp_path) -> Fit3omega:
+    """a fitter of the example without error data, and with exact dRdT and shunt"""
+    data_csv = str(tmp_path / "data.csv")
+    shutil.copy(DATA_CSV, data_csv)  # without its error file
+    ft = Fit3omega(SAMPLE_FILE, data_csv)
+    ft.sample.heater.dRdT_err = 0.
+    ft.sample.shunt.err = 0.
+    return ft
+
+
+def test_covariance_matches_finite_differences():
+    ft = Fit3omega(SAMPLE_FILE, DATA_CSV)
+    ft.fit(jac=True, engine="least_squares")
+    x = ft.result.x
+    sigmas = np.concatenate((np.abs(ft.T2.x * ft.T2.xerr), np.abs(ft.T2.y * ft.T2.yerr)))
+    assert np.all(sigmas > 0.)
+
+    jac = residuals_jacobian_cd(ft, x) / sigmas[:, np.newaxis]
+    expected = np.linalg.inv(jac.T @ jac)
+    assert np.allclose(ft.parameter_covariance(x), expected, rtol=1e-4, atol=0.)
+    assert np.array_equal(ft.result.covariance, ft.parameter_covariance(x))
+
+
+def test_covariance_without_errors_is_scaled_by_residual_variance(tmp_path):
+    ft = without_errors(tmp_path)
+    ft.fit(jac=True, engine="least_squares")
+    assert not np.any(ft.T2.xerr)
+    x = ft.result.x
+
+    jac = residuals_jacobian_cd(ft, x)
+    residuals = ft.residuals(x)
+    scale = np.sum(residuals**2) / (len(residuals) - len(x))
+    expected = scale * np.linalg.inv(jac.T @ jac)
+    assert np.allclose(ft.parameter_covariance(x), expected, rtol=1e-4, atol=0.)
+
+
+def test_covariance_opt_out():
+    ft = Fit3omega(SAMPLE_FILE, DATA_CSV)
+    ft.fit(jac=True, engine="least_squares", covariance=False)
+    assert ft.result.covariance is None
+    assert ft.result.stderr is None
+
+
+@pytest.mark.parametrize("n_rows", [2, 1])
+def test_covariance_needs_degrees_of_freedom(tmp_path, n_rows):
+    ft = without_errors(tmp_path)
+    ft.data.set_limits(0, n_rows)
+    ft.ignore_imag_err = True  # n_rows residuals for the two parameters
+    assert ft.parameter_covariance(np.array(ft.sample.x)) is None
+
+
+def test_monte_carlo_follows_nominal_fit(monkeypatch):
+    from fit3omega import uncertainty
+    ft = Fit3omega(SAMPLE_FILE, DATA_CSV)
+    ft.fit(jac=True, engine="minimize", covariance=False)
+
+    n_inits = []
+    init_integrators = Fit3omega._init_integrators
+    monkeypatch.setattr(Fit3omega, "_init_integrators",
+                        lambda self: n_inits.append(1) or init_integrators(self))
+    ft.fit_uncertainty(4, max_workers=1, seed=0)
+    assert (uncertainty._SETTINGS["jac"], uncertainty._SETTINGS["engine"]) == (True, "minimize")
+    assert len(n_inits) == 1  # the draws share the frequencies, and so the configuration
+    assert ft.result.n_draws == 4 and ft.result.n_failed == 0
+
+    samples = ft.result.samples.copy()
+    samples[1] = np.nan
+    result = replace(ft.result, samples=samples)
+    assert (result.n_draws, result.n_failed) == (3, 1)
+    assert "MONTE CARLO (3 draws, 1 failed)" in result.summary
+
+
+def test_surrogate_fit_covariance_is_exact():
+    from fit3omega.surrogate import build_surrogate
+    ft = Fit3omega(SAMPLE_FILE, DATA_CSV)
+    surrogate = build_surrogate(ft, n_points=9, min_frac=0.5, max_frac=2.)
+    ft.fit_surrogate(surrogate, jac=True, engine="least_squares")
+    assert np.array_equal(ft.result.covariance, ft.parameter_covariance(ft.result.x))
+
+    ft.fit_surrogate(surrogate, jac=True, engine="least_squares", covariance=False)
+    assert ft.result.covariance is None
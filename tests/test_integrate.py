@@ -0,0 +1,240 @@
+"""
+Checks of the `integrate` C-extension against the NumPy integrator and finite differences.
+
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from fit3omega import numpy_integrate
+
+integrate = pytest.importorskip("integrate")
+
+HALF_WIDTH = 15e-6
+
+
+def make_stack(n_layers: int):
+    """a film stack on a thick Si substrate"""
+    ds = np.array([1e-6] * (n_layers - 1) + [300e-6])
+    kys = np.array([0.2 + i for i in range(n_layers - 1)] + [150.])
+    ratio_xys = np.array([1. + 0.1 * i for i in range(n_layers)])
+    Cvs = np.array([2.3e6] * (n_layers - 1) + [1.63e6])
+    Rcs = np.array([0.] + [1e-8] * (n_layers - 1))
+    return ds, kys, ratio_xys, Cvs, Rcs
+
+
+def make_integrators(omegas, fit_indices, n_layers):
+    """a C and a NumPy integrator with the same configuration"""
+    c_integrator = integrate.Integrator()
+    np_integrator = numpy_integrate.Integrator()
+    for integrator in (c_integrator, np_integrator):
+        integrator.ogc_set(omegas, fit_indices, HALF_WIDTH, 1e-6, 15., n_layers)
+    return c_integrator, np_integrator
+
+
+def max_rel(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.max(np.abs(a - b)) / np.max(np.abs(b)))
+
+
+@pytest.mark.parametrize("n_omegas", [1000, 2000])
+def test_large_sweep_matches_numpy(n_omegas):
+    n_layers = 24
+    omegas = 2 * np.pi * np.logspace(0, 5, n_omegas)
+    fit_indices = [(0, 0), (1, 2), (2, 0), (3, n_layers - 1)]
+    c_integrator, np_integrator = make_integrators(omegas, fit_indices, n_layers)
+    stack = make_stack(n_layers)
+
+    z = c_integrator.ogc_integral(*stack)
+    jac = c_integrator.ogc_jacobian(*stack)
+    assert z.shape == (n_omegas,)
+    assert jac.shape == (len(fit_indices), n_omegas)
+    assert max_rel(z, np_integrator.ogc_integral(*stack)) < 1e-12
+    assert max_rel(jac, np_integrator.ogc_jacobian(*stack)) < 1e-12
+
+
+def test_jacobian_matches_central_differences():
+    n_layers = 6
+    omegas = 2 * np.pi * np.logspace(0, 5, 40)
+    fit_indices = [(0, 0), (1, 0), (2, 1), (1, 3), (3, 2), (0, n_layers - 1)]
+    c_integrator, _ = make_integrators(omegas, fit_indices, n_layers)
+    stack = make_stack(n_layers)
+    jac = c_integrator.ogc_jacobian(*stack)
+
+    for row, (i_param, i_layer) in zip(jac, fit_indices):
+        h = 1e-5 * stack[i_param + 1][i_layer]
+        z = []
+        for sign in (1., -1.):
+            args = [np.array(a) for a in stack]
+            args[i_param + 1][i_layer] += sign * h
+            z.append(c_integrator.ogc_integral(*args))
+        fd = (z[0] - z[1]) / (2. * h)
+        assert max_rel(row, fd) < 1e-6, (i_param, i_layer)
+
+
+def test_outputs_are_c_contiguous():
+    n_layers = 4
+    omegas = 2 * np.pi * np.logspace(0, 5, 30)
+    fit_indices = [(0, 0), (2, 0)]
+    c_integrator, _ = make_integrators(omegas, fit_indices, n_layers)
+    stack = make_stack(n_layers)
+
+    assert c_integrator.ogc_integral(*stack).flags.c_contiguous
+    assert c_integrator.ogc_jacobian(*stack).flags.c_contiguous
+    out = np.empty((len(fit_indices), len(omegas)), dtype=complex)
+    assert c_integrator.ogc_jacobian(*stack, out=out) is out
+
+
+@pytest.mark.parametrize("n_threads", [1, 2])
+def test_batch_equals_single_calls(n_threads):
+    n_layers = 5
+    omegas = 2 * np.pi * np.logspace(0, 5, 60)
+    fit_indices = [(0, 0), (2, 1)]
+    c_integrator, _ = make_integrators(omegas, fit_indices, n_layers)
+    c_integrator.set_threads(n_threads)
+    ds, kys, ratio_xys, Cvs, Rcs = make_stack(n_layers)
+
+    # the first rows share the fixed layers below layer 1; the last ones do not
+    rng = np.random.default_rng(0)
+    rows = [np.tile(a, (8, 1)) for a in (kys, ratio_xys, Cvs, Rcs)]
+    rows[0][:, 0] *= rng.uniform(0.5, 2., 8)
+    rows[2][:, 1] *= rng.uniform(0.5, 2., 8)
+    rows[0][5:, 3] *= rng.uniform(0.5, 2., 3)
+
+    batched = c_integrator.ogc_integral_batch(ds, *rows)
+    looped = np.array([c_integrator.ogc_integral(ds, *row) for row in zip(*rows)])
+    assert batched.shape == (8, len(omegas)) and batched.flags.c_contiguous
+    assert np.array_equal(batched, looped)
+
+
+@pytest.mark.parametrize("n_threads", [2, 4])
+def test_threads_match_serial(n_threads):
+    n_layers = 6
+    omegas = 2 * np.pi * np.logspace(0, 5, 101)
+    fit_indices = [(0, 0), (2, 0), (3, 1)]
+    stack = make_stack(n_layers)
+
+    def evaluate(threads: int):
+        c_integrator, _ = make_integrators(omegas, fit_indices, n_layers)
+        c_integrator.set_threads(threads)
+        return (c_integrator.ogc_integral(*stack),
+                c_integrator.ogc_jacobian(*stack),
+                c_integrator.ogc_integral_adaptive(1e-8, *stack)[0])
+
+    for serial, threaded in zip(evaluate(1), evaluate(n_threads)):
+        assert np.array_equal(serial, threaded)
+
+
+def test_fixed_layer_cache_follows_changes():
+    n_layers = 8
+    omegas = 2 * np.pi * np.logspace(0, 5, 50)
+    fit_indices = [(0, 0), (2, 1)]  # layers 2 and below are fixed
+    c_integrator, np_integrator = make_integrators(omegas, fit_indices, n_layers)
+    stack = make_stack(n_layers)
+
+    # change each parameter of a fixed layer in turn, then change it back
+    changes = [None] + [(field, layer) for field in range(5) for layer in (2, n_layers - 1)]
+    for change in changes + [None]:
+        args = [np.array(a) for a in stack]
+        if change is not None:
+            field, layer = change
+            args[field][layer] *= 1.5
+            if field == 4 and args[field][layer] == 0.:
+                args[field][layer] = 1e-8
+        assert max_rel(c_integrator.ogc_integral(*args), np_integrator.ogc_integral(*args)) < 1e-12
+        assert max_rel(c_integrator.ogc_jacobian(*args), np_integrator.ogc_jacobian(*args)) < 1e-12
+    assert c_integrator.counters()["fixed_refreshes"] == len(changes) + 1
+
+
+def test_fixed_layer_cache_shared_across_threads():
+    import threading
+
+    n_layers = 12
+    omegas = 2 * np.pi * np.logspace(0, 5, 200)
+    c_integrator, np_integrator = make_integrators(omegas, [(0, 0)], n_layers)
+    stack = make_stack(n_layers)
+
+    # each thread integrates with its own substrate, so they disagree on the fixed layers
+    failures = []
+
+    def work(substrate_ky: float):
+        for i in range(10):
+            args = [np.array(a) for a in stack]
+            args[1][-1] = substrate_ky
+            args[1][-2] *= 1. + 0.1 * i
+            z = c_integrator.ogc_integral(*args)
+            if max_rel(z, np_integrator.ogc_integral(*args)) > 1e-12:
+                failures.append((substrate_ky, i))
+
+    threads = [threading.Thread(target=work, args=(ky,)) for ky in (100., 150.)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not failures
+
+
+@pytest.mark.parametrize("model", ["ogc", "bt"])
+def test_set_while_integrating_raises(model):
+    import time
+    import threading
+
+    n_layers = 12
+    omegas = 2 * np.pi * np.logspace(0, 5, 1000)
+    stack = make_stack(n_layers)
+    c_integrator = integrate.Integrator()
+    if model == "ogc":
+        def set_up():
+            c_integrator.ogc_set(omegas, [(0, 0)], HALF_WIDTH, 1e-6, 15., n_layers)
+
+        def call():
+            c_integrator.ogc_jacobian(*stack)
+    else:
+        def set_up():
+            c_integrator.bt_set(omegas, HALF_WIDTH, 1e-6 / HALF_WIDTH, 15. / HALF_WIDTH,
+                                n_layers, b"s")
+
+        def call():
+            c_integrator.bt_integral(*stack[:4])
+    set_up()
+
+    stop = threading.Event()
+
+    def work():
+        while not stop.is_set():
+            call()
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    raised = False
+    try:
+        for _ in range(1000):
+            try:
+                set_up()  # the same configuration, so a set between calls is harmless
+            except RuntimeError:
+                raised = True
+                break
+            time.sleep(1e-3)
+    finally:
+        stop.set()
+        thread.join()
+    assert raised
+    set_up()
+
+
+def test_fit_indices_accept_any_sequence_of_pairs():
+    n_layers = 4
+    omegas = 2 * np.pi * np.logspace(0, 5, 20)
+    stack = make_stack(n_layers)
+    c_integrator, _ = make_integrators(omegas, [(0, 0), (1, 2)], n_layers)
+    expected = c_integrator.ogc_jacobian(*stack)
+    for fit_indices in (((0, 0), (1, 2)), [[0, 0], [1, 2]], np.array([[0, 0], [1, 2]])):
+        c_integrator.ogc_set(omegas, fit_indices, HALF_WIDTH, 1e-6, 15., n_layers)
+        assert np.array_equal(c_integrator.ogc_jacobian(*stack), expected)
+
+    for fit_indices in (3, [0, 1], [(0,)], [(0, 0, 0)], [(0.5, 0)], [("a", 0)]):
+        with pytest.raises(Exception) as excinfo:
+            c_integrator.ogc_set(omegas, fit_indices, HALF_WIDTH, 1e-6, 15., n_layers)
+        assert excinfo.type.__name__ == "OGC_SetArgsError"
+    with pytest.raises(Exception) as excinfo:
+        c_integrator.ogc_set(omegas, [(4, 0)], HALF_WIDTH, 1e-6, 15., n_layers)
+    assert excinfo.type.__name__ == "ParameterIDError"
@@ -0,0 +1,81 @@
+"""
+Checks that the derived quantities cached by `Model` follow changes of their inputs.
+
+    python -m pytest tests
+"""
+import os
+
+import numpy as np
+import pytest
+
+from fit3omega.data import Data
+from fit3omega.fit import Fit3omega
+from fit3omega.model import Model
+from fit3omega.sample import load_sample_parameters
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example")
+SAMPLE_FILE = os.path.join(EXAMPLE_DIR, "sample.txt")
+DATA_CSV = os.path.join(EXAMPLE_DIR, "data.csv")
+
+
+@pytest.fixture
+def model() -> Model:
+    return Model(load_sample_parameters(SAMPLE_FILE), Data(DATA_CSV))
+
+
+def fresh(model: Model) -> Model:
+    """a model with the same inputs and nothing cached"""
+    return Model(model.sample, model.data)
+
+
+def test_unchanged_inputs_hit(model):
+    T2, Z2 = model.T2, model.Z2
+    assert model.T2 is T2 and model.Z2 is Z2
+    assert model.cache_stats["T2"] == {"hits": 3, "misses": 1}  # each Z2 reads T2 too
+
+
+def test_shunt_change_recomputes_everything(model):
+    Ish, T2, power, Z2 = model.Ish, model.T2, model.power, model.Z2
+    model.sample.shunt.R *= 2.
+    assert model.Ish is not Ish
+    assert model.T2 is not T2 and model.power is not power and model.Z2 is not Z2
+    assert np.allclose(model.Ish.x, Ish.x / 2.)
+    assert np.allclose(model.Z2.x, fresh(model).Z2.x)
+
+
+def test_dRdT_change_recomputes_T2_only(model):
+    Ish, T2, power = model.Ish, model.T2, model.power
+    model.sample.heater.dRdT *= 2.
+    assert model.Ish is Ish and model.power is power
+    assert model.T2 is not T2
+    assert np.allclose(model.T2.x, T2.x / 2.)
+
+
+def test_limits_change_recomputes_everything(model):
+    n = len(model.Z2.x)
+    model.data.set_limits(5, -5)
+    assert len(model.Ish.x) == len(model.T2.x) == len(model.Z2.x) == n - 10
+    assert np.array_equal(model.Z2.x, fresh(model).Z2.x)
+
+    model.data.drop_row(20)
+    assert len(model.T2.x) == n - 11
+
+
+def test_refresh_recomputes(model):
+    T2 = model.T2
+    model.refresh = True
+    assert model.T2 is not T2
+    assert np.array_equal(model.T2.x, T2.x)
+
+
+def test_heater_Cv_change_recomputes_corrected_T2():
+    ft = Fit3omega(SAMPLE_FILE, DATA_CSV)
+    T2 = ft.T2
+    misses = ft.cache_stats["T2"]["misses"]
+    ft.sample.heater.Cv = 2e6
+    assert ft.T2 is not T2
+    assert not np.allclose(ft.T2.x, T2.x)
+    assert ft.cache_stats["T2"]["misses"] == misses  # the uncorrected T2 is reused
+
+    ft.sample.heater.Cv = 0.
+    assert np.allclose(ft.T2.x, T2.x)